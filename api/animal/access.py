@@ -0,0 +1,88 @@
+"""
+Precomputed index of the animals each user may read or write
+
+Owners hand out AccessGrant rows: read or write access to their whole herd
+(no animal) or to a single animal. AnimalAccess flattens owners and grants
+into one (user, animal, can_write) row per pair, so a permission check or an
+accessible-animal listing is one lookup on its unique (user, animal) index
+instead of joins over the grants. Rows are recomputed for the animals or the
+grantee a change touches: a new animal, an animal changing hands, a grant
+being created, edited or revoked.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Subquery
+
+from .models import AccessGrant, Animal, AnimalAccess
+
+
+def _access_rows(animals, grants, user_id=None):
+    """AnimalAccess rows the owners and grants give on animals, optionally for one user"""
+    herds = defaultdict(list)
+    singles = defaultdict(list)
+    for owner_id, grantee_id, animal_id, level in grants.values_list('owner_id', 'grantee_id', 'animal_id', 'level'):
+        # A single-animal grant only counts while its giver still owns the animal
+        target = herds[owner_id] if animal_id is None else singles[owner_id, animal_id]
+        target.append((grantee_id, level == AccessGrant.WRITE))
+
+    rows = {}
+    for animal_id, owner_id in animals.values_list('id', 'owner_id').iterator(chunk_size=2000):
+        for grantee_id, can_write in [(owner_id, True)] + herds[owner_id] + singles[owner_id, animal_id]:
+            if user_id is None or grantee_id == user_id:
+                rows[grantee_id, animal_id] = rows.get((grantee_id, animal_id), False) or can_write
+    return [
+        AnimalAccess(user_id=grantee_id, animal_id=animal_id, can_write=can_write)
+        for (grantee_id, animal_id), can_write in rows.items()
+    ]
+
+
+def refresh_animal_access(animal_ids):
+    """Recompute every user's access to the given animals"""
+    animal_ids = list(animal_ids)
+    if not animal_ids:
+        return
+    animals = Animal.objects.filter(id__in=animal_ids)
+    grants = (
+        AccessGrant.objects.filter(animal_id__in=animal_ids)
+        | AccessGrant.objects.filter(animal__isnull=True, owner_id__in=Subquery(animals.values('owner_id')))
+    )
+    with transaction.atomic():
+        AnimalAccess.objects.filter(animal_id__in=animal_ids).delete()
+        AnimalAccess.objects.bulk_create(_access_rows(animals, grants), batch_size=1000)
+
+
+def refresh_grantee_access(owner_id, grantee_id):
+    """Recompute what grantee may do with owner's animals after a grant changed"""
+    grants = AccessGrant.objects.filter(owner_id=owner_id, grantee_id=grantee_id)
+    animals = Animal.objects.filter(owner_id=owner_id)
+    if not grants.filter(animal__isnull=True).exists():
+        animals = animals.filter(id__in=Subquery(grants.values('animal_id')))
+    with transaction.atomic():
+        AnimalAccess.objects.filter(user_id=grantee_id, animal__owner_id=owner_id).delete()
+        AnimalAccess.objects.bulk_create(_access_rows(animals, grants, grantee_id), batch_size=1000)
+
+
+def rebuild_access(batch_size=2000):
+    """Recompute the whole index, batch_size animals at a time; returns animals processed"""
+    last_id = processed = 0
+    while True:
+        batch = list(
+            Animal.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return processed
+        refresh_animal_access(batch)
+        processed += len(batch)
+        last_id = batch[-1]
+
+
+def has_access(user, animal, write=False):
+    """True when user may read (or with write=True, change) animal"""
+    if animal.owner_id == user.id:
+        return True
+    access = AnimalAccess.objects.filter(user=user, animal=animal)
+    if write:
+        access = access.filter(can_write=True)
+    return access.exists()
@@ -1,3 +1,94 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
-# Register your models here.
+from animal import models
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts the planner's row estimate for large unfiltered tables
+
+    An exact COUNT(*) over the history tables is a full scan on PostgreSQL;
+    the estimate from pg_class is close enough to page through a changelist.
+    Filtered querysets and other databases fall back to an exact count.
+    """
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.estimate_threshold:
+                return row[0]
+        return super().count
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(models.Animal)
+class AnimalAdmin(ScalableModelAdmin):
+    list_display = ['name', 'species', 'breed', 'owner', 'last_measured_on', 'next_vaccination_due']
+    list_select_related = ['owner']
+    list_filter = ['species']
+    search_fields = ['name']
+    autocomplete_fields = ['owner']
+    # Stable pages; the primary key index serves the ordering
+    ordering = ['id']
+    readonly_fields = [
+        'latest_weight', 'last_measured_on', 'next_vaccination_due',
+        'measurement_count', 'vaccination_count', 'detail_count',
+    ]
+
+
+@admin.register(models.AnimalMeasurement)
+class AnimalMeasurementAdmin(ScalableModelAdmin):
+    list_display = ['animal', 'date', 'weight', 'height']
+    list_select_related = ['animal']
+    date_hierarchy = 'date'
+    ordering = ['-date']
+    autocomplete_fields = ['animal']
+
+
+@admin.register(models.Vaccination)
+class VaccinationAdmin(ScalableModelAdmin):
+    list_display = ['animal', 'vaccine_name', 'date_administered', 'next_due_date']
+    list_select_related = ['animal']
+    list_filter = [('next_due_date', admin.DateFieldListFilter)]
+    date_hierarchy = 'date_administered'
+    ordering = ['-date_administered']
+    autocomplete_fields = ['animal']
+
+
+@admin.register(models.AnimalDetail)
+class AnimalDetailAdmin(ScalableModelAdmin):
+    list_display = ['animal', 'name', 'value', 'date_recorded']
+    list_select_related = ['animal']
+    date_hierarchy = 'date_recorded'
+    ordering = ['-date_recorded']
+    autocomplete_fields = ['animal']
+
+
+@admin.register(models.AttributeKey)
+class AttributeKeyAdmin(admin.ModelAdmin):
+    list_display = ['name', 'value_type', 'description']
+    search_fields = ['name']
+
+
+@admin.register(models.AccessGrant)
+class AccessGrantAdmin(admin.ModelAdmin):
+    list_display = ['grantee', 'owner', 'animal', 'level', 'created_at']
+    list_select_related = ['grantee', 'owner', 'animal']
+    list_filter = ['level']
+    autocomplete_fields = ['owner', 'grantee', 'animal']
@@ -0,0 +1,191 @@
+"""
+Vectorized weight-anomaly detection across the herd
+
+Weight series for a batch of animals are loaded into flat NumPy arrays
+sorted by (animal, date). Every statistic is computed for all animals at
+once: the rolling rate of change compares each reading with the one
+`window` readings earlier in the same animal's series, and the robust
+z-score scales it by the animal's own median and MAD of rates. Readings
+with a strongly negative score are flagged as sudden weight loss.
+
+Writes that skip save(), such as bulk updates and upserts, set the
+reading's updated_at themselves so the next run rescans the animal.
+Deleting readings, one at a time or in bulk, archiving or deduplicating,
+goes through readings_deleted: the flags of the removed readings are
+dropped at once and the animals are queued as AnomalyRescan rows, since
+the rates of their later readings changed too.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+
+from .models import AnalysisCheckpoint, AnimalMeasurement, AnomalyRescan, WeightAnomaly
+
+
+CHECKPOINT = 'weight-anomalies'
+DEFAULT_WINDOW = 3
+DEFAULT_THRESHOLD = 3.5
+MIN_RATES = 5  # rates an animal needs before its scores are trusted
+MAD_SCALE = 1.4826  # makes the MAD comparable to a standard deviation
+
+
+def load_series(animal_ids):
+    """Weighted readings of the given animals as arrays ordered by animal and date"""
+    import numpy as np  # only the batch job needs NumPy, keep it out of worker startup
+
+    rows = (
+        AnimalMeasurement.objects.filter(animal_id__in=animal_ids, weight__isnull=False)
+        .order_by('animal_id', 'date', 'id')
+        .values_list('animal_id', 'date', 'weight')
+    )
+    animal, day, weight = [], [], []
+    for animal_id, measured_on, value in rows:
+        animal.append(animal_id)
+        day.append(measured_on.toordinal())
+        weight.append(value)
+    return (
+        np.array(animal, dtype=np.int64),
+        np.array(day, dtype=np.int64),
+        np.array(weight, dtype=np.float64),
+    )
+
+
+def rolling_rate(animal, day, weight, window):
+    """Change per day against the reading `window` places earlier in the same series"""
+    import numpy as np
+
+    rate = np.full(weight.shape, np.nan)
+    if len(weight) <= window:
+        return rate
+    current = np.arange(window, len(weight))
+    previous = current - window
+    elapsed = day[current] - day[previous]
+    valid = (animal[current] == animal[previous]) & (elapsed > 0)
+    current, previous, elapsed = current[valid], previous[valid], elapsed[valid]
+    rate[current] = (weight[current] - weight[previous]) / elapsed
+    return rate
+
+
+def _group_median(group, values):
+    """Median of values per group, broadcast back to each element
+
+    Elements are sorted by (group, value) once; each group's median is then
+    read at the middle of its run.
+    """
+    import numpy as np
+
+    order = np.lexsort((values, group))
+    sorted_groups = group[order]
+    sorted_values = values[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_groups)])
+    lower = sorted_values[starts + (counts - 1) // 2]
+    upper = sorted_values[starts + counts // 2]
+    medians = np.empty_like(values)
+    medians[order] = np.repeat((lower + upper) / 2, counts)
+    sizes = np.empty_like(group)
+    sizes[order] = np.repeat(counts, counts)
+    return medians, sizes
+
+
+def robust_zscores(group, values):
+    """Per-group robust z-score (value - median) / (1.4826 * MAD); NaN where undefined"""
+    import numpy as np
+
+    scores = np.full(values.shape, np.nan)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return scores
+    group, subset = group[valid], values[valid]
+    median, counts = _group_median(group, subset)
+    deviation = np.abs(subset - median)
+    mad, _ = _group_median(group, deviation)
+    spread = MAD_SCALE * mad
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where((spread > 0) & (counts >= MIN_RATES), (subset - median) / spread, np.nan)
+    scores[valid] = z
+    return scores
+
+
+def detect(animal, day, weight, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    """Indexes of readings that are sudden losses, with their rates and scores"""
+    import numpy as np
+
+    rate = rolling_rate(animal, day, weight, window)
+    scores = robust_zscores(animal, rate)
+    with np.errstate(invalid='ignore'):
+        flagged = np.flatnonzero((scores <= -threshold) & (rate < 0))
+    return flagged, rate, scores
+
+
+def scan_animals(animal_ids, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    """Recompute the flags of a batch of animals from their full series"""
+    animal, day, weight = load_series(animal_ids)
+    flagged, rate, scores = detect(animal, day, weight, window, threshold)
+    anomalies = [
+        WeightAnomaly(
+            animal_id=int(animal[i]),
+            date=date.fromordinal(int(day[i])),
+            weight=Decimal(str(weight[i])).quantize(Decimal('0.01')),
+            rate_of_change=round(float(rate[i]), 4),
+            zscore=round(float(scores[i]), 4),
+        )
+        for i in flagged
+    ]
+    with transaction.atomic():
+        WeightAnomaly.objects.filter(animal_id__in=animal_ids).delete()
+        WeightAnomaly.objects.bulk_create(anomalies, ignore_conflicts=True)
+    return len(anomalies)
+
+
+def readings_deleted(animal_ids):
+    """Drop the flags of readings that no longer exist and queue the animals for a rescan"""
+    animal_ids = list(animal_ids)
+    if not animal_ids:
+        return
+    reading = AnimalMeasurement.objects.filter(
+        animal_id=OuterRef('animal_id'), date=OuterRef('date'), weight__isnull=False,
+    )
+    WeightAnomaly.objects.filter(animal_id__in=animal_ids).exclude(Exists(reading)).delete()
+    now = timezone.now()
+    AnomalyRescan.objects.bulk_create(
+        [AnomalyRescan(animal_id=animal_id, queued_at=now) for animal_id in animal_ids],
+        update_conflicts=True,
+        unique_fields=['animal'],
+        update_fields=['queued_at'],
+    )
+
+
+def run_detection(full=False, batch_size=500, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+    """Scan animals with readings added, edited or deleted since the last run (or all, with full)
+
+    New readings are found by id, edited ones by updated_at against the
+    start of the previous run, and deletions by their AnomalyRescan rows.
+    Returns (animals scanned, anomalies flagged).
+    """
+    checkpoint, _ = AnalysisCheckpoint.objects.get_or_create(name=CHECKPOINT)
+    started = timezone.now()
+    since = 0 if full else checkpoint.last_measurement_id
+    high_water = AnimalMeasurement.objects.aggregate(top=Max('id'))['top'] or 0
+
+    changed = Q(id__gt=since, id__lte=high_water)
+    if checkpoint.started_at and not full:
+        changed |= Q(updated_at__gte=checkpoint.started_at)
+    animal_ids = set(AnimalMeasurement.objects.filter(changed).values_list('animal_id', flat=True).distinct())
+    # A rescan queued during this run waits for the next one
+    rescans = AnomalyRescan.objects.filter(queued_at__lt=started)
+    animal_ids = sorted(animal_ids | set(rescans.values_list('animal_id', flat=True)))
+    flagged = 0
+    for start in range(0, len(animal_ids), batch_size):
+        batch = animal_ids[start:start + batch_size]
+        flagged += scan_animals(batch, window, threshold)
+        rescans.filter(animal_id__in=batch).delete()
+
+    checkpoint.last_measurement_id = max(high_water, checkpoint.last_measurement_id)
+    checkpoint.started_at = started
+    checkpoint.save()
+    return len(animal_ids), flagged
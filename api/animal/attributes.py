@@ -0,0 +1,141 @@
+"""
+Typed animal attributes and the indexed queries over them
+
+Values are stored in the column matching their key's type, so equality
+and range filters become lookups on a (key, value) index. Animal queries
+take parameters of the form attr__<key>[__<op>]=<value>.
+"""
+
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Subquery
+from rest_framework.exceptions import ValidationError
+
+from .models import AnimalAttribute, AnimalDetail, AttributeKey
+
+
+ATTRIBUTE_PARAM = re.compile(r'^attr__(?P<key>[-a-zA-Z0-9_]+?)(?:__(?P<op>gt|gte|lt|lte))?$')
+RANGE_TYPES = (AttributeKey.TEXT, AttributeKey.NUMBER, AttributeKey.DATE)
+TRUE_VALUES = ('true', '1', 'yes')
+FALSE_VALUES = ('false', '0', 'no')
+MAX_NUMBER = 10 ** 10  # value_number holds 14 digits, 4 of them decimals
+MAX_TEXT_LENGTH = 255
+
+
+def parse_value(key, raw):
+    """Convert raw input to the Python type of key; raises ValueError when it does not fit"""
+    if key.value_type == AttributeKey.NUMBER:
+        if isinstance(raw, bool):
+            raise ValueError(f'{key.name} expects a number.')
+        try:
+            number = Decimal(str(raw))
+        except InvalidOperation:
+            raise ValueError(f'{key.name} expects a number.')
+        if not number.is_finite() or abs(number) >= MAX_NUMBER:
+            raise ValueError(f'{key.name} expects a number below {MAX_NUMBER}.')
+        return number
+    if key.value_type == AttributeKey.DATE:
+        try:
+            return date.fromisoformat(str(raw))
+        except ValueError:
+            raise ValueError(f'{key.name} expects a date (YYYY-MM-DD).')
+    if key.value_type == AttributeKey.BOOLEAN:
+        if isinstance(raw, bool):
+            return raw
+        if str(raw).lower() in TRUE_VALUES:
+            return True
+        if str(raw).lower() in FALSE_VALUES:
+            return False
+        raise ValueError(f'{key.name} expects true or false.')
+    if not isinstance(raw, (str, int, Decimal)) or isinstance(raw, bool):
+        raise ValueError(f'{key.name} expects text.')
+    if len(str(raw)) > MAX_TEXT_LENGTH:
+        raise ValueError(f'{key.name} is limited to {MAX_TEXT_LENGTH} characters.')
+    return str(raw)
+
+
+def typed_values(key, value):
+    """Column values for storing value under key, clearing the other columns"""
+    columns = {f'value_{value_type}': None for value_type, _ in AttributeKey.TYPE_CHOICES}
+    columns[key.column] = value
+    return columns
+
+
+def attribute_filters(params):
+    """[(key name, op, raw value)] for the attr__ parameters of a query string"""
+    filters = []
+    for param, raw in params.items():
+        match = ATTRIBUTE_PARAM.match(param)
+        if match:
+            filters.append((match['key'], match['op'] or 'exact', raw))
+    return filters
+
+
+def filter_by_attributes(animals, params):
+    """Narrow animals by the attr__ query parameters
+
+    Each filter resolves its animal ids from the (key, value) index and is
+    applied as id IN (...), one subquery per filter.
+    """
+    filters = attribute_filters(params)
+    if not filters:
+        return animals
+    keys = AttributeKey.objects.in_bulk({name for name, _, _ in filters}, field_name='name')
+    errors = {}
+    for name, op, raw in filters:
+        key = keys.get(name)
+        if key is None:
+            errors[f'attr__{name}'] = 'Unknown attribute.'
+            continue
+        if op != 'exact' and key.value_type not in RANGE_TYPES:
+            errors[f'attr__{name}__{op}'] = f'{name} only supports equality.'
+            continue
+        try:
+            value = parse_value(key, raw)
+        except ValueError as error:
+            errors[f'attr__{name}'] = str(error)
+            continue
+        matching = AnimalAttribute.objects.filter(key=key, **{f'{key.column}__{op}': value})
+        animals = animals.filter(id__in=Subquery(matching.values('animal_id')))
+    if errors:
+        raise ValidationError(errors)
+    return animals
+
+
+def import_detail_attributes(keys=None):
+    """Copy the latest AnimalDetail value of each declared key into typed attributes
+
+    Returns (attributes written, details skipped because their value does not
+    fit the key's type).
+    """
+    keys = list(keys if keys is not None else AttributeKey.objects.all())
+    written = skipped = 0
+    for key in keys:
+        details = (
+            AnimalDetail.objects.filter(name=key.name)
+            .order_by('animal_id', '-date_recorded', '-id')
+            .values_list('animal_id', 'value')
+        )
+        attributes = []
+        last_animal = None
+        for animal_id, raw in details.iterator(chunk_size=2000):
+            if animal_id == last_animal:
+                continue
+            last_animal = animal_id
+            try:
+                value = parse_value(key, raw)
+            except ValueError:
+                skipped += 1
+                continue
+            attributes.append(AnimalAttribute(animal_id=animal_id, key=key, **typed_values(key, value)))
+        AnimalAttribute.objects.bulk_create(
+            attributes,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['animal', 'key'],
+            update_fields=['value_text', 'value_number', 'value_date', 'value_boolean', 'updated_at'],
+        )
+        written += len(attributes)
+    return written, skipped
@@ -0,0 +1,163 @@
+"""
+Resumable backfills of large tables, run next to live traffic
+
+A RunPython migration over a big table holds one transaction and its locks
+until every row is done. Instead, a migration only adds the column, the
+code that keeps it current for new writes is deployed, and
+`manage.py run_backfill <name>` fills in the existing rows.
+
+Each Backfill walks its model in primary key order up to the largest key
+present when it started; rows written later are kept current by the live
+code. A batch of keys is handed to the task's apply function in its own
+transaction, which also advances the BackfillCheckpoint. An interrupted
+or failed run therefore resumes after the last committed batch. Batches
+are sized to take about BACKFILL['TARGET_SECONDS'] and followed by a pause
+of BACKFILL['PAUSE'] seconds, so the database keeps serving requests. A
+run claims its checkpoint, so a second runner of the same backfill stops
+unless the claim is older than BACKFILL['STALE_AFTER_MINUTES'].
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .access import refresh_animal_access
+from .models import BackfillCheckpoint
+from .rollups import rebuild_rollups
+from .summary import refresh_summaries
+from .vocabulary import rebuild_vocabulary
+
+
+DEFAULT_BACKFILL = {
+    'BATCH_SIZE': 500,  # first batch; later ones adapt to TARGET_SECONDS
+    'MAX_BATCH_SIZE': 5000,
+    'TARGET_SECONDS': 0.5,
+    'PAUSE': 0.1,
+    'STALE_AFTER_MINUTES': 10,
+}
+
+
+@dataclass(frozen=True)
+class Backfill:
+    name: str
+    model: str  # app_label.ModelName walked in primary key order
+    apply: Callable  # called with a list of primary keys, returns rows changed
+    description: str = ''
+    max_batch_size: int = None  # for apply functions doing a lot of work per key
+
+
+def _per_owner(rebuild):
+    def apply(owner_ids):
+        written = 0
+        for owner_id in owner_ids:
+            written += rebuild(owner_id=owner_id)
+        return written
+    return apply
+
+
+def _refresh_access(animal_ids):
+    refresh_animal_access(animal_ids)
+    return len(animal_ids)
+
+
+BACKFILLS = {backfill.name: backfill for backfill in (
+    Backfill('animal-summaries', 'animal.Animal', refresh_summaries, 'Summary columns of Animal'),
+    Backfill('animal-access', 'animal.Animal', _refresh_access, 'AnimalAccess index rows'),
+    Backfill(
+        'monthly-rollups', settings.AUTH_USER_MODEL, _per_owner(rebuild_rollups),
+        'Monthly reporting rollups, one owner at a time', max_batch_size=50,
+    ),
+    Backfill(
+        'vocabulary', settings.AUTH_USER_MODEL, _per_owner(rebuild_vocabulary),
+        'Autocomplete vocabularies, one owner at a time', max_batch_size=50,
+    ),
+)}
+
+
+class BackfillBusy(Exception):
+    """Another runner holds a fresh claim on the backfill"""
+
+
+def backfill_setting(name):
+    return getattr(settings, 'BACKFILL', {}).get(name, DEFAULT_BACKFILL[name])
+
+
+def _claim(checkpoint):
+    """Take the checkpoint unless another runner holds a fresh claim on it"""
+    now = timezone.now()
+    stale = now - timedelta(minutes=backfill_setting('STALE_AFTER_MINUTES'))
+    claimed = BackfillCheckpoint.objects.filter(
+        id=checkpoint.id, claimed_at=checkpoint.claimed_at,
+    ).exclude(claimed_at__gt=stale).update(claimed_at=now)
+    checkpoint.claimed_at = now
+    return claimed
+
+
+def next_batch_size(size, elapsed, limit):
+    """Scale size towards TARGET_SECONDS per batch, at most doubling it"""
+    wanted = int(size * backfill_setting('TARGET_SECONDS') / max(elapsed, 0.001))
+    return max(1, min(wanted, size * 2, limit))
+
+
+def run_backfill(name, batch_size=None, max_batches=None, restart=False):
+    """Run or resume the named backfill; returns its checkpoint
+
+    max_batches stops early, leaving the rest to a later run. A finished
+    backfill is not run again unless restart is set.
+    """
+    backfill = BACKFILLS[name]
+    model = apps.get_model(backfill.model)
+    checkpoint, _ = BackfillCheckpoint.objects.get_or_create(name=name)
+    if restart:
+        checkpoint.last_pk = checkpoint.rows = checkpoint.batches = 0
+        checkpoint.target_pk = checkpoint.batch_size = checkpoint.started_at = checkpoint.finished_at = None
+    elif checkpoint.finished_at:
+        return checkpoint
+    if not _claim(checkpoint):
+        raise BackfillBusy(f"Backfill '{name}' is being run by another process.")
+
+    limit = min(backfill.max_batch_size or backfill_setting('MAX_BATCH_SIZE'), backfill_setting('MAX_BATCH_SIZE'))
+    if batch_size:
+        checkpoint.batch_size = batch_size
+    size = min(checkpoint.batch_size or backfill_setting('BATCH_SIZE'), limit)
+    if checkpoint.target_pk is None:
+        checkpoint.target_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        checkpoint.started_at = timezone.now()
+    checkpoint.error = ''
+    checkpoint.save()
+
+    try:
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            keys = list(
+                model.objects.filter(pk__gt=checkpoint.last_pk, pk__lte=checkpoint.target_pk)
+                .order_by('pk').values_list('pk', flat=True)[:size]
+            )
+            if not keys:
+                checkpoint.finished_at = timezone.now()
+                break
+            started = time.monotonic()
+            with transaction.atomic():
+                changed = backfill.apply(keys) or 0
+                checkpoint.last_pk = keys[-1]
+                checkpoint.rows += changed
+                checkpoint.batches += 1
+                checkpoint.claimed_at = timezone.now()
+                checkpoint.batch_size = size = next_batch_size(size, time.monotonic() - started, limit)
+                checkpoint.save(update_fields=['last_pk', 'rows', 'batches', 'claimed_at', 'batch_size'])
+            batches += 1
+            time.sleep(backfill_setting('PAUSE'))
+    except Exception as error:
+        checkpoint.error = repr(error)
+        raise
+    finally:
+        checkpoint.claimed_at = None
+        checkpoint.save(update_fields=['finished_at', 'error', 'claimed_at'])
+    return checkpoint
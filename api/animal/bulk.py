@@ -0,0 +1,155 @@
+"""
+Filter-based bulk changes to the animal histories a user may write
+
+Each operation is one access-scoped UPDATE or DELETE statement. Both
+bypass model signals, so the summaries, monthly rollups and vocabularies
+of the touched animals, buckets and values are refreshed explicitly afterwards.
+Deleted readings are also handed to the weight-anomaly rescan queue.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.db.models.functions import Now, TruncMonth
+
+from .anomalies import readings_deleted
+from .models import AnimalDetail, AnimalMeasurement, Vaccination, VaccinationReminder
+from .rollups import MEASUREMENTS, VACCINATIONS, refresh_rollups
+from .summary import refresh_summaries
+from .vocabulary import refresh_vocabulary
+
+
+@dataclass(frozen=True)
+class BulkResource:
+    model: type
+    date_field: str
+    settable: tuple
+    adjustable: tuple = ()  # numeric fields that accept an offset
+    rollup_source: str = None
+    vocabulary: tuple = ()  # free-text fields counted by animal.vocabulary
+
+
+BULK_RESOURCES = {
+    'measurements': BulkResource(
+        AnimalMeasurement, 'date', ('weight', 'height'), ('weight', 'height'), MEASUREMENTS,
+    ),
+    'vaccinations': BulkResource(
+        Vaccination, 'date_administered', ('vaccine_name', 'description', 'next_due_date'), (), VACCINATIONS,
+        ('vaccine_name',),
+    ),
+    'details': BulkResource(
+        AnimalDetail, 'date_recorded', ('name', 'value'),
+    ),
+}
+
+
+def bulk_queryset(user, resource, ids=None, animal_ids=None, date_from=None, date_to=None):
+    """Rows of resource on animals the user may write matching every given filter"""
+    queryset = resource.model.objects.filter(
+        animal__access__user=user, animal__access__can_write=True, animal__pending_deletion=False,
+    )
+    if ids:
+        queryset = queryset.filter(id__in=ids)
+    if animal_ids:
+        queryset = queryset.filter(animal_id__in=animal_ids)
+    if date_from:
+        queryset = queryset.filter(**{f'{resource.date_field}__gte': date_from})
+    if date_to:
+        queryset = queryset.filter(**{f'{resource.date_field}__lte': date_to})
+    return queryset.order_by()
+
+
+def _affected(queryset, resource):
+    """Animal ids, rollup buckets and vocabulary keys the rows of queryset belong to"""
+    animal_ids = list(queryset.values_list('animal_id', flat=True).distinct())
+    keys = set()
+    if resource.rollup_source:
+        keys = set(
+            queryset.annotate(month=TruncMonth(resource.date_field))
+            .values_list('animal__owner_id', 'animal__species', 'month')
+            .distinct()
+        )
+    terms = set()
+    for field in resource.vocabulary:
+        terms |= {
+            (owner_id, field, value)
+            for owner_id, value in queryset.values_list('animal__owner_id', field).distinct()
+        }
+    return animal_ids, keys, terms
+
+
+def _refresh(resource, animal_ids, keys, terms):
+    refresh_summaries(animal_ids)
+    if keys:
+        refresh_rollups(keys, [resource.rollup_source])
+    refresh_vocabulary(terms)
+
+
+class OffsetOutOfRange(ValueError):
+    pass
+
+
+def check_offsets(queryset, offsets):
+    """Raise OffsetOutOfRange unless every offset row stays between zero and its field's largest value"""
+    if not offsets:
+        return
+    bounds = queryset.aggregate(**{
+        f'{bound}_{field}': function(field)
+        for field in offsets for bound, function in (('min', Min), ('max', Max))
+    })
+    for field, offset in offsets.items():
+        column = queryset.model._meta.get_field(field)
+        step = Decimal(10) ** -column.decimal_places
+        largest = Decimal(10) ** (column.max_digits - column.decimal_places) - step
+        lowest, highest = bounds[f'min_{field}'], bounds[f'max_{field}']
+        if lowest is not None and (lowest + offset < 0 or highest + offset > largest):
+            raise OffsetOutOfRange(
+                f'Offsetting {field} by {offset} would take values from {lowest}-{highest} '
+                f'outside 0-{largest}.'
+            )
+
+
+def bulk_update(queryset, resource, values=None, offsets=None):
+    """Set values and shift numeric fields by offsets in one UPDATE; returns rows changed
+
+    Raises OffsetOutOfRange, before changing anything, when an offset would
+    take a matched row below zero or past what its column holds.
+    """
+    changes = dict(values or {})
+    for field, offset in (offsets or {}).items():
+        changes[field] = F(field) + offset
+    if not changes:
+        return 0
+    # update() skips auto_now, which change tracking such as animal.anomalies relies on
+    for field in resource.model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            changes[field.name] = Now()
+    with transaction.atomic():
+        check_offsets(queryset, offsets)
+        animal_ids, keys, terms = _affected(queryset, resource)
+        updated = queryset.update(**changes)
+        for field in set(resource.vocabulary) & set(changes):
+            terms |= {(owner_id, field, changes[field]) for owner_id, _, _ in terms}
+        _refresh(resource, animal_ids, keys, terms)
+    return updated
+
+
+def bulk_delete(queryset, resource, rescan=True):
+    """Delete the rows of queryset without loading them; returns rows deleted
+
+    With rescan=False deleted readings are not queued for the weight-anomaly
+    job, for callers that rescan the animals themselves.
+    """
+    with transaction.atomic():
+        animal_ids, keys, terms = _affected(queryset, resource)
+        if resource.model is Vaccination:
+            # _raw_delete skips the cascade, so clear the outbox rows first
+            reminders = VaccinationReminder.objects.filter(vaccination__in=queryset.values('id'))
+            reminders._raw_delete(reminders.db)
+        deleted = queryset._raw_delete(queryset.db)
+        _refresh(resource, animal_ids, keys, terms)
+        if rescan and resource.model is AnimalMeasurement:
+            readings_deleted(animal_ids)
+    return deleted
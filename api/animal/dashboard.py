@@ -0,0 +1,95 @@
+"""
+Owner dashboard computed with a fixed number of aggregate queries
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import Lead, RowNumber
+from django.utils import timezone
+
+from .models import Animal, AnimalMeasurement, Vaccination
+
+
+STALE_WEIGHT_DAYS = 30
+RECENT_CHANGE_DAYS = 30
+
+
+def herd_by_species(animals, today):
+    """Herd size, unweighed and overdue animals per species in one grouped query"""
+    stale_cutoff = today - timedelta(days=STALE_WEIGHT_DAYS)
+    return list(
+        animals.values('species')
+        .annotate(
+            total=Count('id'),
+            not_weighed=Count(
+                'id',
+                filter=Q(last_measured_on__isnull=True) | Q(last_measured_on__lt=stale_cutoff)
+            ),
+            overdue=Count('id', filter=Q(next_vaccination_due__lt=today)),
+        )
+        .order_by('species')
+    )
+
+
+def overdue_vaccinations(animals, today):
+    return list(
+        Vaccination.objects.current()
+        .filter(animal__in=animals, next_due_date__lt=today)
+        .order_by('next_due_date', 'id')
+        .values('animal_id', 'vaccine_name', 'next_due_date', animal_name=F('animal__name'))
+    )
+
+
+def stale_animals(animals, today):
+    stale_cutoff = today - timedelta(days=STALE_WEIGHT_DAYS)
+    return list(
+        animals.filter(Q(last_measured_on__isnull=True) | Q(last_measured_on__lt=stale_cutoff))
+        .order_by(F('last_measured_on').asc(nulls_first=True), 'name')
+        .values('id', 'name', 'species', 'last_measured_on')
+    )
+
+
+def recent_weight_changes(animals, today):
+    """Latest weighing of each animal against the one before it, via window functions
+
+    The recency cut is applied to the windowed rows in Python: a plain date
+    filter would be pushed inside the window and hide the previous reading.
+    """
+    cutoff = today - timedelta(days=RECENT_CHANGE_DAYS)
+    per_animal = {
+        'partition_by': F('animal_id'),
+        'order_by': [F('date').desc(), F('id').desc()],
+    }
+    rows = (
+        AnimalMeasurement.objects.filter(animal__in=animals, weight__isnull=False)
+        .annotate(
+            position=Window(RowNumber(), **per_animal),
+            previous_weight=Window(Lead('weight'), **per_animal),
+            previous_date=Window(Lead('date'), **per_animal),
+        )
+        .filter(position=1, previous_weight__isnull=False)
+        .order_by('-date', 'animal_id')
+        .values('animal_id', 'date', 'weight', 'previous_date', 'previous_weight',
+                animal_name=F('animal__name'))
+    )
+    changes = []
+    for row in rows:
+        if row['date'] < cutoff:
+            break
+        row['change'] = row['weight'] - row['previous_weight']
+        changes.append(row)
+    return changes
+
+
+def build_dashboard(user, today=None):
+    today = today or timezone.localdate()
+    animals = Animal.objects.active().filter(owner=user)
+    species = herd_by_species(animals, today)
+    return {
+        'herd_size': sum(row['total'] for row in species),
+        'species': species,
+        'overdue_vaccinations': overdue_vaccinations(animals, today),
+        'not_weighed': stale_animals(animals, today),
+        'recent_weight_changes': recent_weight_changes(animals, today),
+    }
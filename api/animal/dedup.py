@@ -0,0 +1,84 @@
+"""
+One measurement per animal and day
+
+Scales retry their uploads, so AnimalMeasurement is unique on (animal, date)
+and writes are upserts: a reading for a day the animal already has replaces
+it. dedupe_measurements removes the duplicates recorded before the
+constraint existed, a batch of animals per short transaction, keeping the
+most recently written row of each day; migration 0016 refuses to add the
+constraint until it has. It runs before the later migrations, so the
+affected animals' weight anomalies are rescanned at once rather than queued.
+"""
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .anomalies import scan_animals
+from .bulk import BULK_RESOURCES, bulk_delete
+from .models import Animal, AnimalMeasurement
+from .rollups import MEASUREMENTS, month_of, refresh_rollups
+from .summary import refresh_summaries
+
+
+UNIQUE_FIELDS = ['animal', 'date']
+UPDATE_FIELDS = ['weight', 'height', 'updated_at']
+
+
+def upsert_measurements(measurements):
+    """Insert unsaved measurements, replacing the readings of days that already exist
+
+    Within the batch the last reading of a day wins. Returns the rows written.
+    """
+    rows = list({(m.animal_id, m.date): m for m in measurements}.values())
+    if not rows:
+        return rows
+    animal_ids = {m.animal_id for m in rows}
+    animals = Animal.objects.filter(id__in=animal_ids).values_list('id', 'owner_id', 'species')
+    buckets = {animal_id: (owner_id, species) for animal_id, owner_id, species in animals}
+    keys = {(*buckets[m.animal_id], month_of(m.date)) for m in rows}
+    with transaction.atomic():
+        # bulk_create skips the model signals, so refresh what they would have
+        AnimalMeasurement.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=UNIQUE_FIELDS,
+            update_fields=UPDATE_FIELDS,
+        )
+        refresh_summaries(animal_ids)
+        refresh_rollups(keys, [MEASUREMENTS])
+    return rows
+
+
+def duplicate_measurements(animal_ids):
+    """Measurements of animal_ids superseded by a later row for the same day"""
+    newer = AnimalMeasurement.objects.filter(
+        animal_id=OuterRef('animal_id'), date=OuterRef('date'), id__gt=OuterRef('id'),
+    )
+    return AnimalMeasurement.objects.filter(animal_id__in=animal_ids).filter(Exists(newer))
+
+
+def dedupe_measurements(batch_size=500, dry_run=False):
+    """Delete superseded duplicates batch_size animals at a time
+
+    Returns (rows removed, animals affected); with dry_run nothing is deleted.
+    """
+    resource = BULK_RESOURCES['measurements']
+    last_id = removed = affected = 0
+    while True:
+        batch = list(
+            Animal.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return removed, affected
+        last_id = batch[-1]
+        ids = list(duplicate_measurements(batch).values_list('id', flat=True))
+        if not ids:
+            continue
+        animal_ids = set(AnimalMeasurement.objects.filter(id__in=ids).values_list('animal_id', flat=True))
+        affected += len(animal_ids)
+        if dry_run:
+            removed += len(ids)
+        else:
+            removed += bulk_delete(AnimalMeasurement.objects.filter(id__in=ids), resource, rescan=False)
+            scan_animals(animal_ids)
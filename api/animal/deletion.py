@@ -0,0 +1,189 @@
+"""
+Fast deletion of animals and users with large histories
+
+Django's deletion collector loads every related row to run signals and
+cascades in Python. purge_animals instead removes the history tables with
+set-based DELETE statements, a chunk of ids per transaction, and only
+then the animals; the monthly rollups and vocabularies the animals fed are
+refreshed explicitly. Deletions too large for a request are queued as DeletionJob
+rows and carried out by process_deletion_jobs.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import (
+    AccessGrant, Animal, AnimalAccess, DeletionJob, MonthlyRollup, VaccinationReminder, VocabularyTerm,
+)
+from .rollups import animal_rollup_keys, refresh_rollups
+from .vocabulary import animal_vocabulary_keys, refresh_vocabulary
+
+
+DEFAULT_FAST_DELETE = {
+    'SYNC_ROW_LIMIT': 1000,
+    'CHUNK_SIZE': 2000,
+    'STALE_AFTER_MINUTES': 60,
+}
+
+def cascade_tables(model, lookup='id__in'):
+    """(model, lookup) of every table a delete of model cascades to, children first
+
+    Built from the reverse relations, so a new history table is purged
+    without being listed here.
+    """
+    tables = []
+    for relation in model._meta.related_objects:
+        if relation.on_delete is not models.CASCADE:
+            continue
+        path = f'{relation.field.name}__{lookup}'
+        tables += cascade_tables(relation.related_model, path)
+        tables.append((relation.related_model, path))
+    return tables
+
+
+# Reminders are reached through their vaccinations
+HISTORY_TABLES = tuple(cascade_tables(Animal))
+
+
+def fast_delete_setting(name):
+    return getattr(settings, 'FAST_DELETE', {}).get(name, DEFAULT_FAST_DELETE[name])
+
+
+def history_size(animal):
+    """Rows deleting the animal touches, read from its summary columns"""
+    return animal.measurement_count + animal.vaccination_count + animal.detail_count
+
+
+def user_history_size(user):
+    """Rows deleting the user's animals touches, read from their summary columns"""
+    return Animal.objects.filter(owner_id=user.id).aggregate(
+        rows=models.Sum(models.F('measurement_count') + models.F('vaccination_count') + models.F('detail_count'))
+    )['rows'] or 0
+
+
+def delete_in_chunks(queryset, chunk_size):
+    """DELETE the rows of queryset chunk_size ids at a time; returns rows deleted"""
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            chunk = model.objects.filter(id__in=ids)
+            deleted += chunk._raw_delete(chunk.db)
+
+
+def purge_animals(animal_ids, chunk_size=None, refresh=True):
+    """Delete animals and their histories without loading them; returns rows deleted
+
+    With refresh=False the monthly rollups and vocabularies are left alone,
+    for callers that remove the owner's ones themselves.
+    """
+    animal_ids = list(animal_ids)
+    chunk_size = chunk_size or fast_delete_setting('CHUNK_SIZE')
+    keys = animal_rollup_keys(animal_ids) if refresh else set()
+    terms = animal_vocabulary_keys(animal_ids) if refresh else set()
+
+    deleted = 0
+    for model, lookup in HISTORY_TABLES:
+        deleted += delete_in_chunks(model.objects.filter(**{lookup: animal_ids}), chunk_size)
+    deleted += delete_in_chunks(Animal.objects.filter(id__in=animal_ids), chunk_size)
+    if keys:
+        refresh_rollups(keys)
+    refresh_vocabulary(terms)
+    return deleted
+
+
+def purge_user(user_id, chunk_size=None):
+    """Delete a user's animals in batches, then the user; returns rows deleted"""
+    chunk_size = chunk_size or fast_delete_setting('CHUNK_SIZE')
+    animals = Animal.objects.filter(owner_id=user_id).order_by('id')
+    deleted = 0
+    while True:
+        batch = list(animals.values_list('id', flat=True)[:chunk_size])
+        if not batch:
+            break
+        deleted += purge_animals(batch, chunk_size, refresh=False)
+    deleted += delete_in_chunks(MonthlyRollup.objects.filter(owner_id=user_id), chunk_size)
+    deleted += delete_in_chunks(VocabularyTerm.objects.filter(owner_id=user_id), chunk_size)
+    deleted += delete_in_chunks(VaccinationReminder.objects.filter(owner_id=user_id), chunk_size)
+    deleted += delete_in_chunks(AccessGrant.objects.filter(owner_id=user_id), chunk_size)
+    deleted += delete_in_chunks(AccessGrant.objects.filter(grantee_id=user_id), chunk_size)
+    deleted += delete_in_chunks(AnimalAccess.objects.filter(user_id=user_id), chunk_size)
+    # Only small tables (tokens, permissions) remain for the collector
+    count, _ = get_user_model().objects.filter(id=user_id).delete()
+    return deleted + count
+
+
+def delete_animal(animal):
+    """Delete an animal now if its history is small, otherwise queue it
+
+    Returns the queued DeletionJob, or None when the animal is already gone.
+    """
+    if history_size(animal) <= fast_delete_setting('SYNC_ROW_LIMIT'):
+        purge_animals([animal.id])
+        return None
+    keys = animal_rollup_keys([animal.id])
+    with transaction.atomic():
+        Animal.objects.filter(id=animal.id).update(pending_deletion=True)
+        # Hidden animals no longer count towards the rollups
+        refresh_rollups(keys)
+        return DeletionJob.objects.create(kind=DeletionJob.ANIMAL, target_id=animal.id)
+
+
+def delete_user(user):
+    """Delete a user now if their animals' histories are small, otherwise queue it
+
+    Returns the queued DeletionJob, or None when the user is already gone.
+    """
+    if user_history_size(user) <= fast_delete_setting('SYNC_ROW_LIMIT'):
+        purge_user(user.id)
+        return None
+    return queue_user_deletion(user)
+
+
+def queue_user_deletion(user):
+    """Deactivate a user and hide their animals until a job deletes them"""
+    with transaction.atomic():
+        get_user_model().objects.filter(id=user.id).update(is_active=False)
+        Animal.objects.filter(owner_id=user.id).update(pending_deletion=True)
+        return DeletionJob.objects.create(kind=DeletionJob.USER, target_id=user.id)
+
+
+def _claim(job):
+    """Mark a job as started unless another worker holds a fresh claim on it"""
+    now = timezone.now()
+    stale = now - timedelta(minutes=fast_delete_setting('STALE_AFTER_MINUTES'))
+    return DeletionJob.objects.filter(
+        id=job.id, finished_at__isnull=True, started_at=job.started_at
+    ).exclude(started_at__gt=stale).update(started_at=now, attempts=job.attempts + 1)
+
+
+def process_deletion_jobs(limit=None):
+    """Run pending deletion jobs oldest first; returns (jobs finished, jobs failed)
+
+    Every step is idempotent, so a failed or interrupted job is simply
+    picked up again by a later run.
+    """
+    finished = failed = 0
+    pending = DeletionJob.objects.filter(finished_at__isnull=True).order_by('id')
+    for job in pending[:limit] if limit else pending:
+        if not _claim(job):
+            continue
+        try:
+            if job.kind == DeletionJob.USER:
+                purge_user(job.target_id)
+            else:
+                purge_animals([job.target_id])
+        except Exception as error:
+            DeletionJob.objects.filter(id=job.id).update(error=repr(error), started_at=None)
+            failed += 1
+        else:
+            DeletionJob.objects.filter(id=job.id).update(finished_at=timezone.now(), error='')
+            finished += 1
+    return finished, failed
@@ -0,0 +1,59 @@
+"""
+One vaccination given to many animals in a single request
+
+The selected animals are resolved and authorized with one query against the
+access index and every dose is written by one bulk_create. bulk_create skips
+the model signals, so summaries, monthly rollups and vocabularies are
+refreshed explicitly.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Animal, Vaccination, VocabularyTerm
+from .rollups import VACCINATIONS, month_of, refresh_rollups
+from .summary import refresh_summaries
+from .vocabulary import refresh_vocabulary
+
+
+def vaccine_interval(vaccine_name):
+    """Days until the next dose of vaccine_name from VACCINE_INTERVALS, matched case-insensitively"""
+    intervals = {name.lower(): days for name, days in getattr(settings, 'VACCINE_INTERVALS', {}).items()}
+    return intervals.get(vaccine_name.strip().lower())
+
+
+def next_due(vaccine_name, date_administered, interval_days=None):
+    days = interval_days or vaccine_interval(vaccine_name)
+    return date_administered + timedelta(days=days) if days else None
+
+
+def select_animals(user, animal_ids=None, species=None, breed=None):
+    """(id, owner id, species) of the animals user may write matching every given selector"""
+    animals = Animal.objects.active().accessible_to(user, write=True)
+    if animal_ids:
+        animals = animals.filter(id__in=animal_ids)
+    if species:
+        animals = animals.filter(species__iexact=species)
+    if breed:
+        animals = animals.filter(breed__iexact=breed)
+    return list(animals.order_by('id').values_list('id', 'owner_id', 'species'))
+
+
+def record_vaccination_event(animals, vaccine_name, date_administered, description=None, next_due_date=None):
+    """Give the vaccine to every animal of select_animals' result; returns the rows written"""
+    rows = [
+        Vaccination(
+            animal_id=animal_id, vaccine_name=vaccine_name, date_administered=date_administered,
+            description=description, next_due_date=next_due_date,
+        )
+        for animal_id, _, _ in animals
+    ]
+    keys = {(owner_id, species, month_of(date_administered)) for _, owner_id, species in animals}
+    with transaction.atomic():
+        Vaccination.objects.bulk_create(rows, batch_size=1000)
+        refresh_summaries([animal_id for animal_id, _, _ in animals])
+        refresh_rollups(keys, [VACCINATIONS])
+        refresh_vocabulary({(owner_id, VocabularyTerm.VACCINE_NAME, vaccine_name) for owner_id, _, _ in keys})
+    return rows
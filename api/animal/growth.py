@@ -0,0 +1,176 @@
+"""
+Growth reference curves: weight percentiles by species, breed and age
+
+build_reference_curves scans every weighed measurement once, buckets the
+readings by age and computes P5-P95 for all (species, breed, age bucket)
+groups together with NumPy. A species-wide curve (breed '') backs up
+breeds with too few readings. GrowthCurve then answers "which percentile
+is this reading" from the handful of stored knots without touching the
+population again, using the bucket width stored with them.
+"""
+
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import AnimalMeasurement, GrowthReference
+
+
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+KNOT_FIELDS = tuple(f'p{p}' for p in PERCENTILES)
+
+DEFAULT_GROWTH_REFERENCE = {
+    'AGE_BUCKET_DAYS': 30,
+    'MIN_SAMPLES': 20,
+}
+
+TWO_PLACES = Decimal('0.01')
+
+
+def growth_setting(name):
+    return getattr(settings, 'GROWTH_REFERENCE', {}).get(name, DEFAULT_GROWTH_REFERENCE[name])
+
+
+def age_bucket_start(date_of_birth, day, bucket_days):
+    """First day of the age bucket a reading falls into, or None before birth"""
+    age = (day - date_of_birth).days
+    if age < 0:
+        return None
+    return age - age % bucket_days
+
+
+def group_percentiles(group, values):
+    """Linearly interpolated PERCENTILES of values for every group at once
+
+    Returns the distinct groups, their sizes and a (groups x percentiles)
+    table; matches numpy.percentile's default method within each group.
+    """
+    import numpy as np  # only the batch job needs NumPy, keep it out of worker startup
+
+    order = np.lexsort((values, group))
+    sorted_groups = group[order]
+    sorted_values = values[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_groups)])
+
+    position = starts[:, None] + (counts[:, None] - 1) * (np.array(PERCENTILES) / 100)[None, :]
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    fraction = position - lower
+    table = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+    return sorted_groups[starts], counts, table
+
+
+def _load_readings(bucket_days):
+    """Weighed readings as arrays of (species, breed) codes, age buckets and weights"""
+    import numpy as np
+
+    pair_codes, species_codes = {}, {}
+    pair, species, bucket, weight = [], [], [], []
+    rows = (
+        AnimalMeasurement.objects.filter(weight__isnull=False)
+        .values_list('animal__species', 'animal__breed', 'animal__date_of_birth', 'date', 'weight')
+        .iterator(chunk_size=5000)
+    )
+    for species_name, breed_name, date_of_birth, day, value in rows:
+        start = age_bucket_start(date_of_birth, day, bucket_days)
+        if start is None:
+            continue
+        pair.append(pair_codes.setdefault((species_name, breed_name), len(pair_codes)))
+        species.append(species_codes.setdefault(species_name, len(species_codes)))
+        bucket.append(start // bucket_days)
+        weight.append(value)
+    arrays = (
+        np.array(pair, dtype=np.int64),
+        np.array(species, dtype=np.int64),
+        np.array(bucket, dtype=np.int64),
+        np.array(weight, dtype=np.float64),
+    )
+    return arrays, list(pair_codes), list(species_codes)
+
+
+def build_reference_curves(bucket_days=None, min_samples=None):
+    """Replace the GrowthReference table with curves computed from all readings
+
+    Returns the number of reference rows written.
+    """
+    bucket_days = bucket_days or growth_setting('AGE_BUCKET_DAYS')
+    min_samples = growth_setting('MIN_SAMPLES') if min_samples is None else min_samples
+
+    (pair, species, bucket, weight), pairs, species_names = _load_readings(bucket_days)
+    references = []
+    if len(weight):
+        buckets = int(bucket.max()) + 1
+        levels = (
+            (pair, lambda code: pairs[code]),
+            (species, lambda code: (species_names[code], '')),
+        )
+        for codes, describe in levels:
+            groups, counts, table = group_percentiles(codes * buckets + bucket, weight)
+            for key, count, knots in zip(groups.tolist(), counts.tolist(), table.tolist()):
+                if count < min_samples:
+                    continue
+                code, age_bucket = divmod(key, buckets)
+                species_name, breed_name = describe(code)
+                references.append(GrowthReference(
+                    species=species_name,
+                    breed=breed_name,
+                    age_days=age_bucket * bucket_days,
+                    bucket_days=bucket_days,
+                    sample_count=count,
+                    **{
+                        field: Decimal(value).quantize(TWO_PLACES)
+                        for field, value in zip(KNOT_FIELDS, knots)
+                    },
+                ))
+
+    with transaction.atomic():
+        GrowthReference.objects.all().delete()
+        GrowthReference.objects.bulk_create(references, batch_size=1000)
+    return len(references)
+
+
+def percentile_from_knots(weight, knots):
+    """Percentile of weight interpolated between the P5-P95 knots, clamped to 5..95"""
+    if weight <= knots[0]:
+        return float(PERCENTILES[0])
+    if weight >= knots[-1]:
+        return float(PERCENTILES[-1])
+    i = bisect_right(knots, weight) - 1
+    low, high = knots[i], knots[i + 1]
+    if high == low:
+        return float(PERCENTILES[i])
+    share = (weight - low) / (high - low)
+    return round(PERCENTILES[i] + (PERCENTILES[i + 1] - PERCENTILES[i]) * float(share), 1)
+
+
+class GrowthCurve:
+    """Reference knots for one animal, keyed by age bucket; breed rows win over species rows"""
+
+    def __init__(self, animal):
+        self.date_of_birth = animal.date_of_birth
+        rows = (
+            GrowthReference.objects.filter(species=animal.species, breed__in=['', animal.breed])
+            .order_by('breed')
+            .values_list('bucket_days', 'age_days', *KNOT_FIELDS)
+        )
+        # Every build replaces the whole table, so all rows share one width
+        self.bucket_days = None
+        self.knots = {}
+        for bucket_days, age_days, *knots in rows:
+            self.bucket_days = bucket_days
+            self.knots[age_days] = knots
+
+    def percentile(self, measurement):
+        return self.percentile_at(measurement.weight, measurement.date)
+
+    def percentile_at(self, weight, on):
+        if weight is None or not self.knots:
+            return None
+        start = age_bucket_start(self.date_of_birth, on, self.bucket_days)
+        knots = self.knots.get(start)
+        if knots is None:
+            return None
+        return percentile_from_knots(weight, knots)
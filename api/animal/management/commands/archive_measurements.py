@@ -0,0 +1,35 @@
+"""
+Roll old measurements up into the archive tier
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from animal.models import AnimalMeasurementArchive
+from animal.retention import archive_cutoff, archive_measurements
+
+
+class Command(BaseCommand):
+    help = 'Archive measurements older than the retention window as weekly or monthly rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hot-days', type=int, help='Days of full-resolution history to keep')
+        parser.add_argument('--resolution', choices=[AnimalMeasurementArchive.WEEK, AnimalMeasurementArchive.MONTH])
+        parser.add_argument('--batch-size', type=int, help='Animals archived per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the readings that would be archived')
+
+    def handle(self, *args, **options):
+        if options['hot_days'] is not None and options['hot_days'] < 0:
+            raise CommandError('--hot-days must not be negative')
+        cutoff = archive_cutoff(hot_days=options['hot_days'], resolution=options['resolution'])
+        archived, written = archive_measurements(
+            cutoff=cutoff,
+            resolution=options['resolution'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{archived} readings before {cutoff} would be archived')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {archived} readings before {cutoff} into {written} rollups'
+            ))
@@ -0,0 +1,78 @@
+"""
+Compare the size and latency of an animal's measurements in each list format
+"""
+
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.benchmark import build_handler, make_environ, time_requests
+
+
+# (label, query string) of each representation of the list
+FORMATS = [
+    ('json', 'format=json'),
+    ('series', 'format=series'),
+    ('delta', 'format=series&delta=1'),
+    ('series-bin', 'format=series-bin'),
+]
+
+
+def fetch(handler, **environ_options):
+    """Status line and body of one response"""
+    statuses = []
+    response = handler(make_environ(**environ_options), lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        return statuses[0], b''.join(response)
+    finally:
+        response.close()
+
+
+class Command(BaseCommand):
+    help = "Time an animal's measurement list as JSON and as the compact series formats"
+
+    def add_arguments(self, parser):
+        parser.add_argument('animal_id', type=int)
+        parser.add_argument('--token', required=True, help='API token of a user who may read the animal; requests count towards its rate limit')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per format')
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--all-tiers', action='store_true', help='Include archived readings')
+
+    def handle(self, *args, **options):
+        path = reverse('animal:animalmeasurement-list', args=[options['animal_id']])
+        tier = '' if options['all_tiers'] else '&tier=hot'
+        handler = build_handler(list(settings.MIDDLEWARE))
+        requests = {
+            name: {'path': path, 'host': options['host'], 'token': options['token'], 'query': query + tier}
+            for name, query in FORMATS
+        }
+
+        bodies = {}
+        for name, environ_options in requests.items():
+            status, bodies[name] = fetch(handler, **environ_options)
+            if not status.startswith('200'):
+                raise CommandError(f'{name}: {status} {bodies[name][:200]!r}')
+
+        self.stdout.write(f'{options["requests"]} requests to {path} per format')
+        for environ_options in requests.values():
+            time_requests(handler, options['warmup'], **environ_options)
+        # Alternate the formats in rounds so drift affects all alike
+        timings = {name: [] for name in requests}
+        rounds = 10
+        for _ in range(rounds):
+            for name, environ_options in requests.items():
+                round_timings, _ = time_requests(handler, max(options['requests'] // rounds, 1), **environ_options)
+                timings[name] += round_timings
+
+        baseline = statistics.median(timings['json'])
+        json_size = len(bodies['json'])
+        for name in requests:
+            median = statistics.median(timings[name])
+            size = len(bodies[name])
+            self.stdout.write(
+                f'  {name:10} median {median:8.1f} us ({median / baseline:4.0%} of json)  '
+                f'{size:8} bytes ({size / json_size:4.0%} of json)'
+            )
@@ -0,0 +1,24 @@
+"""
+Rebuild the species/breed growth reference curves
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from animal.growth import build_reference_curves
+
+
+class Command(BaseCommand):
+    help = 'Compute P5-P95 weight-for-age curves per species and breed from all measurements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bucket-days', type=int, help='Width of an age bucket in days')
+        parser.add_argument('--min-samples', type=int, help='Readings a bucket needs to get a curve')
+
+    def handle(self, *args, **options):
+        if options['bucket_days'] is not None and options['bucket_days'] <= 0:
+            raise CommandError('--bucket-days must be positive')
+        written = build_reference_curves(
+            bucket_days=options['bucket_days'],
+            min_samples=options['min_samples'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} growth reference rows'))
@@ -0,0 +1,20 @@
+"""
+Remove duplicate measurements of an animal and day
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.dedup import dedupe_measurements
+
+
+class Command(BaseCommand):
+    help = 'Keep only the latest measurement of each animal and day, a batch of animals per transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Animals checked per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Count duplicates without deleting them')
+
+    def handle(self, *args, **options):
+        removed, animals = dedupe_measurements(options['batch_size'], options['dry_run'])
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} duplicate measurements of {animals} animals'))
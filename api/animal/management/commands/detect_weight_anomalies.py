@@ -0,0 +1,26 @@
+"""
+Flag sudden weight loss in animals with new measurements
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.anomalies import DEFAULT_THRESHOLD, DEFAULT_WINDOW, run_detection
+
+
+class Command(BaseCommand):
+    help = 'Score weight series with rolling rates and robust z-scores and record anomalies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rescan every animal, ignoring the checkpoint')
+        parser.add_argument('--batch-size', type=int, default=500, help='Animals loaded per batch')
+        parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help='Readings between compared weights')
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Robust z-score that counts as a loss')
+
+    def handle(self, *args, **options):
+        scanned, flagged = run_detection(
+            full=options['full'],
+            batch_size=options['batch_size'],
+            window=options['window'],
+            threshold=options['threshold'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Scanned {scanned} animals, flagged {flagged} readings'))
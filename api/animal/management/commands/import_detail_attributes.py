@@ -0,0 +1,27 @@
+"""
+Backfill typed attributes from free-form animal details
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from animal.attributes import import_detail_attributes
+from animal.models import AttributeKey
+
+
+class Command(BaseCommand):
+    help = 'Copy the latest detail value named after each declared attribute key into typed attributes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('keys', nargs='*', help='Attribute key names (default: all declared keys)')
+
+    def handle(self, *args, **options):
+        keys = AttributeKey.objects.all()
+        if options['keys']:
+            keys = keys.filter(name__in=options['keys'])
+            unknown = set(options['keys']) - set(keys.values_list('name', flat=True))
+            if unknown:
+                raise CommandError(f"Unknown attribute keys: {', '.join(sorted(unknown))}")
+        written, skipped = import_detail_attributes(keys)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} attributes, skipped {skipped} details with mistyped values'
+        ))
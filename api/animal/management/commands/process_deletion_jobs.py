@@ -0,0 +1,18 @@
+"""
+Carry out queued deletions of animals and users
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.deletion import process_deletion_jobs
+
+
+class Command(BaseCommand):
+    help = 'Delete queued animals and users with set-based statements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Process at most this many jobs')
+
+    def handle(self, *args, **options):
+        finished, failed = process_deletion_jobs(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Finished {finished} deletion jobs, {failed} failed'))
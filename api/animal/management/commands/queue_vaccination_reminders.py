@@ -0,0 +1,19 @@
+"""
+Queue reminders for due and overdue vaccinations
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.reminders import queue_reminders
+
+
+class Command(BaseCommand):
+    help = 'Write outbox reminders for vaccinations due soon or overdue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lead-days', type=int, help='Remind this many days before the due date')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        scanned = queue_reminders(lead_days=options['lead_days'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Scanned {scanned} due vaccinations'))
@@ -0,0 +1,18 @@
+"""
+Recompute the per-user animal access index from owners and grants
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.access import rebuild_access
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the AnimalAccess rows of every animal from its owner and the access grants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Animals recomputed per transaction')
+
+    def handle(self, *args, **options):
+        processed = rebuild_access(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt access for {processed} animals'))
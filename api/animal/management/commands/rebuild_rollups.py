@@ -0,0 +1,19 @@
+"""
+Recompute the monthly reporting rollups from the source tables
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per owner, species and month reporting rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, help='Only rebuild the rollups of this owner id')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(owner_id=options['owner'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} monthly rollups'))
@@ -0,0 +1,18 @@
+"""
+Recount the autocomplete vocabularies from the animals and vaccinations
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.vocabulary import rebuild_vocabulary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per owner vaccine name, species and breed vocabularies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, help='Only rebuild the vocabulary of this owner id')
+
+    def handle(self, *args, **options):
+        written = rebuild_vocabulary(owner_id=options['owner'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} vocabulary terms'))
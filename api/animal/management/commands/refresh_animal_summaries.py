@@ -0,0 +1,33 @@
+"""
+Recompute the denormalized summary columns of every animal
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.models import Animal
+from animal.summary import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the summary columns on Animal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--owner', type=int, help='Only refresh animals of this owner id')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        animals = Animal.objects.order_by('id')
+        if options['owner']:
+            animals = animals.filter(owner_id=options['owner'])
+
+        last_id = 0
+        refreshed = 0
+        while True:
+            batch = list(animals.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+            refreshed += refresh_summaries(batch)
+            last_id = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {refreshed} animal summaries'))
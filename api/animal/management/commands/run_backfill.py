@@ -0,0 +1,41 @@
+"""
+Run or resume a batched backfill from animal.backfill
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from animal.backfill import BACKFILLS, BackfillBusy, run_backfill
+from animal.models import BackfillCheckpoint
+
+
+class Command(BaseCommand):
+    help = 'Fill in existing rows in resumable, throttled primary key batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', choices=sorted(BACKFILLS), help='Backfill to run')
+        parser.add_argument('--list', action='store_true', help='Show every backfill and its progress')
+        parser.add_argument('--batch-size', type=int, help='Size of the first batch')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+        parser.add_argument('--restart', action='store_true', help='Start again from the first row')
+
+    def handle(self, *args, **options):
+        if options['list'] or not options['name']:
+            checkpoints = {checkpoint.name: checkpoint for checkpoint in BackfillCheckpoint.objects.all()}
+            for name, backfill in sorted(BACKFILLS.items()):
+                self.stdout.write(f'{name:20} {self.progress(checkpoints.get(name)):40} {backfill.description}')
+            return
+
+        try:
+            checkpoint = run_backfill(
+                options['name'], batch_size=options['batch_size'],
+                max_batches=options['max_batches'], restart=options['restart'],
+            )
+        except BackfillBusy as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f"{options['name']}: {self.progress(checkpoint)}"))
+
+    def progress(self, checkpoint):
+        if checkpoint is None:
+            return 'not started'
+        state = 'finished' if checkpoint.finished_at else f'at {checkpoint.last_pk} of {checkpoint.target_pk}'
+        return f'{state}, {checkpoint.rows} rows in {checkpoint.batches} batches'
@@ -0,0 +1,18 @@
+"""
+Deliver queued vaccination reminders
+"""
+
+from django.core.management.base import BaseCommand
+
+from animal.reminders import send_reminders
+
+
+class Command(BaseCommand):
+    help = 'Email unsent vaccination reminders, one message per owner'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Owners emailed per batch')
+
+    def handle(self, *args, **options):
+        sent = send_reminders(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} reminder emails'))
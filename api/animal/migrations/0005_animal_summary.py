@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0004_alter_animalmeasurement_height_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='detail_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='last_measured_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='latest_weight',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='measurement_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='next_vaccination_due',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='vaccination_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='animalmeasurement',
+            index=models.Index(fields=['animal', 'date'], name='measurement_animal_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['animal', 'vaccine_name', 'date_administered'], name='vaccination_animal_dose_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0005_animal_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['species'], name='animal_species_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animaldetail',
+            index=models.Index(fields=['date_recorded'], name='detail_date_recorded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animalmeasurement',
+            index=models.Index(fields=['date'], name='measurement_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['date_administered'], name='vaccination_administered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['next_due_date'], name='vaccination_next_due_idx'),
+        ),
+    ]
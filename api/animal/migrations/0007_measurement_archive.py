@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0006_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnimalMeasurementArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('last_reading_on', models.DateField()),
+                ('reading_count', models.PositiveIntegerField()),
+                ('weight', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('weight_min', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('weight_max', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('weight_count', models.PositiveIntegerField(default=0)),
+                ('height', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('height_count', models.PositiveIntegerField(default=0)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_measurements', to='animal.animal')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['animal', 'period_start'], name='archive_animal_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('animal', 'resolution', 'period_start'), name='unique_archive_period')],
+            },
+        ),
+    ]
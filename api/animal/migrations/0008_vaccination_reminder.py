@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0007_measurement_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VaccinationReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('kind', models.CharField(choices=[('due', 'Due'), ('overdue', 'Overdue')], max_length=7)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vaccination_reminders', to=settings.AUTH_USER_MODEL)),
+                ('vaccination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='animal.vaccination')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['owner', 'id'], name='reminder_unsent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('vaccination', 'due_date', 'kind'), name='unique_vaccination_reminder')],
+            },
+        ),
+    ]
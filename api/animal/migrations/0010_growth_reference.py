@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0009_weight_anomaly'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GrowthReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('species', models.CharField(max_length=100)),
+                ('breed', models.CharField(blank=True, max_length=100)),
+                ('age_days', models.PositiveIntegerField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('p5', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('p10', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('p25', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('p50', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('p75', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('p90', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('p95', models.DecimalField(decimal_places=2, max_digits=5)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('species', 'breed', 'age_days'), name='unique_growth_reference')],
+            },
+        ),
+    ]
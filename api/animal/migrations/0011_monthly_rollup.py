@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0010_growth_reference'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('species', models.CharField(max_length=100)),
+                ('month', models.DateField()),
+                ('measurement_count', models.PositiveIntegerField(default=0)),
+                ('weight_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('weight_count', models.PositiveIntegerField(default=0)),
+                ('vaccination_count', models.PositiveIntegerField(default=0)),
+                ('animals_born', models.PositiveIntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('owner', 'species', 'month'), name='unique_monthly_rollup')],
+            },
+        ),
+    ]
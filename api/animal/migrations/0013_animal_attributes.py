@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0012_deletion_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttributeKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField(unique=True)),
+                ('value_type', models.CharField(choices=[('text', 'Text'), ('number', 'Number'), ('date', 'Date'), ('boolean', 'Boolean')], max_length=7)),
+                ('description', models.CharField(blank=True, max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnimalAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value_text', models.CharField(blank=True, max_length=255, null=True)),
+                ('value_number', models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True)),
+                ('value_date', models.DateField(blank=True, null=True)),
+                ('value_boolean', models.BooleanField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='animal.animal')),
+                ('key', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='values', to='animal.attributekey')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'value_text'], name='attribute_text_idx'), models.Index(fields=['key', 'value_number'], name='attribute_number_idx'), models.Index(fields=['key', 'value_date'], name='attribute_date_idx'), models.Index(fields=['key', 'value_boolean'], name='attribute_boolean_idx')],
+                'constraints': [models.UniqueConstraint(fields=('animal', 'key'), name='unique_animal_attribute')],
+            },
+        ),
+    ]
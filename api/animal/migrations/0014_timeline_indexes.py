@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0013_animal_attributes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animaldetail',
+            index=models.Index(fields=['animal', 'date_recorded'], name='detail_animal_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['animal', 'date_administered'], name='vaccination_animal_date_idx'),
+        ),
+    ]
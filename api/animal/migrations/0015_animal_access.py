@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def add_owner_access(apps, schema_editor):
+    """Every owner can read and write their existing animals"""
+    Animal = apps.get_model('animal', 'Animal')
+    AnimalAccess = apps.get_model('animal', 'AnimalAccess')
+    animals = Animal.objects.order_by('id').values_list('id', 'owner_id')
+    batch = []
+    for animal_id, owner_id in animals.iterator(chunk_size=2000):
+        batch.append(AnimalAccess(user_id=owner_id, animal_id=animal_id, can_write=True))
+        if len(batch) == 2000:
+            AnimalAccess.objects.bulk_create(batch)
+            batch = []
+    AnimalAccess.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0014_timeline_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessGrant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('read', 'Read'), ('write', 'Write')], default='read', max_length=5)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('animal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='access_grants', to='animal.animal')),
+                ('grantee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_grants', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='granted_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('animal__isnull', True)), fields=('owner', 'grantee'), name='unique_herd_grant'), models.UniqueConstraint(condition=models.Q(('animal__isnull', False)), fields=('grantee', 'animal'), name='unique_animal_grant')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AnimalAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('can_write', models.BooleanField(default=False)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='animal.animal')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='animal_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'animal'), name='unique_animal_access')],
+            },
+        ),
+        migrations.RunPython(add_owner_access, migrations.RunPython.noop),
+    ]
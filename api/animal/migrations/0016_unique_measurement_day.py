@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:48
+
+from django.core.management.base import CommandError
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def check_no_duplicates(apps, schema_editor):
+    """Refuse to add the constraint while an animal has two readings of a day
+
+    Deleting them here would hold one transaction over the whole table and
+    leave the summaries and rollups stale. dedupe_measurements removes them
+    in short batches and refreshes both.
+    """
+    AnimalMeasurement = apps.get_model('animal', 'AnimalMeasurement')
+    newer = AnimalMeasurement.objects.filter(
+        animal_id=OuterRef('animal_id'), date=OuterRef('date'), id__gt=OuterRef('id'),
+    )
+    if AnimalMeasurement.objects.filter(Exists(newer)).exists():
+        raise CommandError(
+            'Some animals have several measurements on one day. '
+            'Run `python manage.py dedupe_measurements`, then migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0015_animal_access'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='animalmeasurement',
+            constraint=models.UniqueConstraint(fields=('animal', 'date'), name='unique_measurement_day'),
+        ),
+        migrations.RemoveIndex(
+            model_name='animalmeasurement',
+            name='measurement_animal_date_idx',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Only creates the table. Terms for the animals and vaccinations that
+    # already exist are counted by `manage.py run_backfill vocabulary`,
+    # one owner per batch, after deploying.
+
+    dependencies = [
+        ('animal', '0016_unique_measurement_day'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VocabularyTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('vaccine_name', 'Vaccine name'), ('species', 'Species'), ('breed', 'Breed')], max_length=12)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vocabulary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['field', 'value'], name='vocabulary_field_value_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'field', 'value'), name='unique_vocabulary_term')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """AddIndex that doesn't block writes to the table on PostgreSQL
+
+    Other backends build the index normally: MySQL already builds it
+    online, and SQLite has no concurrent index builds.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('animal', '0018_backfill_checkpoint'),
+    ]
+
+    # Existing readings keep a NULL updated_at: they were not edited since
+    # any anomaly run, so nothing needs a backfill
+    operations = [
+        migrations.AddField(
+            model_name='animalmeasurement',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, blank=True, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='animalmeasurement',
+            index=models.Index(fields=['updated_at'], name='measurement_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='analysischeckpoint',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0019_measurement_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomalyRescan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queued_at', models.DateTimeField()),
+                ('animal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='anomaly_rescan', to='animal.animal')),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animal', '0020_anomaly_rescan'),
+    ]
+
+    # Curves built before were bucketed by GROWTH_REFERENCE['AGE_BUCKET_DAYS'],
+    # 30 unless overridden; rerun build_growth_curves if it was
+    operations = [
+        migrations.AddField(
+            model_name='growthreference',
+            name='bucket_days',
+            field=models.PositiveIntegerField(default=30),
+            preserve_default=False,
+        ),
+    ]
@@ -2,12 +2,43 @@ from django.db import models
 from django.conf import settings
 
 
+class AnimalQuerySet(models.QuerySet):
+    def active(self):
+        """Animals that are not waiting for a background deletion"""
+        return self.filter(pending_deletion=False)
+
+    def accessible_to(self, user, write=False):
+        """Animals user owns or was granted access to, read from the AnimalAccess index"""
+        if write:
+            return self.filter(access__user=user, access__can_write=True)
+        return self.filter(access__user=user)
+
+
 class Animal(models.Model):
     name = models.CharField(max_length=100)
     date_of_birth = models.DateField()
     species = models.CharField(max_length=100)
     breed = models.CharField(max_length=100)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='animals', on_delete=models.CASCADE)
+
+    # Summary of the animal's histories, kept current by animal.summary
+    latest_weight = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+    last_measured_on = models.DateField(blank=True, null=True)
+    next_vaccination_due = models.DateField(blank=True, null=True)
+    measurement_count = models.PositiveIntegerField(default=0)
+    vaccination_count = models.PositiveIntegerField(default=0)
+    detail_count = models.PositiveIntegerField(default=0)
+
+    # Hidden from the API while a DeletionJob removes its history
+    pending_deletion = models.BooleanField(default=False)
+
+    objects = AnimalQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['species'], name='animal_species_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -16,9 +47,63 @@ class AnimalMeasurement(models.Model):
     date = models.DateField()
     weight = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)  # weight in lbs
     height = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)  # NULL for readings from before 0019
+
+    class Meta:
+        # The constraint's index also serves the per-animal date range lookups
+        constraints = [
+            models.UniqueConstraint(fields=['animal', 'date'], name='unique_measurement_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='measurement_date_idx'),
+            models.Index(fields=['updated_at'], name='measurement_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.animal.name} - {self.date}"
 
+
+class AnimalMeasurementArchive(models.Model):
+    """Weekly or monthly rollup of measurements that aged out of AnimalMeasurement"""
+    WEEK = 'week'
+    MONTH = 'month'
+    RESOLUTION_CHOICES = [(WEEK, 'Week'), (MONTH, 'Month')]
+
+    animal = models.ForeignKey(Animal, related_name='archived_measurements', on_delete=models.CASCADE)
+    resolution = models.CharField(max_length=5, choices=RESOLUTION_CHOICES)
+    period_start = models.DateField()
+    last_reading_on = models.DateField()
+    reading_count = models.PositiveIntegerField()
+    weight = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)  # mean weight in lbs
+    weight_min = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+    weight_max = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+    weight_count = models.PositiveIntegerField(default=0)
+    height = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)  # mean height
+    height_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['animal', 'resolution', 'period_start'], name='unique_archive_period'),
+        ]
+        indexes = [
+            models.Index(fields=['animal', 'period_start'], name='archive_animal_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.animal.name} - {self.resolution} of {self.period_start}"
+
+
+class VaccinationQuerySet(models.QuerySet):
+    def current(self):
+        """Vaccinations that have not been superseded by a later dose of the same vaccine"""
+        later_dose = Vaccination.objects.filter(
+            animal=models.OuterRef('animal'),
+            vaccine_name=models.OuterRef('vaccine_name'),
+            date_administered__gt=models.OuterRef('date_administered'),
+        )
+        return self.filter(~models.Exists(later_dose))
+
+
 class Vaccination(models.Model):
     animal = models.ForeignKey(Animal, related_name='vaccinations', on_delete=models.CASCADE)
     vaccine_name = models.CharField(max_length=100)
@@ -26,9 +111,269 @@ class Vaccination(models.Model):
     description = models.TextField(blank=True, null=True)
     next_due_date = models.DateField(null=True, blank=True)
 
+    objects = VaccinationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['animal', 'vaccine_name', 'date_administered'], name='vaccination_animal_dose_idx'),
+            models.Index(fields=['date_administered'], name='vaccination_administered_idx'),
+            models.Index(fields=['next_due_date'], name='vaccination_next_due_idx'),
+            models.Index(fields=['animal', 'date_administered'], name='vaccination_animal_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.animal.name} - {self.vaccine_name}"
 
+class VaccinationReminder(models.Model):
+    """Outbox entry for a due or overdue vaccination, one per dose, due date and kind"""
+    DUE = 'due'
+    OVERDUE = 'overdue'
+    KIND_CHOICES = [(DUE, 'Due'), (OVERDUE, 'Overdue')]
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='vaccination_reminders', on_delete=models.CASCADE)
+    vaccination = models.ForeignKey(Vaccination, related_name='reminders', on_delete=models.CASCADE)
+    due_date = models.DateField()
+    kind = models.CharField(max_length=7, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vaccination', 'due_date', 'kind'], name='unique_vaccination_reminder'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'id'], condition=models.Q(sent_at__isnull=True), name='reminder_unsent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vaccination} {self.kind} {self.due_date}"
+
+class WeightAnomaly(models.Model):
+    """Reading flagged by animal.anomalies as a sudden weight loss"""
+    animal = models.ForeignKey(Animal, related_name='weight_anomalies', on_delete=models.CASCADE)
+    date = models.DateField()
+    weight = models.DecimalField(max_digits=5, decimal_places=2)
+    rate_of_change = models.FloatField()  # lbs per day over the rolling window
+    zscore = models.FloatField()
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['animal', 'date'], name='unique_weight_anomaly'),
+        ]
+
+    def __str__(self):
+        return f"{self.animal.name} - {self.date}"
+
+class AnomalyRescan(models.Model):
+    """Animal whose readings were deleted since the weight-anomaly job last scanned it"""
+    animal = models.OneToOneField(Animal, related_name='anomaly_rescan', on_delete=models.CASCADE)
+    queued_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.animal.name} @ {self.queued_at}"
+
+class MonthlyRollup(models.Model):
+    """Per owner, species and month totals for reports, maintained by animal.rollups"""
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='monthly_rollups', on_delete=models.CASCADE)
+    species = models.CharField(max_length=100)
+    month = models.DateField()  # first day of the month
+    measurement_count = models.PositiveIntegerField(default=0)
+    weight_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    weight_count = models.PositiveIntegerField(default=0)
+    vaccination_count = models.PositiveIntegerField(default=0)
+    animals_born = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'species', 'month'], name='unique_monthly_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner} {self.species} {self.month:%Y-%m}"
+
+class GrowthReference(models.Model):
+    """Weight percentiles of a species (breed '') or breed at one age bucket, built by animal.growth"""
+    species = models.CharField(max_length=100)
+    breed = models.CharField(max_length=100, blank=True)
+    age_days = models.PositiveIntegerField()  # first day of the age bucket
+    bucket_days = models.PositiveIntegerField()  # width of the buckets the curves were built with
+    sample_count = models.PositiveIntegerField()
+    p5 = models.DecimalField(max_digits=5, decimal_places=2)
+    p10 = models.DecimalField(max_digits=5, decimal_places=2)
+    p25 = models.DecimalField(max_digits=5, decimal_places=2)
+    p50 = models.DecimalField(max_digits=5, decimal_places=2)
+    p75 = models.DecimalField(max_digits=5, decimal_places=2)
+    p90 = models.DecimalField(max_digits=5, decimal_places=2)
+    p95 = models.DecimalField(max_digits=5, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['species', 'breed', 'age_days'], name='unique_growth_reference'),
+        ]
+
+    def __str__(self):
+        return f"{self.species} {self.breed or '(all breeds)'} @ {self.age_days}d"
+
+class AnalysisCheckpoint(models.Model):
+    """Highest measurement id an analysis job has already processed"""
+    name = models.CharField(max_length=50, unique=True)
+    last_measurement_id = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(blank=True, null=True)  # readings edited since are processed again
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_measurement_id}"
+
+class AttributeKey(models.Model):
+    """Declared animal attribute with the type its values are stored and compared as"""
+    TEXT = 'text'
+    NUMBER = 'number'
+    DATE = 'date'
+    BOOLEAN = 'boolean'
+    TYPE_CHOICES = [(TEXT, 'Text'), (NUMBER, 'Number'), (DATE, 'Date'), (BOOLEAN, 'Boolean')]
+
+    name = models.SlugField(max_length=50, unique=True)
+    value_type = models.CharField(max_length=7, choices=TYPE_CHOICES)
+    description = models.CharField(max_length=255, blank=True)
+
+    @property
+    def column(self):
+        """AnimalAttribute field holding values of this key"""
+        return f'value_{self.value_type}'
+
+    def __str__(self):
+        return self.name
+
+class AnimalAttribute(models.Model):
+    """Current value of a declared attribute, stored in the column of its type"""
+    animal = models.ForeignKey(Animal, related_name='attributes', on_delete=models.CASCADE)
+    key = models.ForeignKey(AttributeKey, related_name='values', on_delete=models.PROTECT)
+    value_text = models.CharField(max_length=255, blank=True, null=True)
+    value_number = models.DecimalField(max_digits=14, decimal_places=4, blank=True, null=True)
+    value_date = models.DateField(blank=True, null=True)
+    value_boolean = models.BooleanField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['animal', 'key'], name='unique_animal_attribute'),
+        ]
+        indexes = [
+            models.Index(fields=['key', 'value_text'], name='attribute_text_idx'),
+            models.Index(fields=['key', 'value_number'], name='attribute_number_idx'),
+            models.Index(fields=['key', 'value_date'], name='attribute_date_idx'),
+            models.Index(fields=['key', 'value_boolean'], name='attribute_boolean_idx'),
+        ]
+
+    @property
+    def value(self):
+        return getattr(self, self.key.column)
+
+    def __str__(self):
+        return f"{self.animal.name} - {self.key.name}"
+
+class VocabularyTerm(models.Model):
+    """How often an owner used a free-text value, maintained by animal.vocabulary"""
+    VACCINE_NAME = 'vaccine_name'
+    SPECIES = 'species'
+    BREED = 'breed'
+    FIELD_CHOICES = [(VACCINE_NAME, 'Vaccine name'), (SPECIES, 'Species'), (BREED, 'Breed')]
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='vocabulary', on_delete=models.CASCADE)
+    field = models.CharField(max_length=12, choices=FIELD_CHOICES)
+    value = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'field', 'value'], name='unique_vocabulary_term'),
+        ]
+        indexes = [
+            models.Index(fields=['field', 'value'], name='vocabulary_field_value_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.field} {self.value} x{self.count}"
+
+class AccessGrant(models.Model):
+    """Read or write access an owner gives to their whole herd (no animal) or to one animal"""
+    READ = 'read'
+    WRITE = 'write'
+    LEVEL_CHOICES = [(READ, 'Read'), (WRITE, 'Write')]
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='granted_access', on_delete=models.CASCADE)
+    grantee = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='access_grants', on_delete=models.CASCADE)
+    animal = models.ForeignKey(Animal, related_name='access_grants', on_delete=models.CASCADE, blank=True, null=True)
+    level = models.CharField(max_length=5, choices=LEVEL_CHOICES, default=READ)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'grantee'], condition=models.Q(animal__isnull=True), name='unique_herd_grant',
+            ),
+            models.UniqueConstraint(
+                fields=['grantee', 'animal'], condition=models.Q(animal__isnull=False), name='unique_animal_grant',
+            ),
+        ]
+
+    def __str__(self):
+        target = self.animal or f"{self.owner}'s herd"
+        return f"{self.grantee} {self.level} {target}"
+
+class AnimalAccess(models.Model):
+    """One row per user and animal they can see, owners included; maintained by animal.access"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='animal_access', on_delete=models.CASCADE)
+    animal = models.ForeignKey(Animal, related_name='access', on_delete=models.CASCADE)
+    can_write = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'animal'], name='unique_animal_access'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {'write' if self.can_write else 'read'} {self.animal_id}"
+
+class DeletionJob(models.Model):
+    """Queued removal of an animal or a user together with all of their history"""
+    ANIMAL = 'animal'
+    USER = 'user'
+    KIND_CHOICES = [(ANIMAL, 'Animal'), (USER, 'User')]
+
+    kind = models.CharField(max_length=6, choices=KIND_CHOICES)
+    target_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(finished_at__isnull=True), name='deletion_job_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"delete {self.kind} {self.target_id}"
+
+class BackfillCheckpoint(models.Model):
+    """Progress of a batched backfill from animal.backfill, kept so it can resume"""
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.BigIntegerField(default=0)
+    target_pk = models.BigIntegerField(blank=True, null=True)
+    batch_size = models.PositiveIntegerField(blank=True, null=True)
+    rows = models.BigIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(blank=True, null=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"backfill {self.name} at {self.last_pk}/{self.target_pk}"
+
 class AnimalDetail(models.Model):
     animal = models.ForeignKey(Animal, related_name='details', on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
@@ -36,5 +381,11 @@ class AnimalDetail(models.Model):
     description = models.TextField(blank=True, null=True)
     date_recorded = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_recorded'], name='detail_date_recorded_idx'),
+            models.Index(fields=['animal', 'date_recorded'], name='detail_animal_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.animal.name} - {self.date_recorded}"
@@ -0,0 +1,129 @@
+"""
+Vaccination reminders through a notification outbox
+
+queue_reminders streams due and overdue doses in (next_due_date, id) order,
+a chunk at a time, and records one outbox row per dose, due date and kind;
+the unique constraint makes re-runs idempotent. send_reminders then mails
+each owner a single digest of their unsent reminders, dropping those whose
+dose was superseded or rescheduled after they were queued.
+"""
+
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Vaccination, VaccinationReminder
+
+
+def due_vaccination_chunks(horizon, chunk_size):
+    """Yield lists of current doses due on or before horizon using keyset pagination"""
+    doses = (
+        Vaccination.objects.current()
+        .filter(next_due_date__lte=horizon, animal__pending_deletion=False)
+        .order_by('next_due_date', 'id')
+        .values('id', 'next_due_date', owner_id=F('animal__owner_id'))
+    )
+    last = None
+    while True:
+        page = doses
+        if last is not None:
+            page = doses.filter(
+                Q(next_due_date__gt=last['next_due_date'])
+                | Q(next_due_date=last['next_due_date'], id__gt=last['id'])
+            )
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1]
+
+
+def queue_reminders(today=None, lead_days=None, chunk_size=2000):
+    """Write outbox rows for doses due within lead_days; returns doses scanned"""
+    today = today or timezone.localdate()
+    if lead_days is None:
+        lead_days = settings.VACCINATION_REMINDER_LEAD_DAYS
+    scanned = 0
+    for rows in due_vaccination_chunks(today + timedelta(days=lead_days), chunk_size):
+        rows.sort(key=lambda row: row['owner_id'])
+        reminders = [
+            VaccinationReminder(
+                owner_id=row['owner_id'],
+                vaccination_id=row['id'],
+                due_date=row['next_due_date'],
+                kind=VaccinationReminder.OVERDUE if row['next_due_date'] < today else VaccinationReminder.DUE,
+            )
+            for row in rows
+        ]
+        VaccinationReminder.objects.bulk_create(reminders, ignore_conflicts=True)
+        scanned += len(rows)
+    return scanned
+
+
+def reminder_message(owner, reminders):
+    lines = [
+        f"- {r.vaccination.animal.name}: {r.vaccination.vaccine_name} "
+        f"{'was due' if r.kind == VaccinationReminder.OVERDUE else 'is due'} {r.due_date:%Y-%m-%d}"
+        for r in reminders
+    ]
+    return EmailMessage(
+        subject='Vaccinations due for your animals',
+        body='The following vaccinations need attention:\n\n' + '\n'.join(lines) + '\n',
+        to=[owner.email],
+    )
+
+
+def stale_reminders():
+    """Unsent reminders for a dose that was superseded or got a new due date"""
+    return VaccinationReminder.objects.filter(sent_at__isnull=True).exclude(
+        vaccination__in=Vaccination.objects.current(),
+        due_date=F('vaccination__next_due_date'),
+    )
+
+
+def send_reminders(batch_size=100, connection=None):
+    """Deliver unsent reminders as one email per owner, batch_size owners at a time
+
+    A batch is marked sent only after its messages were handed to the
+    backend, so a failure leads to a retry rather than a lost reminder.
+    Returns the number of emails sent.
+    """
+    connection = connection or get_connection()
+    stale_reminders().delete()
+    # Animals waiting for a background deletion get no more mail, and doses
+    # handled since the last delete are skipped until the next run drops them
+    unsent = VaccinationReminder.objects.filter(
+        sent_at__isnull=True,
+        vaccination__in=Vaccination.objects.current(),
+        vaccination__animal__pending_deletion=False,
+        due_date=F('vaccination__next_due_date'),
+    )
+    sent = 0
+    last_owner = 0
+    while True:
+        owners = list(
+            unsent.filter(owner_id__gt=last_owner)
+            .order_by('owner_id')
+            .values_list('owner_id', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not owners:
+            return sent
+        reminders = (
+            unsent.filter(owner_id__in=owners)
+            .select_related('owner', 'vaccination__animal')
+            .order_by('owner_id', 'due_date', 'id')
+        )
+        messages, ids = [], []
+        for owner_id, group in groupby(reminders, key=lambda r: r.owner_id):
+            group = list(group)
+            messages.append(reminder_message(group[0].owner, group))
+            ids.extend(r.id for r in group)
+        connection.send_messages(messages)
+        VaccinationReminder.objects.filter(id__in=ids).update(sent_at=timezone.now())
+        sent += len(messages)
+        last_owner = owners[-1]
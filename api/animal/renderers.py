@@ -0,0 +1,29 @@
+"""
+Renderers for the columnar measurement series of animal.series
+"""
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .series import pack_series
+
+
+class SeriesJSONRenderer(JSONRenderer):
+    """Parallel-array series as compact JSON"""
+    media_type = 'application/vnd.vaxtrack.series+json'
+    format = 'series'
+    compact = True
+
+
+class SeriesBinaryRenderer(BaseRenderer):
+    """Parallel-array series packed as little-endian int32 columns"""
+    media_type = 'application/vnd.vaxtrack.series'
+    format = 'series-bin'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return pack_series(data)
+
+
+SERIES_RENDERERS = [SeriesJSONRenderer, SeriesBinaryRenderer]
+SERIES_FORMATS = {renderer.format for renderer in SERIES_RENDERERS}
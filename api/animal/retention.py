@@ -0,0 +1,201 @@
+"""
+Tiered retention for measurement history
+
+Readings older than the hot window are rolled up into weekly or monthly
+AnimalMeasurementArchive rows and removed from AnimalMeasurement. Only
+whole periods are archived, and re-archiving a period that already has a
+rollup (e.g. a backdated reading) merges into the existing row. An animal
+keeps the resolution of its first archive rows, so changing RESOLUTION
+only applies to animals archived for the first time and no day is rolled
+up into both a week and a month.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Exists, Max, Min, OuterRef
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .anomalies import readings_deleted
+from .models import Animal, AnimalMeasurement, AnimalMeasurementArchive
+from .rollups import MEASUREMENTS, animal_rollup_keys, refresh_rollups
+from .summary import refresh_summaries
+
+
+DEFAULT_RETENTION = {
+    'HOT_DAYS': 730,
+    'RESOLUTION': AnimalMeasurementArchive.MONTH,
+    'BATCH_SIZE': 100,
+    'DELETE_CHUNK_SIZE': 1000,
+}
+
+TWO_PLACES = Decimal('0.01')
+
+
+def retention_setting(name):
+    return getattr(settings, 'MEASUREMENT_RETENTION', {}).get(name, DEFAULT_RETENTION[name])
+
+
+def period_start(day, resolution):
+    if resolution == AnimalMeasurementArchive.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def archive_cutoff(today=None, hot_days=None, resolution=None):
+    """First day that stays in the hot table, aligned to a period boundary"""
+    today = today or timezone.localdate()
+    hot_days = retention_setting('HOT_DAYS') if hot_days is None else hot_days
+    resolution = resolution or retention_setting('RESOLUTION')
+    return period_start(today - timedelta(days=hot_days), resolution)
+
+
+def _mean(total_a, count_a, total_b, count_b):
+    count = count_a + count_b
+    if not count:
+        return None
+    return ((total_a + total_b) / count).quantize(TWO_PLACES)
+
+
+def _merge(archive, rollup):
+    """Fold a fresh rollup into an existing archive row"""
+    old_weight = (archive.weight or 0) * archive.weight_count
+    old_height = (archive.height or 0) * archive.height_count
+    new_weight = (rollup['weight'] or 0) * rollup['weight_count']
+    new_height = (rollup['height'] or 0) * rollup['height_count']
+
+    archive.weight = _mean(old_weight, archive.weight_count, new_weight, rollup['weight_count'])
+    archive.height = _mean(old_height, archive.height_count, new_height, rollup['height_count'])
+    archive.weight_count += rollup['weight_count']
+    archive.height_count += rollup['height_count']
+    archive.reading_count += rollup['reading_count']
+    archive.last_reading_on = max(archive.last_reading_on, rollup['last_reading_on'])
+    mins = [w for w in (archive.weight_min, rollup['weight_min']) if w is not None]
+    maxes = [w for w in (archive.weight_max, rollup['weight_max']) if w is not None]
+    archive.weight_min = min(mins) if mins else None
+    archive.weight_max = max(maxes) if maxes else None
+
+
+def _archive_animals(animal_ids, cutoff, resolution, delete_chunk_size):
+    """Roll up and delete the old readings of a batch of animals in one transaction"""
+    old_readings = AnimalMeasurement.objects.filter(animal_id__in=animal_ids, date__lt=cutoff)
+    rollup_keys = animal_rollup_keys(animal_ids, [MEASUREMENTS])
+    rollups = (
+        old_readings.annotate(period=Trunc('date', resolution))
+        .values('animal_id', 'period')
+        .annotate(
+            reading_count=Count('id'),
+            last_reading_on=Max('date'),
+            weight_mean=Avg('weight'),
+            weight_min=Min('weight'),
+            weight_max=Max('weight'),
+            weight_count=Count('weight'),
+            height_mean=Avg('height'),
+            height_count=Count('height'),
+        )
+        .order_by()
+    )
+    existing = {
+        (archive.animal_id, archive.period_start): archive
+        for archive in AnimalMeasurementArchive.objects.filter(
+            animal_id__in=animal_ids, resolution=resolution, period_start__lt=cutoff
+        )
+    }
+
+    to_create, to_update = [], []
+    for rollup in rollups:
+        for field in ('weight', 'height'):
+            mean = rollup.pop(f'{field}_mean')
+            rollup[field] = None if mean is None else Decimal(mean).quantize(TWO_PLACES)
+        key = (rollup['animal_id'], rollup['period'])
+        if key in existing:
+            _merge(existing[key], rollup)
+            to_update.append(existing[key])
+        else:
+            to_create.append(AnimalMeasurementArchive(
+                animal_id=rollup['animal_id'],
+                resolution=resolution,
+                period_start=rollup['period'],
+                last_reading_on=rollup['last_reading_on'],
+                reading_count=rollup['reading_count'],
+                weight=rollup['weight'],
+                weight_min=rollup['weight_min'],
+                weight_max=rollup['weight_max'],
+                weight_count=rollup['weight_count'],
+                height=rollup['height'],
+                height_count=rollup['height_count'],
+            ))
+
+    AnimalMeasurementArchive.objects.bulk_create(to_create)
+    AnimalMeasurementArchive.objects.bulk_update(to_update, [
+        'last_reading_on', 'reading_count', 'weight', 'weight_min', 'weight_max',
+        'weight_count', 'height', 'height_count',
+    ])
+
+    ids = list(old_readings.values_list('id', flat=True))
+    for start in range(0, len(ids), delete_chunk_size):
+        chunk = AnimalMeasurement.objects.filter(id__in=ids[start:start + delete_chunk_size])
+        chunk._raw_delete(chunk.db)
+    refresh_summaries(animal_ids)
+    readings_deleted(animal_ids)
+    refresh_rollups(rollup_keys | animal_rollup_keys(animal_ids, [MEASUREMENTS]), [MEASUREMENTS])
+    return len(ids), len(to_create) + len(to_update)
+
+
+def animals_at_resolution(resolution, default_resolution):
+    """Animals whose readings are archived at resolution
+
+    Animals with rows at another resolution than the default keep it;
+    everyone else uses the default.
+    """
+    if resolution == default_resolution:
+        pinned = AnimalMeasurementArchive.objects.filter(animal=OuterRef('pk')).exclude(resolution=resolution)
+        return Animal.objects.exclude(Exists(pinned))
+    return Animal.objects.filter(Exists(
+        AnimalMeasurementArchive.objects.filter(animal=OuterRef('pk'), resolution=resolution)
+    ))
+
+
+def archive_measurements(cutoff=None, resolution=None, batch_size=None, dry_run=False):
+    """Move readings older than cutoff into the archive tier, batch by batch
+
+    resolution applies to animals without archive rows; cutoff is moved back
+    to a period boundary for animals archived at another resolution.
+    Returns (readings archived, archive rows written).
+    """
+    resolution = resolution or retention_setting('RESOLUTION')
+    batch_size = batch_size or retention_setting('BATCH_SIZE')
+    delete_chunk_size = retention_setting('DELETE_CHUNK_SIZE')
+
+    archived = written = 0
+    for animal_resolution, _ in AnimalMeasurementArchive.RESOLUTION_CHOICES:
+        if cutoff:
+            resolution_cutoff = period_start(cutoff, animal_resolution)
+        else:
+            resolution_cutoff = archive_cutoff(resolution=animal_resolution)
+        animals = animals_at_resolution(animal_resolution, resolution)
+
+        if dry_run:
+            archived += AnimalMeasurement.objects.filter(
+                animal__in=animals, date__lt=resolution_cutoff
+            ).count()
+            continue
+
+        has_old_readings = Exists(
+            AnimalMeasurement.objects.filter(animal=OuterRef('pk'), date__lt=resolution_cutoff)
+        )
+        animals = animals.filter(has_old_readings).order_by('id')
+        last_id = 0
+        while True:
+            batch = list(animals.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                readings, rows = _archive_animals(batch, resolution_cutoff, animal_resolution, delete_chunk_size)
+            archived += readings
+            written += rows
+            last_id = batch[-1]
+    return archived, written
@@ -0,0 +1,205 @@
+"""
+Monthly reporting rollups per owner and species
+
+Each MonthlyRollup row holds the totals of one (owner, species, month)
+bucket. Writes refresh only the buckets they touch, recomputing the
+fields of the affected source from the source rows (hot and archived
+measurements, vaccinations, animal births); rebuild_rollups recomputes
+everything. Reports read the rollups alone.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Animal, AnimalMeasurement, AnimalMeasurementArchive, MonthlyRollup, Vaccination
+
+
+MEASUREMENTS = 'measurements'
+VACCINATIONS = 'vaccinations'
+ANIMALS = 'animals'
+ALL_SOURCES = (MEASUREMENTS, VACCINATIONS, ANIMALS)
+
+SOURCE_FIELDS = {
+    MEASUREMENTS: ('measurement_count', 'weight_total', 'weight_count'),
+    VACCINATIONS: ('vaccination_count',),
+    ANIMALS: ('animals_born',),
+}
+
+TWO_PLACES = Decimal('0.01')
+
+
+def month_of(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _tables(source):
+    """(queryset, path to the animal, date field, aggregates) of each table feeding a source
+
+    Animals waiting for a background deletion no longer count; the history
+    tables filter on the animal join their grouping needs anyway.
+    """
+    if source == MEASUREMENTS:
+        return [
+            (AnimalMeasurement.objects.filter(animal__pending_deletion=False), 'animal__', 'date', {
+                'measurement_count': Count('id'),
+                'weight_total': Sum('weight'),
+                'weight_count': Count('weight'),
+            }),
+            (AnimalMeasurementArchive.objects.filter(animal__pending_deletion=False), 'animal__', 'period_start', {
+                'measurement_count': Sum('reading_count'),
+                'weight_total': Sum(
+                    F('weight') * F('weight_count'),
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                ),
+                'weight_count': Sum('weight_count'),
+            }),
+        ]
+    if source == VACCINATIONS:
+        return [
+            (Vaccination.objects.filter(animal__pending_deletion=False), 'animal__', 'date_administered', {'vaccination_count': Count('id')}),
+        ]
+    return [
+        (Animal.objects.active(), '', 'date_of_birth', {'animals_born': Count('id')}),
+    ]
+
+
+def _grouped(source, owner_id=None, species=None, months=None, animal_ids=None):
+    """Grouped (owner, species, month) rows of every table feeding source"""
+    for queryset, animal, date_field, aggregates in _tables(source):
+        if owner_id is not None:
+            queryset = queryset.filter(**{f'{animal}owner_id': owner_id})
+        if species is not None:
+            queryset = queryset.filter(**{f'{animal}species': species})
+        if animal_ids is not None:
+            queryset = queryset.filter(**{f'{animal}id__in': animal_ids})
+        if months:
+            queryset = queryset.filter(**{
+                f'{date_field}__gte': min(months),
+                f'{date_field}__lt': next_month(max(months)),
+            })
+        yield from (
+            queryset.annotate(month=TruncMonth(date_field))
+            .values('month', bucket_owner=F(f'{animal}owner_id'), bucket_species=F(f'{animal}species'))
+            .annotate(**aggregates)
+            .order_by()
+        )
+
+
+def monthly_totals(sources, **filters):
+    """Totals of the given sources keyed by (owner id, species, month)"""
+    totals = defaultdict(dict)
+    for source in sources:
+        for row in _grouped(source, **filters):
+            bucket = totals[(row['bucket_owner'], row['bucket_species'], row['month'])]
+            for field in SOURCE_FIELDS[source]:
+                bucket[field] = bucket.get(field, 0) + (row[field] or 0)
+    for bucket in totals.values():
+        if 'weight_total' in bucket:
+            bucket['weight_total'] = Decimal(str(bucket['weight_total'])).quantize(TWO_PLACES)
+    return totals
+
+
+def animal_rollup_keys(animal_ids, sources=ALL_SOURCES):
+    """Buckets the given animals currently contribute to"""
+    keys = set()
+    for source in sources:
+        for row in _grouped(source, animal_ids=list(animal_ids)):
+            keys.add((row['bucket_owner'], row['bucket_species'], row['month']))
+    return keys
+
+
+def refresh_rollups(keys, sources=ALL_SOURCES):
+    """Recompute the given sources' fields of the given buckets
+
+    Fields of other sources are left alone, so a measurement write only
+    aggregates measurements. Buckets left without any activity are removed.
+    """
+    months_by_group = defaultdict(set)
+    for owner_id, species, month in keys:
+        months_by_group[(owner_id, species)].add(month_of(month))
+    fields = [field for source in sources for field in SOURCE_FIELDS[source]]
+
+    for (owner_id, species), months in months_by_group.items():
+        totals = monthly_totals(sources, owner_id=owner_id, species=species, months=months)
+        rows = [
+            MonthlyRollup(
+                owner_id=owner_id, species=species, month=month,
+                **{field: totals.get((owner_id, species, month), {}).get(field, 0) for field in fields},
+            )
+            for month in sorted(months)
+        ]
+        with transaction.atomic():
+            MonthlyRollup.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['owner', 'species', 'month'],
+                update_fields=fields,
+            )
+            MonthlyRollup.objects.filter(
+                owner_id=owner_id, species=species, month__in=months,
+                measurement_count=0, vaccination_count=0, animals_born=0,
+            ).delete()
+
+
+def rebuild_rollups(owner_id=None, batch_size=1000):
+    """Replace the rollups (of one owner, or all) with totals computed from scratch
+
+    Returns the number of rollup rows written.
+    """
+    totals = monthly_totals(ALL_SOURCES, owner_id=owner_id)
+    rows = [
+        MonthlyRollup(owner_id=owner, species=species, month=month, **fields)
+        for (owner, species, month), fields in totals.items()
+    ]
+    existing = MonthlyRollup.objects.all()
+    if owner_id is not None:
+        existing = existing.filter(owner_id=owner_id)
+    with transaction.atomic():
+        existing.delete()
+        MonthlyRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def monthly_report(user, species=None, since=None, until=None):
+    """Report rows per species and month, built from the rollups only
+
+    herd_size counts the owner's current animals of the species born up to
+    the end of that month.
+    """
+    rollups = MonthlyRollup.objects.filter(owner=user)
+    if species:
+        rollups = rollups.filter(species=species)
+
+    herd = defaultdict(int)
+    if since:
+        born_before = rollups.filter(month__lt=month_of(since)).values('species').annotate(born=Sum('animals_born'))
+        herd.update({row['species']: row['born'] for row in born_before})
+        rollups = rollups.filter(month__gte=month_of(since))
+    if until:
+        rollups = rollups.filter(month__lte=until)
+
+    report = []
+    for rollup in rollups.order_by('species', 'month'):
+        herd[rollup.species] += rollup.animals_born
+        average = None
+        if rollup.weight_count:
+            average = (rollup.weight_total / rollup.weight_count).quantize(TWO_PLACES)
+        report.append({
+            'species': rollup.species,
+            'month': rollup.month,
+            'measurements': rollup.measurement_count,
+            'average_weight': average,
+            'vaccinations': rollup.vaccination_count,
+            'animals_born': rollup.animals_born,
+            'herd_size': herd[rollup.species],
+        })
+    return report
@@ -1,14 +1,50 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from .models import Animal, AnimalMeasurement, Vaccination, AnimalDetail
+from .models import AccessGrant, Animal, AnimalMeasurement, AnimalMeasurementArchive, Vaccination, AnimalDetail, WeightAnomaly, AttributeKey, AnimalAttribute
+from .attributes import parse_value, typed_values
 
 
 
 
 
+class GrowthPercentileField(serializers.FloatField):
+    """Percentile of the reading's weight on the growth curve passed in the context"""
+    def __init__(self, date_field='date', **kwargs):
+        self.date_field = date_field
+        super().__init__(source='*', read_only=True, allow_null=True, **kwargs)
+
+    def to_representation(self, measurement):
+        curve = self.context.get('growth_curve')
+        return curve.percentile_at(measurement.weight, getattr(measurement, self.date_field)) if curve else None
+
 class AnimalMeasurementSerializer(serializers.ModelSerializer):
+    percentile = GrowthPercentileField()
     class Meta:
         model = AnimalMeasurement
-        fields = ['date', 'weight', 'height']
+        fields = ['date', 'weight', 'height', 'percentile']
+
+    def validate_date(self, value):
+        """Creating upserts on the day; moving a reading onto a taken day is an error"""
+        if self.instance is not None and value != self.instance.date:
+            taken = AnimalMeasurement.objects.filter(animal_id=self.instance.animal_id, date=value)
+            if taken.exists():
+                raise serializers.ValidationError('The animal already has a measurement on this day.')
+        return value
+
+class AnimalMeasurementArchiveSerializer(serializers.ModelSerializer):
+    """Archived rollup presented in the shape of a measurement; percentile is that of the mean weight"""
+    date = serializers.DateField(source='period_start')
+    percentile = GrowthPercentileField(date_field='period_start')
+    class Meta:
+        model = AnimalMeasurementArchive
+        fields = ['date', 'weight', 'height', 'percentile', 'resolution', 'last_reading_on', 'reading_count', 'weight_min', 'weight_max']
+        read_only_fields = fields
+
+class WeightAnomalySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WeightAnomaly
+        fields = ['date', 'weight', 'rate_of_change', 'zscore', 'detected_at']
+        read_only_fields = fields
 
 class VaccinationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -20,6 +56,48 @@ class AnimalDetailSerializer(serializers.ModelSerializer):
         model = AnimalDetail
         fields = ['name', 'value', 'date_recorded']
 
+class AttributeKeySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AttributeKey
+        fields = ['name', 'value_type', 'description']
+        read_only_fields = fields
+
+class AnimalAttributeSerializer(serializers.ModelSerializer):
+    """Typed attribute value; the key's type decides how value is parsed and stored"""
+    key = serializers.SlugRelatedField(slug_field='name', queryset=AttributeKey.objects.all())
+    value = serializers.JSONField()
+    class Meta:
+        model = AnimalAttribute
+        fields = ['key', 'value', 'updated_at']
+        read_only_fields = ['updated_at']
+
+    def validate(self, attrs):
+        key = attrs.get('key') or self.instance.key
+        if 'value' in attrs:
+            try:
+                attrs['value'] = parse_value(key, attrs['value'])
+            except ValueError as error:
+                raise serializers.ValidationError({'value': str(error)})
+        return attrs
+
+    def create(self, validated_data):
+        """Setting a key the animal already has replaces its value"""
+        key = validated_data['key']
+        attribute, _ = AnimalAttribute.objects.update_or_create(
+            animal=validated_data['animal'], key=key,
+            defaults=typed_values(key, validated_data['value']),
+        )
+        return attribute
+
+    def update(self, instance, validated_data):
+        if validated_data.get('key', instance.key) != instance.key:
+            raise serializers.ValidationError({'key': 'The key of an attribute cannot change.'})
+        if 'value' in validated_data:
+            for column, value in typed_values(instance.key, validated_data['value']).items():
+                setattr(instance, column, value)
+            instance.save()
+        return instance
+
 class AnimalSerializer(serializers.ModelSerializer):
     details = AnimalDetailSerializer(many=True, required=False)
     vaccinations = VaccinationSerializer(many=True, required=False)
@@ -35,5 +113,178 @@ class AnimalSerializer(serializers.ModelSerializer):
         return animal
 
 
+class AccessGrantSerializer(serializers.ModelSerializer):
+    """Access to the owner's whole herd, or to one animal when animal is set"""
+    grantee = serializers.SlugRelatedField(slug_field='email', queryset=get_user_model().objects.filter(is_active=True))
+    animal = serializers.PrimaryKeyRelatedField(queryset=Animal.objects.active(), allow_null=True, required=False)
+    class Meta:
+        model = AccessGrant
+        fields = ['id', 'grantee', 'animal', 'level', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+    def validate(self, attrs):
+        owner = self.context['request'].user
+        grantee = attrs.get('grantee', getattr(self.instance, 'grantee', None))
+        animal = attrs.get('animal', getattr(self.instance, 'animal', None))
+        if grantee == owner:
+            raise serializers.ValidationError({'grantee': 'You already have access to your own animals.'})
+        if animal is not None and animal.owner_id != owner.id:
+            raise serializers.ValidationError({'animal': 'You can only share your own animals.'})
+        existing = AccessGrant.objects.filter(owner=owner, grantee=grantee, animal=animal)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        if existing.exists():
+            raise serializers.ValidationError('This user already has a grant for this herd or animal.')
+        return attrs
+
+
+class AnimalSummarySerializer(serializers.ModelSerializer):
+    """Lightweight animal card built from the summary columns only"""
+    class Meta:
+        model = Animal
+        fields = [
+            'id', 'name', 'species', 'breed', 'date_of_birth',
+            'latest_weight', 'last_measured_on', 'next_vaccination_due',
+            'measurement_count', 'vaccination_count', 'detail_count',
+        ]
+        read_only_fields = fields
+
+
+class DashboardSpeciesSerializer(serializers.Serializer):
+    species = serializers.CharField()
+    total = serializers.IntegerField()
+    not_weighed = serializers.IntegerField()
+    overdue = serializers.IntegerField()
+
+class DashboardVaccinationSerializer(serializers.Serializer):
+    animal_id = serializers.IntegerField()
+    animal_name = serializers.CharField()
+    vaccine_name = serializers.CharField()
+    next_due_date = serializers.DateField()
+
+class DashboardStaleAnimalSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    species = serializers.CharField()
+    last_measured_on = serializers.DateField(allow_null=True)
+
+class DashboardWeightChangeSerializer(serializers.Serializer):
+    animal_id = serializers.IntegerField()
+    animal_name = serializers.CharField()
+    date = serializers.DateField()
+    weight = serializers.DecimalField(max_digits=5, decimal_places=2)
+    previous_date = serializers.DateField()
+    previous_weight = serializers.DecimalField(max_digits=5, decimal_places=2)
+    change = serializers.DecimalField(max_digits=6, decimal_places=2)
+
+class DashboardSerializer(serializers.Serializer):
+    """Owner home screen figures"""
+    herd_size = serializers.IntegerField()
+    species = DashboardSpeciesSerializer(many=True)
+    overdue_vaccinations = DashboardVaccinationSerializer(many=True)
+    not_weighed = DashboardStaleAnimalSerializer(many=True)
+    recent_weight_changes = DashboardWeightChangeSerializer(many=True)
+
+class MonthlyReportQuerySerializer(serializers.Serializer):
+    """Filters of the monthly report; months are given as YYYY-MM"""
+    species = serializers.CharField(required=False)
+    since = serializers.DateField(required=False, input_formats=['%Y-%m'])
+    until = serializers.DateField(required=False, input_formats=['%Y-%m'])
+
+class MonthlyReportSerializer(serializers.Serializer):
+    species = serializers.CharField()
+    month = serializers.DateField()
+    measurements = serializers.IntegerField()
+    average_weight = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    vaccinations = serializers.IntegerField()
+    animals_born = serializers.IntegerField()
+    herd_size = serializers.IntegerField()
+
+class BulkFilterSerializer(serializers.Serializer):
+    """Selects rows across the owner's animals; the response reports how many matched"""
+    FILTERS = ('ids', 'animal_ids', 'date_from', 'date_to')
+
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, write_only=True)
+    animal_ids = serializers.ListField(child=serializers.IntegerField(), required=False, write_only=True)
+    date_from = serializers.DateField(required=False, write_only=True)
+    date_to = serializers.DateField(required=False, write_only=True)
+    dry_run = serializers.BooleanField(default=False)
+    matched = serializers.IntegerField(read_only=True)
+
+    def validate(self, attrs):
+        if not any(attrs.get(name) for name in self.FILTERS):
+            raise serializers.ValidationError('Give at least one of ids, animal_ids, date_from or date_to.')
+        return attrs
+
+    def filters(self):
+        return {name: self.validated_data.get(name) for name in self.FILTERS}
+
+class BulkUpdateSerializer(BulkFilterSerializer):
+    """Bulk update: new field values and offsets added to numeric fields"""
+    values = serializers.DictField(required=False, write_only=True)
+    offsets = serializers.DictField(
+        child=serializers.DecimalField(max_digits=6, decimal_places=2), required=False, write_only=True
+    )
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        resource = self.context['resource']
+        values = attrs.get('values', {})
+        offsets = attrs.get('offsets', {})
+        if not values and not offsets:
+            raise serializers.ValidationError('Give values or offsets to apply.')
+        unknown = set(values) - set(resource.settable)
+        if unknown:
+            raise serializers.ValidationError({'values': f"Cannot bulk update {', '.join(sorted(unknown))}."})
+        unknown = set(offsets) - set(resource.adjustable)
+        if unknown:
+            raise serializers.ValidationError({'offsets': f"Cannot offset {', '.join(sorted(unknown))}."})
+        fields = self.context['model_serializer'](data=values, partial=True)
+        if not fields.is_valid():
+            raise serializers.ValidationError({'values': fields.errors})
+        attrs['values'] = fields.validated_data
+        attrs['offsets'] = offsets
+        return attrs
+
+class VaccinationEventSerializer(VaccinationSerializer):
+    """One vaccination for every selected animal; selectors combine, all=true selects without them"""
+    SELECTORS = ('animal_ids', 'species', 'breed')
+
+    animal_ids = serializers.ListField(child=serializers.IntegerField(), required=False, write_only=True)
+    species = serializers.CharField(max_length=100, required=False, write_only=True)
+    breed = serializers.CharField(max_length=100, required=False, write_only=True)
+    all = serializers.BooleanField(default=False, write_only=True)
+    interval_days = serializers.IntegerField(min_value=1, required=False, write_only=True)
+    vaccinated = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    class Meta(VaccinationSerializer.Meta):
+        fields = VaccinationSerializer.Meta.fields + [
+            'animal_ids', 'species', 'breed', 'all', 'interval_days', 'vaccinated',
+        ]
+
+    def validate(self, attrs):
+        if not attrs['all'] and not any(attrs.get(name) for name in self.SELECTORS):
+            raise serializers.ValidationError('Give animal_ids, species or breed, or set all to vaccinate every animal.')
+        if attrs.get('next_due_date') and attrs.get('interval_days'):
+            raise serializers.ValidationError('Give either next_due_date or interval_days.')
+        return attrs
+
+class TimelineEntrySerializer(serializers.Serializer):
+    """One history row; data holds the fields of its type's serializer"""
+    type = serializers.ChoiceField(choices=['measurement', 'vaccination', 'detail', 'archived_measurement'])
+    id = serializers.IntegerField()
+    date = serializers.DateField()
+    data = serializers.DictField()
+
+class TimelinePageSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True)
+    results = TimelineEntrySerializer(many=True)
 
+class VocabularyQuerySerializer(serializers.Serializer):
+    """Values starting with q, from the user's own records or those shared by many owners"""
+    q = serializers.CharField(required=False, default='', allow_blank=True, max_length=100)
+    scope = serializers.ChoiceField(choices=['owner', 'global'], default='owner')
+    limit = serializers.IntegerField(min_value=1, max_value=50, required=False)
 
+class VocabularyEntrySerializer(serializers.Serializer):
+    value = serializers.CharField()
+    count = serializers.IntegerField()
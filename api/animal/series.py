@@ -0,0 +1,146 @@
+"""
+Columnar encodings of a measurement series
+
+A series is a set of parallel arrays instead of one object per reading:
+
+    {"epoch": "2024-01-01", "encoding": "plain", "archived": 2,
+     "days": [400, 393, ...], "weight": [61.5, 60.25, ...], "height": [...]}
+
+days are offsets from epoch (the earliest date); the last `archived` rows are
+archive rollups. With delta encoding, days hold the difference to the
+previous row and weight/height hold integer hundredths, each the difference
+to the previous non-null value of its column ("scale": 100). The binary form
+packs the same arrays as little-endian int32 behind a fixed header.
+"""
+
+import struct
+import sys
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+SCALE = 100
+COLUMNS = ('weight', 'height')
+MAGIC = b'VXMS'
+VERSION = 1
+DELTA_FLAG = 1
+HEADER = struct.Struct('<4sBBxxIII')  # magic, version, flags, epoch ordinal, rows, archived rows
+NULL = -2 ** 31
+
+
+def _hundredths(value):
+    return None if value is None else int(round(Decimal(value) * SCALE))
+
+
+def _delta(values):
+    """Differences to the previous non-null value; nulls stay null"""
+    encoded, previous = [], 0
+    for value in values:
+        if value is None:
+            encoded.append(None)
+        else:
+            encoded.append(value - previous)
+            previous = value
+    return encoded
+
+
+def _undelta(values):
+    decoded, previous = [], 0
+    for value in values:
+        if value is None:
+            decoded.append(None)
+        else:
+            previous += value
+            decoded.append(previous)
+    return decoded
+
+
+def build_series(readings, archived=(), delta=False):
+    """Series of (date, weight, height) rows; archived rows go last"""
+    archived = list(archived)
+    rows = list(readings) + archived
+    epoch = min((day for day, _, _ in rows), default=None)
+    offsets = [(day - epoch).days for day, _, _ in rows]
+    columns = {name: [_hundredths(row[i + 1]) for row in rows] for i, name in enumerate(COLUMNS)}
+
+    series = {
+        'epoch': epoch.isoformat() if epoch else None,
+        'encoding': 'delta' if delta else 'plain',
+        'archived': len(archived),
+    }
+    if delta:
+        series['scale'] = SCALE
+        series['days'] = [offset - previous for offset, previous in zip(offsets, [0] + offsets)]
+        series.update({name: _delta(values) for name, values in columns.items()})
+    else:
+        series['days'] = offsets
+        series.update({
+            name: [None if v is None else v / SCALE for v in values] for name, values in columns.items()
+        })
+    return series
+
+
+def decode_series(series):
+    """(date, weight, height) rows of a series, with Decimal weights and heights"""
+    if series['encoding'] == 'delta':
+        offsets = []
+        for step in series['days']:
+            offsets.append((offsets[-1] if offsets else 0) + step)
+        columns = [_undelta(series[name]) for name in COLUMNS]
+        columns = [[None if v is None else Decimal(v) / SCALE for v in values] for values in columns]
+    else:
+        offsets = series['days']
+        columns = [[None if v is None else Decimal(str(v)).quantize(Decimal('0.01')) for v in series[name]] for name in COLUMNS]
+    if not offsets:
+        return []
+    epoch = date.fromisoformat(series['epoch'])
+    return [
+        (epoch + timedelta(days=offset), weight, height)
+        for offset, weight, height in zip(offsets, *columns)
+    ]
+
+
+def _int32(values):
+    packed = array('i', (NULL if v is None else v for v in values))
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def pack_series(series):
+    """Binary form of a series built by build_series"""
+    delta = series['encoding'] == 'delta'
+    columns = [series[name] for name in COLUMNS]
+    if not delta:
+        columns = [[_hundredths(v) for v in values] for values in columns]
+    epoch = date.fromisoformat(series['epoch']).toordinal() if series['epoch'] else 0
+    header = HEADER.pack(MAGIC, VERSION, DELTA_FLAG if delta else 0, epoch, len(series['days']), series['archived'])
+    return header + b''.join(_int32(values) for values in [series['days']] + columns)
+
+
+def unpack_series(payload):
+    """Series dict, as build_series returns it, read back from pack_series output"""
+    magic, version, flags, epoch, count, archived = HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a measurement series.')
+    columns = []
+    for i in range(1 + len(COLUMNS)):
+        values = array('i')
+        start = HEADER.size + i * count * values.itemsize
+        values.frombytes(payload[start:start + count * values.itemsize])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        columns.append([None if v == NULL else v for v in values])
+    series = {
+        'epoch': date.fromordinal(epoch).isoformat() if count else None,
+        'encoding': 'delta' if flags & DELTA_FLAG else 'plain',
+        'archived': archived,
+    }
+    if series['encoding'] == 'delta':
+        series['scale'] = SCALE
+    else:
+        columns[1:] = [[None if v is None else v / SCALE for v in values] for values in columns[1:]]
+    series['days'] = columns[0]
+    series.update(zip(COLUMNS, columns[1:]))
+    return series
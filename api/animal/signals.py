@@ -0,0 +1,222 @@
+"""
+Signal handlers keeping denormalized animal data in step with its histories
+"""
+
+from django.db.models import QuerySet
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+
+from .access import refresh_animal_access, refresh_grantee_access
+from .anomalies import readings_deleted
+from .models import AccessGrant, Animal, AnimalMeasurement, Vaccination, AnimalDetail, VocabularyTerm
+from .rollups import ALL_SOURCES, ANIMALS, MEASUREMENTS, VACCINATIONS, animal_rollup_keys, refresh_rollups
+from .summary import refresh_summaries
+from .vocabulary import animal_vocabulary_keys, refresh_vocabulary
+
+
+HISTORY_MODELS = (AnimalMeasurement, Vaccination, AnimalDetail)
+
+# Models feeding the monthly rollups: source, path to the animal, date picking the month
+ROLLUP_MODELS = {
+    AnimalMeasurement: (MEASUREMENTS, 'animal__', 'date'),
+    Vaccination: (VACCINATIONS, 'animal__', 'date_administered'),
+    Animal: (ANIMALS, '', 'date_of_birth'),
+}
+
+
+def is_cascade(sender, origin):
+    """True when a row is deleted as part of deleting its animal or owner"""
+    if isinstance(origin, QuerySet):
+        return origin.model is not sender
+    return origin is not None and not isinstance(origin, sender)
+
+
+def history_saved(sender, instance, **kwargs):
+    refresh_summaries([instance.animal_id])
+
+
+def history_deleted(sender, instance, origin=None, **kwargs):
+    if not is_cascade(sender, origin):
+        refresh_summaries([instance.animal_id])
+
+
+def measurement_deleted(sender, instance, origin=None, **kwargs):
+    if not is_cascade(sender, origin):
+        readings_deleted([instance.animal_id])
+
+
+def stored_bucket(sender, pk):
+    """(owner id, species, month) a row currently counts towards, read back from the database"""
+    _, animal, date_field = ROLLUP_MODELS[sender]
+    return (
+        sender.objects.filter(pk=pk)
+        .annotate(month=TruncMonth(date_field))
+        .values_list(f'{animal}owner_id', f'{animal}species', 'month')
+        .first()
+    )
+
+
+def remember_bucket(sender, instance, raw=False, **kwargs):
+    """Keep the bucket of an edited row so the one it leaves is refreshed too"""
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = stored_bucket(sender, instance.pk)
+
+
+def rollup_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    source, _, _ = ROLLUP_MODELS[sender]
+    current = stored_bucket(sender, instance.pk)
+    previous = getattr(instance, '_rollup_previous', None)
+    if sender is Animal and previous and previous[:2] != current[:2]:
+        # A new owner or species moves the animal's whole history
+        months = {month for _, _, month in animal_rollup_keys([instance.pk])}
+        keys = {(*owner_species, month) for owner_species in (previous[:2], current[:2]) for month in months}
+        refresh_rollups(keys | {previous}, ALL_SOURCES)
+    elif current != previous:
+        refresh_rollups({current, previous} - {None}, [source])
+
+
+def history_rollup_deleted(sender, instance, origin=None, **kwargs):
+    if not is_cascade(sender, origin):
+        source, _, date_field = ROLLUP_MODELS[sender]
+        animal = Animal.objects.filter(pk=instance.animal_id).values_list('owner_id', 'species').first()
+        if animal:
+            day = sender._meta.get_field(date_field).to_python(getattr(instance, date_field))
+            refresh_rollups({(*animal, day)}, [source])
+
+
+def remember_animal_buckets(sender, instance, origin=None, **kwargs):
+    instance._rollup_keys = set()
+    if not is_cascade(sender, origin):
+        instance._rollup_keys = animal_rollup_keys([instance.pk])
+
+
+def animal_rollup_deleted(sender, instance, **kwargs):
+    keys = getattr(instance, '_rollup_keys', None)
+    if keys:
+        refresh_rollups(keys, ALL_SOURCES)
+
+
+def remember_animal(sender, instance, raw=False, **kwargs):
+    """Keep the stored owner, species and breed of an edited animal"""
+    instance._stored = None
+    if instance.pk and not raw:
+        instance._stored = Animal.objects.filter(pk=instance.pk).values_list('owner_id', 'species', 'breed').first()
+
+
+def animal_access_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous_owner = instance._stored[0] if instance._stored else None
+    if created or previous_owner != instance.owner_id:
+        # Grants of a previous owner do not follow the animal
+        AccessGrant.objects.filter(animal=instance).exclude(owner_id=instance.owner_id).delete()
+        refresh_animal_access([instance.pk])
+
+
+def remember_grant(sender, instance, raw=False, **kwargs):
+    instance._access_previous = None
+    if instance.pk and not raw:
+        instance._access_previous = (
+            AccessGrant.objects.filter(pk=instance.pk).values_list('owner_id', 'grantee_id').first()
+        )
+
+
+def grant_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.owner_id, instance.grantee_id)
+    for owner_id, grantee_id in {current, getattr(instance, '_access_previous', None)} - {None}:
+        refresh_grantee_access(owner_id, grantee_id)
+
+
+def grant_deleted(sender, instance, origin=None, **kwargs):
+    if not is_cascade(sender, origin):
+        refresh_grantee_access(instance.owner_id, instance.grantee_id)
+
+
+def animal_vocabulary_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw or instance._stored == (instance.owner_id, instance.species, instance.breed):
+        return
+    keys = {
+        (instance.owner_id, VocabularyTerm.SPECIES, instance.species),
+        (instance.owner_id, VocabularyTerm.BREED, instance.breed),
+    }
+    stored = instance._stored
+    if stored:
+        owner_id, species, breed = stored
+        keys |= {(owner_id, VocabularyTerm.SPECIES, species), (owner_id, VocabularyTerm.BREED, breed)}
+        if owner_id != instance.owner_id:
+            # The animal's vaccinations move to the new owner's vocabulary
+            moved = animal_vocabulary_keys([instance.pk])
+            keys |= moved | {(owner_id, field, value) for _, field, value in moved}
+    refresh_vocabulary(keys)
+
+
+def remember_animal_vocabulary(sender, instance, origin=None, **kwargs):
+    instance._vocabulary_keys = set()
+    if not is_cascade(sender, origin):
+        instance._vocabulary_keys = animal_vocabulary_keys([instance.pk])
+
+
+def animal_vocabulary_deleted(sender, instance, **kwargs):
+    refresh_vocabulary(getattr(instance, '_vocabulary_keys', ()))
+
+
+def vaccine_key(vaccination_id=None, animal_id=None, vaccine_name=None):
+    """(owner id, 'vaccine_name', name) of a stored vaccination, or of an animal and name"""
+    if vaccination_id is not None:
+        stored = Vaccination.objects.filter(pk=vaccination_id).values_list('animal__owner_id', 'vaccine_name').first()
+        return (stored[0], VocabularyTerm.VACCINE_NAME, stored[1]) if stored else None
+    owner_id = Animal.objects.filter(pk=animal_id).values_list('owner_id', flat=True).first()
+    return (owner_id, VocabularyTerm.VACCINE_NAME, vaccine_name) if owner_id else None
+
+
+def remember_vaccine(sender, instance, raw=False, **kwargs):
+    instance._vocabulary_previous = None
+    if instance.pk and not raw:
+        instance._vocabulary_previous = vaccine_key(vaccination_id=instance.pk)
+
+
+def vaccine_vocabulary_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = vaccine_key(animal_id=instance.animal_id, vaccine_name=instance.vaccine_name)
+    previous = getattr(instance, '_vocabulary_previous', None)
+    if current != previous:
+        refresh_vocabulary({current, previous} - {None})
+
+
+def vaccine_vocabulary_deleted(sender, instance, origin=None, **kwargs):
+    if not is_cascade(sender, origin):
+        key = vaccine_key(animal_id=instance.animal_id, vaccine_name=instance.vaccine_name)
+        if key:
+            refresh_vocabulary({key})
+
+
+for model in HISTORY_MODELS:
+    post_save.connect(history_saved, sender=model)
+    post_delete.connect(history_deleted, sender=model)
+
+for model in ROLLUP_MODELS:
+    pre_save.connect(remember_bucket, sender=model)
+    post_save.connect(rollup_saved, sender=model)
+
+post_delete.connect(history_rollup_deleted, sender=AnimalMeasurement)
+post_delete.connect(measurement_deleted, sender=AnimalMeasurement)
+post_delete.connect(history_rollup_deleted, sender=Vaccination)
+pre_delete.connect(remember_animal_buckets, sender=Animal)
+post_delete.connect(animal_rollup_deleted, sender=Animal)
+pre_save.connect(remember_animal, sender=Animal)
+post_save.connect(animal_access_saved, sender=Animal)
+post_save.connect(animal_vocabulary_saved, sender=Animal)
+pre_delete.connect(remember_animal_vocabulary, sender=Animal)
+post_delete.connect(animal_vocabulary_deleted, sender=Animal)
+pre_save.connect(remember_vaccine, sender=Vaccination)
+post_save.connect(vaccine_vocabulary_saved, sender=Vaccination)
+post_delete.connect(vaccine_vocabulary_deleted, sender=Vaccination)
+pre_save.connect(remember_grant, sender=AccessGrant)
+post_save.connect(grant_saved, sender=AccessGrant)
+post_delete.connect(grant_deleted, sender=AccessGrant)
@@ -0,0 +1,78 @@
+"""
+Maintenance of the denormalized summary columns on Animal
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Animal, AnimalMeasurement, AnimalMeasurementArchive, Vaccination, AnimalDetail
+
+
+def _count(queryset):
+    """Correlated subquery counting the rows of queryset for the outer animal"""
+    counts = (
+        queryset.filter(animal=OuterRef('pk'))
+        .order_by()
+        .values('animal')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def summary_expressions():
+    """Expressions computing every summary column from the source rows
+
+    Measurements fall back to the archive tier once an animal's readings
+    have all aged out of the hot table.
+    """
+    measurements = AnimalMeasurement.objects.filter(animal=OuterRef('pk'))
+    archived = AnimalMeasurementArchive.objects.filter(animal=OuterRef('pk'))
+    archived_readings = (
+        archived.order_by()
+        .values('animal')
+        .annotate(total=Sum('reading_count'))
+        .values('total')
+    )
+    return {
+        'latest_weight': Coalesce(
+            Subquery(
+                measurements.filter(weight__isnull=False)
+                .order_by('-date', '-id')
+                .values('weight')[:1]
+            ),
+            Subquery(
+                archived.filter(weight__isnull=False)
+                .order_by('-period_start')
+                .values('weight')[:1]
+            ),
+        ),
+        'last_measured_on': Coalesce(
+            Subquery(measurements.order_by('-date').values('date')[:1]),
+            Subquery(archived.order_by('-last_reading_on').values('last_reading_on')[:1]),
+        ),
+        'next_vaccination_due': Subquery(
+            Vaccination.objects.current()
+            .filter(animal=OuterRef('pk'), next_due_date__isnull=False)
+            .order_by('next_due_date')
+            .values('next_due_date')[:1]
+        ),
+        'measurement_count': (
+            _count(AnimalMeasurement.objects.all())
+            + Coalesce(Subquery(archived_readings, output_field=IntegerField()), 0)
+        ),
+        'vaccination_count': _count(Vaccination.objects.all()),
+        'detail_count': _count(AnimalDetail.objects.all()),
+    }
+
+
+def refresh_summaries(animal_ids):
+    """Recompute the summary of the given animals in a single UPDATE
+
+    The values are derived from the source rows rather than adjusted by
+    deltas, so concurrent writers cannot leave the summary drifting.
+    """
+    animal_ids = list(animal_ids)
+    if not animal_ids:
+        return 0
+    return Animal.objects.filter(id__in=animal_ids).update(**summary_expressions())
@@ -0,0 +1,211 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.models import AccessGrant, Animal, AnimalAccess, AnimalMeasurement
+
+
+GRANTS_URL = reverse('animal:accessgrant-list')
+ANIMALS_URL = reverse('animal:animal-list')
+
+def grant_url(grant_id):
+    return reverse('animal:accessgrant-detail', args=[grant_id])
+
+def animal_url(animal_id):
+    return reverse('animal:animal-detail', args=[animal_id])
+
+def measurements_url(animal_id):
+    return reverse('animal:animalmeasurement-list', args=[animal_id])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2020-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def access_of(user):
+    return dict(AnimalAccess.objects.filter(user=user).values_list('animal_id', 'can_write'))
+
+
+class AccessIndexTests(TestCase):
+    """Test the AnimalAccess rows follow owners and grants"""
+
+    def setUp(self):
+        self.owner = create_user()
+        self.vet = create_user('vet@example.com')
+        self.cow = create_animal(self.owner, name='Cow')
+        self.goat = create_animal(self.owner, name='Goat')
+
+    def test_owner_row_on_create(self):
+        """Test a new animal is writable by its owner"""
+        self.assertEqual(access_of(self.owner), {self.cow.id: True, self.goat.id: True})
+        self.assertEqual(access_of(self.vet), {})
+
+    def test_herd_grant_covers_new_animals(self):
+        """Test a herd grant reaches every animal, including ones added later"""
+        AccessGrant.objects.create(owner=self.owner, grantee=self.vet)
+        sheep = create_animal(self.owner, name='Sheep')
+
+        self.assertEqual(access_of(self.vet), {self.cow.id: False, self.goat.id: False, sheep.id: False})
+
+    def test_strongest_grant_wins(self):
+        """Test a write grant on one animal upgrades a read grant on the herd"""
+        AccessGrant.objects.create(owner=self.owner, grantee=self.vet)
+        AccessGrant.objects.create(owner=self.owner, grantee=self.vet, animal=self.cow, level=AccessGrant.WRITE)
+
+        self.assertEqual(access_of(self.vet), {self.cow.id: True, self.goat.id: False})
+
+    def test_revoking_removes_access(self):
+        """Test deleting or downgrading a grant updates the index"""
+        grant = AccessGrant.objects.create(owner=self.owner, grantee=self.vet, animal=self.cow, level=AccessGrant.WRITE)
+        grant.level = AccessGrant.READ
+        grant.save()
+        self.assertEqual(access_of(self.vet), {self.cow.id: False})
+
+        grant.delete()
+        self.assertEqual(access_of(self.vet), {})
+
+    def test_new_owner_drops_old_grants(self):
+        """Test giving an animal away removes the grants of its previous owner"""
+        AccessGrant.objects.create(owner=self.owner, grantee=self.vet)
+        buyer = create_user('buyer@example.com')
+        self.cow.owner = buyer
+        self.cow.save()
+
+        self.assertEqual(access_of(self.vet), {self.goat.id: False})
+        self.assertEqual(access_of(buyer), {self.cow.id: True})
+        self.assertNotIn(self.cow.id, access_of(self.owner))
+
+    def test_rebuild_command(self):
+        """Test the index can be rebuilt from scratch"""
+        AccessGrant.objects.create(owner=self.owner, grantee=self.vet, animal=self.goat)
+        expected = set(AnimalAccess.objects.values_list('user_id', 'animal_id', 'can_write'))
+        AnimalAccess.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_animal_access', stdout=out)
+
+        self.assertIn('Rebuilt access for 2 animals', out.getvalue())
+        self.assertEqual(set(AnimalAccess.objects.values_list('user_id', 'animal_id', 'can_write')), expected)
+
+
+class AccessGrantApiTests(TestCase):
+    """Test owners managing their grants"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = create_user()
+        self.vet = create_user('vet@example.com')
+        self.client.force_authenticate(self.owner)
+        self.cow = create_animal(self.owner, name='Cow')
+
+    def test_create_and_list_grants(self):
+        """Test granting access by email"""
+        res = self.client.post(GRANTS_URL, {'grantee': 'vet@example.com', 'animal': self.cow.id, 'level': 'write'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        grant = AccessGrant.objects.get()
+        self.assertEqual((grant.owner, grant.grantee, grant.animal), (self.owner, self.vet, self.cow))
+        res = self.client.get(GRANTS_URL)
+        self.assertEqual([g['grantee'] for g in res.data], ['vet@example.com'])
+
+    def test_cannot_share_others_animals(self):
+        """Test grants are limited to the user's own animals"""
+        other = create_animal(create_user('other@example.com'))
+
+        res = self.client.post(GRANTS_URL, {'grantee': 'vet@example.com', 'animal': other.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(AccessGrant.objects.exists())
+
+    def test_duplicate_grant_rejected(self):
+        """Test a second herd grant to the same user is rejected"""
+        self.client.post(GRANTS_URL, {'grantee': 'vet@example.com'})
+        res = self.client.post(GRANTS_URL, {'grantee': 'vet@example.com'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_grantee_cannot_see_grants(self):
+        """Test only the giving owner lists and revokes a grant"""
+        grant = AccessGrant.objects.create(owner=self.owner, grantee=self.vet)
+        self.client.force_authenticate(self.vet)
+
+        self.assertEqual(self.client.get(GRANTS_URL).data, [])
+        res = self.client.delete(grant_url(grant.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class DelegatedAccessApiTests(TestCase):
+    """Test grantees using the animal endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = create_user()
+        self.vet = create_user('vet@example.com')
+        self.cow = create_animal(self.owner, name='Cow')
+        self.goat = create_animal(self.owner, name='Goat')
+        self.client.force_authenticate(self.vet)
+
+    def test_read_grant_lists_and_reads(self):
+        """Test a read grant shows the animal and its history"""
+        AccessGrant.objects.create(owner=self.owner, grantee=self.vet, animal=self.cow)
+        AnimalMeasurement.objects.create(animal=self.cow, date='2024-01-01', weight=Decimal('100.00'))
+
+        res = self.client.get(ANIMALS_URL)
+        self.assertEqual([a['name'] for a in res.data], ['Cow'])
+        res = self.client.get(measurements_url(self.cow.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        res = self.client.get(measurements_url(self.goat.id))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_read_grant_cannot_write(self):
+        """Test recording history needs a write grant"""
+        grant = AccessGrant.objects.create(owner=self.owner, grantee=self.vet)
+        payload = {'date': '2024-01-01', 'weight': '100.00'}
+
+        res = self.client.post(measurements_url(self.cow.id), payload)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        grant.level = AccessGrant.WRITE
+        grant.save()
+        res = self.client.post(measurements_url(self.cow.id), payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_write_grant_cannot_delete_animal(self):
+        """Test only the owner deletes an animal"""
+        AccessGrant.objects.create(owner=self.owner, grantee=self.vet, level=AccessGrant.WRITE)
+
+        res = self.client.patch(animal_url(self.cow.id), {'breed': 'Jersey'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.delete(animal_url(self.cow.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Animal.objects.filter(id=self.cow.id).exists())
+
+    def test_check_is_one_indexed_lookup(self):
+        """Test the grantee's check reads the index, not the grants"""
+        AccessGrant.objects.create(owner=self.owner, grantee=self.vet)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(measurements_url(self.cow.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        sql = ' '.join(q['sql'] for q in queries.captured_queries)
+        self.assertIn('animal_animalaccess', sql)
+        self.assertNotIn('animal_accessgrant', sql)
@@ -0,0 +1,131 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.attributes import filter_by_attributes
+from animal.models import Animal, AnimalAttribute, AnimalDetail, AttributeKey
+
+
+ANIMALS_URL = reverse('animal:animal-list')
+
+def attributes_url(animal_id):
+    return reverse('animal:animalattribute-list', args=[animal_id])
+
+def attribute_url(animal_id, key):
+    return reverse('animal:animalattribute-detail', args=[animal_id, key])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2024-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+
+class AnimalAttributeTests(TestCase):
+    """Test typed attributes and attribute queries"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.microchip = AttributeKey.objects.create(name='microchip', value_type='text')
+        self.weight_class = AttributeKey.objects.create(name='weight-class', value_type='number')
+        self.neutered = AttributeKey.objects.create(name='neutered', value_type='boolean')
+        self.daisy = create_animal(self.user, name='Daisy')
+        self.rosie = create_animal(self.user, name='Rosie')
+
+    def set(self, animal, key, value):
+        return self.client.post(attributes_url(animal.id), {'key': key, 'value': value}, format='json')
+
+    def test_set_typed_value(self):
+        """Test values are stored in the column of their key's type"""
+        res = self.set(self.daisy, 'weight-class', 3.5)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        attribute = AnimalAttribute.objects.get(animal=self.daisy)
+        self.assertEqual((attribute.value_number, attribute.value_text), (Decimal('3.5'), None))
+
+    def test_set_replaces_value(self):
+        """Test setting a key twice keeps one attribute with the new value"""
+        self.set(self.daisy, 'microchip', 'A1')
+        self.set(self.daisy, 'microchip', 'B2')
+        self.assertEqual(list(AnimalAttribute.objects.values_list('value_text', flat=True)), ['B2'])
+
+    def test_mistyped_value_rejected(self):
+        """Test values that do not fit the key's type are rejected"""
+        res = self.set(self.daisy, 'weight-class', 'heavy')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('value', res.data)
+
+    def test_unknown_key_rejected(self):
+        """Test only declared keys can be set"""
+        res = self.set(self.daisy, 'colour', 'brown')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_by_key(self):
+        """Test an attribute is addressed by its key name"""
+        self.set(self.daisy, 'neutered', False)
+        res = self.client.patch(attribute_url(self.daisy.id, 'neutered'), {'value': 'yes'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIs(res.data['value'], True)
+
+    def test_other_owner_forbidden(self):
+        """Test attributes of another user's animal cannot be set"""
+        other = create_animal(create_user(email='other@example.com'))
+        res = self.set(other, 'microchip', 'A1')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_filter_equality(self):
+        """Test animals can be found by an attribute value"""
+        self.set(self.daisy, 'microchip', '985112')
+        self.set(self.rosie, 'microchip', '985113')
+
+        res = self.client.get(ANIMALS_URL, {'attr__microchip': '985112'})
+
+        self.assertEqual([a['name'] for a in res.data], ['Daisy'])
+
+    def test_filter_range(self):
+        """Test number attributes can be compared"""
+        self.set(self.daisy, 'weight-class', 2)
+        self.set(self.rosie, 'weight-class', 5)
+
+        res = self.client.get(ANIMALS_URL, {'attr__weight-class__gte': '3', 'attr__weight-class__lt': '10'})
+
+        self.assertEqual([a['name'] for a in res.data], ['Rosie'])
+
+    def test_filter_uses_key_value_index(self):
+        """Test attribute filters are answered from the (key, value) index"""
+        animals = filter_by_attributes(Animal.objects.all(), {'attr__weight-class__gt': '1'})
+        self.assertIn('attribute_number_idx', animals.explain())
+
+    def test_filter_errors(self):
+        """Test unknown keys, bad values and unsupported ranges are reported"""
+        for params in ({'attr__colour': 'x'}, {'attr__weight-class': 'x'}, {'attr__neutered__gt': 'true'}):
+            res = self.client.get(ANIMALS_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_import_from_details(self):
+        """Test the latest matching detail of each animal becomes an attribute"""
+        AnimalDetail.objects.create(animal=self.daisy, name='weight-class', value='2', date_recorded='2024-01-01')
+        AnimalDetail.objects.create(animal=self.daisy, name='weight-class', value='4', date_recorded='2024-06-01')
+        AnimalDetail.objects.create(animal=self.rosie, name='weight-class', value='big', date_recorded='2024-06-01')
+        out = StringIO()
+
+        call_command('import_detail_attributes', 'weight-class', stdout=out)
+
+        self.assertIn('Wrote 1 attributes, skipped 1', out.getvalue())
+        self.assertEqual(AnimalAttribute.objects.get(animal=self.daisy).value_number, Decimal('4'))
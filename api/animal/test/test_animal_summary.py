@@ -0,0 +1,122 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from animal.models import Animal, AnimalMeasurement, Vaccination, AnimalDetail
+
+
+SUMMARY_URL = reverse('animal:animal-summary')
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2024-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+
+class AnimalSummaryTests(TestCase):
+    """Test the summary columns follow writes to the histories"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.animal = create_animal(user=self.user)
+
+    def test_new_animal_has_empty_summary(self):
+        """Test an animal without history has zero counts"""
+        self.assertIsNone(self.animal.latest_weight)
+        self.assertEqual(self.animal.measurement_count, 0)
+
+    def test_measurement_writes_update_summary(self):
+        """Test creating, updating and deleting measurements refreshes the summary"""
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-01-01', weight=Decimal('100.00'))
+        latest = AnimalMeasurement.objects.create(animal=self.animal, date='2024-02-01', weight=Decimal('110.00'))
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.latest_weight, Decimal('110.00'))
+        self.assertEqual(self.animal.last_measured_on, date(2024, 2, 1))
+        self.assertEqual(self.animal.measurement_count, 2)
+
+        latest.weight = Decimal('112.50')
+        latest.save()
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.latest_weight, Decimal('112.50'))
+
+        latest.delete()
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.latest_weight, Decimal('100.00'))
+        self.assertEqual(self.animal.measurement_count, 1)
+
+    def test_next_vaccination_ignores_superseded_doses(self):
+        """Test a booster replaces the due date of the earlier dose"""
+        Vaccination.objects.create(
+            animal=self.animal, vaccine_name='Rabies',
+            date_administered='2023-01-01', next_due_date='2024-01-01'
+        )
+        Vaccination.objects.create(
+            animal=self.animal, vaccine_name='Rabies',
+            date_administered='2024-01-01', next_due_date='2025-01-01'
+        )
+        Vaccination.objects.create(
+            animal=self.animal, vaccine_name='Tetanus',
+            date_administered='2024-03-01', next_due_date='2025-03-01'
+        )
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.next_vaccination_due, date(2025, 1, 1))
+        self.assertEqual(self.animal.vaccination_count, 3)
+
+    def test_detail_count(self):
+        """Test detail writes update the detail count"""
+        AnimalDetail.objects.create(animal=self.animal, name='Coat', value='Bay', date_recorded='2024-01-01')
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.detail_count, 1)
+
+    def test_repair_command(self):
+        """Test the management command rebuilds drifted summaries"""
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-01-01', weight=Decimal('90.00'))
+        Animal.objects.filter(id=self.animal.id).update(latest_weight=None, measurement_count=0)
+
+        call_command('refresh_animal_summaries', stdout=StringIO())
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.latest_weight, Decimal('90.00'))
+        self.assertEqual(self.animal.measurement_count, 1)
+
+
+class AnimalSummaryApiTests(TestCase):
+    """Test the lightweight summary listing"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_summary_list(self):
+        """Test the summary lists only the user's animals without nested histories"""
+        animal = create_animal(user=self.user)
+        AnimalMeasurement.objects.create(animal=animal, date='2024-01-01', weight=Decimal('55.00'))
+        create_animal(user=create_user(email='other@example.com'))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(SUMMARY_URL)
+        selects = [q for q in queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]['latest_weight'], '55.00')
+        self.assertEqual(res.data[0]['measurement_count'], 1)
+        self.assertNotIn('measurements', res.data[0])
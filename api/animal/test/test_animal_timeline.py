@@ -0,0 +1,167 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.models import Animal, AnimalMeasurement, AnimalMeasurementArchive, Vaccination, AnimalDetail
+from animal.timeline import STREAMS, timeline_page
+
+
+def timeline_url(animal_id):
+    return reverse('animal:timeline', args=[animal_id])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2020-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def record_history(animal, days):
+    """One measurement, vaccination and detail per day, the vaccinations every other day"""
+    start = date(2022, 1, 1)
+    AnimalMeasurement.objects.bulk_create([
+        AnimalMeasurement(animal=animal, date=start + timedelta(days=i), weight=Decimal('10.00') + i)
+        for i in range(days)
+    ])
+    Vaccination.objects.bulk_create([
+        Vaccination(animal=animal, vaccine_name=f'Dose {i}', date_administered=start + timedelta(days=i))
+        for i in range(0, days, 2)
+    ])
+    AnimalDetail.objects.bulk_create([
+        AnimalDetail(animal=animal, name='Color', value=f'Shade {i}', date_recorded=start + timedelta(days=i))
+        for i in range(days)
+    ])
+
+
+class PublicTimelineApiTests(TestCase):
+    """Test the unauthenticated timeline"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test authentication is required"""
+        animal = create_animal(create_user())
+        res = self.client.get(timeline_url(animal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateTimelineApiTests(TestCase):
+    """Test the merged history of an animal"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.animal = create_animal(self.user)
+
+    def test_entries_merged_newest_first(self):
+        """Test entries of every type are interleaved by date"""
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-01-05', weight=Decimal('12.00'))
+        Vaccination.objects.create(animal=self.animal, vaccine_name='Rabies', date_administered='2024-01-10')
+        AnimalDetail.objects.create(animal=self.animal, name='Color', value='Brown', date_recorded='2024-01-07')
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-01-01', weight=Decimal('11.00'))
+
+        res = self.client.get(timeline_url(self.animal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['next'])
+        self.assertEqual(
+            [(entry['type'], entry['date']) for entry in res.data['results']],
+            [
+                ('vaccination', '2024-01-10'),
+                ('detail', '2024-01-07'),
+                ('measurement', '2024-01-05'),
+                ('measurement', '2024-01-01'),
+            ],
+        )
+        self.assertEqual(res.data['results'][0]['data']['vaccine_name'], 'Rabies')
+        self.assertEqual(res.data['results'][2]['data']['weight'], '12.00')
+
+    def test_archived_readings_included(self):
+        """Test readings that aged out into the archive appear after the hot ones"""
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-01-05', weight=Decimal('12.00'))
+        AnimalMeasurementArchive.objects.create(
+            animal=self.animal, resolution=AnimalMeasurementArchive.MONTH, period_start='2023-06-01',
+            last_reading_on='2023-06-28', reading_count=4, weight=Decimal('10.50'), weight_count=4,
+        )
+
+        res = self.client.get(timeline_url(self.animal.id))
+
+        self.assertEqual(
+            [(entry['type'], entry['date']) for entry in res.data['results']],
+            [('measurement', '2024-01-05'), ('archived_measurement', '2023-06-01')],
+        )
+        self.assertEqual(res.data['results'][1]['data']['reading_count'], 4)
+        self.assertEqual(res.data['results'][1]['data']['weight'], '10.50')
+
+    def test_pages_cover_every_entry_once(self):
+        """Test following next links returns each entry exactly once, ties included"""
+        record_history(self.animal, 15)
+        total = 15 + 8 + 15
+
+        seen = []
+        url = timeline_url(self.animal.id) + '?page_size=7'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 7)
+            seen.extend((entry['type'], entry['id'], entry['date']) for entry in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(len(seen), total)
+        self.assertEqual(len(set(seen)), total)
+        dates = [day for _, _, day in seen]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_last_full_page_has_no_next(self):
+        """Test a page that ends exactly at the last entry has no next link"""
+        record_history(self.animal, 2)
+
+        res = self.client.get(timeline_url(self.animal.id) + '?page_size=5')
+
+        self.assertEqual(len(res.data['results']), 5)
+        self.assertIsNone(res.data['next'])
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        res = self.client.get(timeline_url(self.animal.id) + '?cursor=not-a-cursor')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_owner_forbidden(self):
+        """Test the timeline of another user's animal is not returned"""
+        other = create_animal(create_user('other@example.com'))
+
+        res = self.client.get(timeline_url(other.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_rows_read_bounded_by_page(self):
+        """Test a page reads a bounded number of rows from each table"""
+        record_history(self.animal, 300)
+        _, cursor = timeline_page(self.animal.id, 20)
+
+        with CaptureQueriesContext(connection) as queries:
+            entries, _ = timeline_page(self.animal.id, 20, cursor)
+
+        self.assertEqual(len(entries), 20)
+        selects = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertLessEqual(len(selects), 2 * len(STREAMS))
+        for sql in selects:
+            self.assertIn('LIMIT', sql)
@@ -0,0 +1,137 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from animal.backfill import BACKFILLS, Backfill, BackfillBusy, run_backfill
+from animal.models import Animal, BackfillCheckpoint, VocabularyTerm
+
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2020-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+
+@override_settings(BACKFILL={'PAUSE': 0})
+class BackfillTests(TestCase):
+    """Test batched, resumable backfills"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.animals = [create_animal(self.user, name=f'Animal {i}') for i in range(5)]
+        self.seen = []
+        self.failing_id = None
+        self.registry = mock.patch.dict(BACKFILLS, {'test': Backfill('test', 'animal.Animal', self.apply)})
+        self.registry.start()
+        self.addCleanup(self.registry.stop)
+
+    def apply(self, animal_ids):
+        if self.failing_id in animal_ids:
+            raise RuntimeError('boom')
+        self.seen.append(animal_ids)
+        return len(animal_ids)
+
+    def ids(self):
+        return [animal.id for animal in self.animals]
+
+    def test_batches_in_key_order(self):
+        checkpoint = run_backfill('test', batch_size=2)
+
+        self.assertEqual(sum(self.seen, []), self.ids())
+        self.assertEqual(len(self.seen[0]), 2)
+        self.assertIsNotNone(checkpoint.finished_at)
+        self.assertEqual((checkpoint.rows, checkpoint.last_pk), (5, self.ids()[-1]))
+
+    def test_resumes_after_interruption(self):
+        """Test a later run continues after the last committed batch"""
+        run_backfill('test', batch_size=2, max_batches=1)
+        checkpoint = BackfillCheckpoint.objects.get(name='test')
+        self.assertIsNone(checkpoint.finished_at)
+        self.assertIsNone(checkpoint.claimed_at)
+        self.assertEqual(checkpoint.last_pk, self.ids()[1])
+
+        run_backfill('test')
+
+        self.assertEqual(sum(self.seen, []), self.ids())
+
+    def test_failed_batch_resumes(self):
+        """Test a failing batch is recorded and retried by the next run"""
+        self.failing_id = self.ids()[2]
+        with self.assertRaises(RuntimeError):
+            run_backfill('test', batch_size=2)
+
+        checkpoint = BackfillCheckpoint.objects.get(name='test')
+        self.assertIn('boom', checkpoint.error)
+        self.assertEqual(checkpoint.last_pk, self.ids()[1])
+
+        self.failing_id = None
+        checkpoint = run_backfill('test')
+        self.assertEqual(sum(self.seen, []), self.ids())
+        self.assertEqual(checkpoint.error, '')
+
+    def test_rows_added_later_left_to_live_code(self):
+        """Test a run stops at the last key present when the backfill started"""
+        run_backfill('test', batch_size=1, max_batches=1)
+        create_animal(self.user, name='Newcomer')
+
+        run_backfill('test')
+
+        self.assertEqual(sum(self.seen, []), self.ids())
+
+    def test_finished_not_rerun_unless_restarted(self):
+        run_backfill('test')
+        run_backfill('test')
+        self.assertEqual(len(sum(self.seen, [])), 5)
+
+        run_backfill('test', restart=True)
+        self.assertEqual(len(sum(self.seen, [])), 10)
+
+    def test_one_runner_at_a_time(self):
+        """Test a fresh claim keeps a second runner out until it goes stale"""
+        BackfillCheckpoint.objects.create(name='test', claimed_at='2099-01-01T00:00:00Z')
+
+        with self.assertRaises(BackfillBusy):
+            run_backfill('test')
+
+        BackfillCheckpoint.objects.filter(name='test').update(claimed_at='2000-01-01T00:00:00Z')
+        self.assertIsNotNone(run_backfill('test').finished_at)
+
+    @override_settings(BACKFILL={'PAUSE': 0, 'TARGET_SECONDS': 0})
+    def test_slow_batches_shrink(self):
+        run_backfill('test', batch_size=4)
+
+        self.assertEqual([len(batch) for batch in self.seen], [4, 1])
+        self.assertEqual(BackfillCheckpoint.objects.get(name='test').batch_size, 1)
+
+    def test_registered_backfill(self):
+        """Test the vocabulary backfill rebuilds each owner's terms"""
+        VocabularyTerm.objects.all().delete()
+
+        checkpoint = run_backfill('vocabulary')
+
+        self.assertEqual(checkpoint.rows, 2)
+        self.assertTrue(VocabularyTerm.objects.filter(owner=self.user, value='Test Species', count=5).exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('run_backfill', 'test', '--max-batches', '1', '--batch-size', '3', stdout=out)
+        self.assertIn('test: at', out.getvalue())
+
+        call_command('run_backfill', '--list', stdout=out)
+        self.assertIn('animal-summaries     not started', out.getvalue())
+
+        BackfillCheckpoint.objects.filter(name='test').update(claimed_at='2099-01-01T00:00:00Z')
+        with self.assertRaises(CommandError):
+            call_command('run_backfill', 'test', stdout=out)
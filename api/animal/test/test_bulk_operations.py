@@ -0,0 +1,142 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.models import Animal, AnimalDetail, AnimalMeasurement, MonthlyRollup, Vaccination, VaccinationReminder
+
+
+def bulk_url(resource, operation):
+    return reverse(f'animal:bulk-{operation}', args=[resource])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2024-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def weigh(animal, day, weight):
+    return AnimalMeasurement.objects.create(animal=animal, date=day, weight=Decimal(weight))
+
+
+class BulkOperationTests(TestCase):
+    """Test bulk updates and deletes of animal histories"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.first = create_animal(self.user, name='First')
+        self.second = create_animal(self.user, name='Second')
+        self.other = create_animal(create_user(email='other@example.com'), name='Other')
+        for animal in (self.first, self.second, self.other):
+            weigh(animal, '2024-03-01', '10.00')
+            weigh(animal, '2024-03-15', '12.00')
+            weigh(animal, '2024-05-01', '14.00')
+
+    def test_auth_required(self):
+        """Test bulk endpoints require authentication"""
+        res = APIClient().post(bulk_url('measurements', 'delete'), {'ids': [1]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unknown_resource(self):
+        """Test only the animal sub-resources can be changed in bulk"""
+        res = self.client.post(bulk_url('animals', 'delete'), {'ids': [1]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_required(self):
+        """Test a request without any filter is rejected"""
+        res = self.client.post(bulk_url('measurements', 'delete'), {}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(AnimalMeasurement.objects.count(), 9)
+
+    def test_dry_run_counts_only(self):
+        """Test a dry run reports the matches without changing anything"""
+        payload = {'date_from': '2024-03-01', 'date_to': '2024-03-31', 'dry_run': True}
+        res = self.client.post(bulk_url('measurements', 'delete'), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'dry_run': True, 'matched': 4})
+        self.assertEqual(AnimalMeasurement.objects.count(), 9)
+
+    def test_offset_weights_in_date_range(self):
+        """Test a scale correction shifts the owner's readings in range and refreshes summaries"""
+        payload = {'date_from': '2024-05-01', 'offsets': {'weight': '-1.50'}}
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(bulk_url('measurements', 'update'), payload, format='json')
+
+        self.assertEqual(res.data['matched'], 2)
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "animal_animalmeasurement"')]
+        self.assertEqual(len(updates), 1)
+        weights = AnimalMeasurement.objects.filter(date='2024-05-01').values_list('animal__name', 'weight')
+        self.assertEqual(dict(weights), {'First': Decimal('12.50'), 'Second': Decimal('12.50'), 'Other': Decimal('14.00')})
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.latest_weight, Decimal('12.50'))
+        may = MonthlyRollup.objects.get(owner=self.user, month=date(2024, 5, 1))
+        self.assertEqual(may.weight_total, Decimal('25.00'))
+
+    def test_offset_out_of_range_rejected(self):
+        """Test offsets taking a matched reading below zero or past the column are refused"""
+        for offset in ('-10.50', '990.00'):
+            payload = {'animal_ids': [self.first.id], 'offsets': {'weight': offset}}
+            res = self.client.post(bulk_url('measurements', 'update'), payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('offsets', res.data)
+        weights = AnimalMeasurement.objects.filter(animal=self.first).values_list('weight', flat=True)
+        self.assertEqual(sorted(weights), [Decimal('10.00'), Decimal('12.00'), Decimal('14.00')])
+
+    def test_update_rejects_unknown_fields(self):
+        """Test only whitelisted fields can be updated"""
+        res = self.client.post(bulk_url('measurements', 'update'), {'ids': [1], 'values': {'date': '2024-01-01'}}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_validates_values(self):
+        """Test values are validated like single-row edits"""
+        res = self.client.post(bulk_url('measurements', 'update'), {'ids': [1], 'values': {'weight': 'heavy'}}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delete_by_ids_is_owner_scoped(self):
+        """Test ids of another owner's rows are ignored"""
+        ids = list(AnimalMeasurement.objects.filter(date='2024-03-01').values_list('id', flat=True))
+
+        res = self.client.post(bulk_url('measurements', 'delete'), {'ids': ids}, format='json')
+
+        self.assertEqual(res.data['matched'], 2)
+        self.assertTrue(AnimalMeasurement.objects.filter(animal=self.other, date='2024-03-01').exists())
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.measurement_count, 2)
+
+    def test_delete_vaccinations_with_reminders(self):
+        """Test deleting vaccinations also clears their queued reminders"""
+        dose = Vaccination.objects.create(animal=self.first, vaccine_name='Rabies', date_administered='2024-03-01', next_due_date='2024-04-01')
+        VaccinationReminder.objects.create(owner=self.user, vaccination=dose, due_date=dose.next_due_date, kind='due')
+
+        res = self.client.post(bulk_url('vaccinations', 'delete'), {'animal_ids': [self.first.id]}, format='json')
+
+        self.assertEqual(res.data['matched'], 1)
+        self.assertFalse(VaccinationReminder.objects.exists())
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.vaccination_count, self.first.next_vaccination_due), (0, None))
+
+    def test_update_details(self):
+        """Test details can be renamed in bulk"""
+        AnimalDetail.objects.create(animal=self.first, name='colour', value='brown', date_recorded='2024-03-01')
+        res = self.client.post(bulk_url('details', 'update'), {'animal_ids': [self.first.id], 'values': {'name': 'color'}}, format='json')
+        self.assertEqual(res.data['matched'], 1)
+        self.assertTrue(AnimalDetail.objects.filter(name='color').exists())
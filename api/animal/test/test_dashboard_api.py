@@ -0,0 +1,108 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from animal.models import Animal, AnimalMeasurement, Vaccination
+
+
+DASHBOARD_URL = reverse('animal:dashboard')
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2024-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def days_ago(days):
+    return timezone.localdate() - timedelta(days=days)
+
+
+class PublicDashboardApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_dashboard_requires_auth(self):
+        """Test unauthenticated dashboard request returns error"""
+        res = self.client.get(DASHBOARD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateDashboardApiTests(TestCase):
+    """Test the owner dashboard"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def add_herd(self, count):
+        for i in range(count):
+            animal = create_animal(user=self.user, name=f'Horse {i}', species='Horse')
+            AnimalMeasurement.objects.create(animal=animal, date=days_ago(60), weight=Decimal('900.00'))
+            AnimalMeasurement.objects.create(animal=animal, date=days_ago(2), weight=Decimal('880.00'))
+            Vaccination.objects.create(
+                animal=animal, vaccine_name='Rabies',
+                date_administered=days_ago(400), next_due_date=days_ago(35)
+            )
+
+    def count_selects(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(DASHBOARD_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len([q for q in queries if q['sql'].startswith('SELECT')])
+
+    def test_dashboard_figures(self):
+        """Test herd size, overdue, unweighed and weight change figures"""
+        self.add_herd(2)
+        goat = create_animal(user=self.user, name='Goat', species='Goat')
+        AnimalMeasurement.objects.create(animal=goat, date=days_ago(45), weight=Decimal('80.00'))
+        create_animal(user=create_user(email='other@example.com'), species='Horse')
+
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['herd_size'], 3)
+        species = {row['species']: row for row in res.data['species']}
+        self.assertEqual(species['Horse']['total'], 2)
+        self.assertEqual(species['Horse']['overdue'], 2)
+        self.assertEqual(species['Goat']['not_weighed'], 1)
+        self.assertEqual(len(res.data['overdue_vaccinations']), 2)
+        self.assertEqual([a['name'] for a in res.data['not_weighed']], ['Goat'])
+        self.assertEqual(len(res.data['recent_weight_changes']), 2)
+        self.assertEqual(res.data['recent_weight_changes'][0]['change'], '-20.00')
+
+    def test_booster_clears_overdue(self):
+        """Test a later dose of the same vaccine is no longer overdue"""
+        self.add_herd(1)
+        animal = Animal.objects.get(owner=self.user)
+        Vaccination.objects.create(
+            animal=animal, vaccine_name='Rabies',
+            date_administered=days_ago(30), next_due_date=days_ago(-335)
+        )
+        res = self.client.get(DASHBOARD_URL)
+        self.assertEqual(res.data['overdue_vaccinations'], [])
+
+    def test_query_count_is_constant(self):
+        """Test the dashboard query count does not grow with the herd"""
+        self.add_herd(1)
+        small = self.count_selects()
+        self.add_herd(20)
+        large = self.count_selects()
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 4)
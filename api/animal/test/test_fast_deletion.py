@@ -0,0 +1,199 @@
+from datetime import date
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.deletion import process_deletion_jobs, purge_animals, queue_user_deletion
+from animal.reminders import queue_reminders, send_reminders
+from animal.models import (
+    Animal, AnimalDetail, AnimalMeasurement, DeletionJob, MonthlyRollup, Vaccination, VaccinationReminder,
+)
+
+
+ANIMALS_URL = reverse('animal:animal-list')
+
+def detail_url(animal_id):
+    return reverse('animal:animal-detail', args=[animal_id])
+
+def measurements_url(animal_id):
+    return reverse('animal:animalmeasurement-list', args=[animal_id])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2024-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def add_history(animal, readings=3):
+    AnimalMeasurement.objects.bulk_create([
+        AnimalMeasurement(animal=animal, date=date(2024, 2, day), weight=10 + day)
+        for day in range(1, readings + 1)
+    ])
+    dose = Vaccination.objects.create(
+        animal=animal, vaccine_name='Rabies', date_administered='2024-02-01', next_due_date='2025-02-01'
+    )
+    VaccinationReminder.objects.create(owner=animal.owner, vaccination=dose, due_date=dose.next_due_date, kind='due')
+    AnimalDetail.objects.create(animal=animal, name='color', value='brown', date_recorded='2024-02-01')
+    animal.refresh_from_db()
+    return animal
+
+def small_sync_limit():
+    return override_settings(FAST_DELETE={'SYNC_ROW_LIMIT': 2, 'CHUNK_SIZE': 2, 'STALE_AFTER_MINUTES': 60})
+
+
+class FastDeletionTests(TestCase):
+    """Test set-based deletion of animals and users"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.animal = add_history(create_animal(self.user))
+        self.kept = add_history(create_animal(self.user, name='Kept'))
+
+    def test_purge_removes_history_without_loading_rows(self):
+        """Test the history is deleted by statements, not loaded by the collector"""
+        with CaptureQueriesContext(connection) as ctx:
+            purge_animals([self.animal.id], chunk_size=2)
+
+        row_loads = 'SELECT "animal_animalmeasurement"."id", "animal_animalmeasurement"."animal_id"'
+        loaded = [q for q in ctx.captured_queries if q['sql'].startswith(row_loads)]
+        self.assertEqual(loaded, [])
+        self.assertFalse(Animal.objects.filter(id=self.animal.id).exists())
+        self.assertEqual(AnimalMeasurement.objects.count(), 3)
+        self.assertEqual(VaccinationReminder.objects.count(), 1)
+        self.assertEqual(AnimalDetail.objects.count(), 1)
+
+    def test_purge_refreshes_rollups(self):
+        """Test the rollups no longer count a purged animal"""
+        purge_animals([self.animal.id])
+        rollups = MonthlyRollup.objects.get(month=date(2024, 2, 1))
+        self.assertEqual((rollups.measurement_count, rollups.vaccination_count), (3, 1))
+        self.assertEqual(MonthlyRollup.objects.get(month=date(2024, 1, 1)).animals_born, 1)
+
+    def test_small_animal_deleted_immediately(self):
+        """Test deleting an animal with little history answers 204"""
+        res = self.client.delete(detail_url(self.animal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Animal.objects.filter(id=self.animal.id).exists())
+        self.assertFalse(DeletionJob.objects.exists())
+
+    def test_large_animal_deleted_in_background(self):
+        """Test a large history is queued, hidden at once and removed by the job"""
+        with small_sync_limit():
+            res = self.client.delete(detail_url(self.animal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        job = DeletionJob.objects.get(id=res.data['deletion_job'])
+        self.assertEqual([a['name'] for a in self.client.get(ANIMALS_URL).data], ['Kept'])
+        self.assertEqual(self.client.get(measurements_url(self.animal.id)).status_code, status.HTTP_404_NOT_FOUND)
+
+        with small_sync_limit():
+            self.assertEqual(process_deletion_jobs(), (1, 0))
+
+        job.refresh_from_db()
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(Animal.objects.filter(id=self.animal.id).exists())
+        self.assertEqual(AnimalMeasurement.objects.count(), 3)
+
+    def test_queued_animal_leaves_rollups_and_reminders(self):
+        """Test an animal hidden for deletion is no longer counted or reminded about"""
+        with small_sync_limit():
+            self.client.delete(detail_url(self.animal.id))
+
+        rollups = MonthlyRollup.objects.get(month=date(2024, 2, 1))
+        self.assertEqual((rollups.measurement_count, rollups.vaccination_count), (3, 1))
+        self.assertEqual(queue_reminders(today=date(2025, 2, 1)), 1)
+        with self.settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            send_reminders()
+        self.assertFalse(VaccinationReminder.objects.filter(vaccination__animal=self.kept, sent_at__isnull=True).exists())
+        self.assertTrue(VaccinationReminder.objects.filter(vaccination__animal=self.animal, sent_at__isnull=True).exists())
+
+    def test_admin_deletes_users_without_collector(self):
+        """Test the admin delete view and action purge users by statements"""
+        admin = get_user_model().objects.create_user('admin@example.com', 'test123456', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        url = reverse('admin:user_user_delete', args=[self.user.id])
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+            self.assertContains(res, 'Animals: 2')
+            self.client.post(url, {'post': 'yes'})
+
+        row_loads = 'SELECT "animal_animalmeasurement"."id", "animal_animalmeasurement"."animal_id"'
+        self.assertEqual([q for q in ctx.captured_queries if q['sql'].startswith(row_loads)], [])
+        self.assertFalse(get_user_model().objects.filter(id=self.user.id).exists())
+        self.assertFalse(Animal.objects.exists())
+
+        other = add_history(create_animal(create_user(email='other@example.com'))).owner
+        self.client.post(reverse('admin:user_user_changelist'), {
+            'action': 'delete_selected', '_selected_action': [other.id], 'post': 'yes',
+        })
+        self.assertFalse(get_user_model().objects.filter(id=other.id).exists())
+        self.assertEqual(AnimalMeasurement.objects.count(), 0)
+
+    def test_admin_queues_users_with_large_histories(self):
+        """Test the admin delete view and action hand large users to the deletion job"""
+        admin = get_user_model().objects.create_user('admin@example.com', 'test123456', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        other = add_history(create_animal(create_user(email='other@example.com'))).owner
+
+        with small_sync_limit():
+            self.client.post(reverse('admin:user_user_delete', args=[self.user.id]), {'post': 'yes'})
+            self.client.post(reverse('admin:user_user_changelist'), {
+                'action': 'delete_selected', '_selected_action': [other.id], 'post': 'yes',
+            })
+
+        self.assertEqual(DeletionJob.objects.filter(kind=DeletionJob.USER).count(), 2)
+        self.assertEqual(get_user_model().objects.filter(id__in=[self.user.id, other.id], is_active=False).count(), 2)
+        self.assertEqual(AnimalMeasurement.objects.count(), 9)
+        self.assertFalse(Animal.objects.filter(pending_deletion=False).exists())
+
+        with small_sync_limit():
+            self.assertEqual(process_deletion_jobs(), (2, 0))
+        self.assertFalse(Animal.objects.exists())
+
+    def test_user_deletion(self):
+        """Test a queued user is deactivated and later removed with all animals"""
+        other = add_history(create_animal(create_user(email='other@example.com')))
+        queue_user_deletion(self.user)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+        out = StringIO()
+        call_command('process_deletion_jobs', stdout=out)
+
+        self.assertIn('Finished 1 deletion jobs', out.getvalue())
+        self.assertFalse(get_user_model().objects.filter(id=self.user.id).exists())
+        self.assertEqual(list(Animal.objects.values_list('id', flat=True)), [other.id])
+        self.assertFalse(MonthlyRollup.objects.filter(owner_id=self.user.id).exists())
+        self.assertEqual(VaccinationReminder.objects.count(), 1)
+
+    def test_failed_job_is_retried(self):
+        """Test a failing job records its error and runs again next time"""
+        job = queue_user_deletion(self.user)
+        with patch('animal.deletion.purge_user', side_effect=RuntimeError('disk full')):
+            self.assertEqual(process_deletion_jobs(), (0, 1))
+        job.refresh_from_db()
+        self.assertIn('disk full', job.error)
+
+        self.assertEqual(process_deletion_jobs(), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual((job.attempts, job.error), (2, ''))
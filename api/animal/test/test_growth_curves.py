@@ -0,0 +1,174 @@
+from datetime import date, timedelta
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.growth import PERCENTILES, build_reference_curves, group_percentiles, percentile_from_knots
+from animal.models import Animal, AnimalMeasurement, GrowthReference
+
+
+BIRTH = date(2024, 1, 1)
+
+def measurements_url(animal_id):
+    return reverse('animal:animalmeasurement-list', args=[animal_id])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': BIRTH
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def weigh(animal, weight, age_days=10):
+    return AnimalMeasurement.objects.create(animal=animal, date=BIRTH + timedelta(days=age_days), weight=weight)
+
+
+class GroupPercentileTests(TestCase):
+    """Test the vectorized percentile computation"""
+
+    def test_matches_numpy_percentile_per_group(self):
+        """Test every group's knots equal numpy.percentile of that group"""
+        rng = np.random.default_rng(7)
+        group = rng.integers(0, 4, size=200)
+        values = rng.normal(50, 10, size=200)
+
+        groups, counts, table = group_percentiles(group, values)
+
+        for key, count, row in zip(groups, counts, table):
+            members = values[group == key]
+            self.assertEqual(count, len(members))
+            np.testing.assert_allclose(row, np.percentile(members, PERCENTILES))
+
+    def test_percentile_from_knots(self):
+        """Test weights are interpolated between knots and clamped outside"""
+        knots = [10, 20, 30, 40, 50, 60, 70]
+        self.assertEqual(percentile_from_knots(40, knots), 50.0)
+        self.assertEqual(percentile_from_knots(45, knots), 62.5)
+        self.assertEqual(percentile_from_knots(1, knots), 5.0)
+        self.assertEqual(percentile_from_knots(99, knots), 95.0)
+
+
+class GrowthReferenceTests(TestCase):
+    """Test building curves and reporting percentiles"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def populate(self, breed='Test Breed', count=21):
+        for weight in range(1, count + 1):
+            weigh(create_animal(self.user, breed=breed), weight)
+
+    def test_build_breed_and_species_curves(self):
+        """Test curves are written per breed and per species, skipping thin buckets"""
+        self.populate()
+        weigh(create_animal(self.user, breed='Rare Breed'), 5)
+
+        written = build_reference_curves(bucket_days=30, min_samples=20)
+
+        self.assertEqual(written, 2)
+        breed = GrowthReference.objects.get(breed='Test Breed')
+        self.assertEqual((breed.age_days, breed.sample_count, breed.p50), (0, 21, 11))
+        self.assertEqual(GrowthReference.objects.get(breed='').sample_count, 22)
+
+    def test_rebuild_replaces_curves(self):
+        """Test a rebuild does not keep stale rows"""
+        self.populate()
+        build_reference_curves(min_samples=20)
+        AnimalMeasurement.objects.all().delete()
+        self.assertEqual(build_reference_curves(min_samples=20), 0)
+        self.assertFalse(GrowthReference.objects.exists())
+
+    def count_selects(self, animal):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(measurements_url(animal.id), {'tier': 'hot'})
+        return res, len([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')])
+
+    def test_measurements_include_percentile(self):
+        """Test the measurement list reports each reading's percentile"""
+        self.populate()
+        build_reference_curves(min_samples=20)
+        animal = create_animal(self.user)
+        weigh(animal, 11, age_days=5)
+        weigh(animal, 30, age_days=20)
+        weigh(animal, 11, age_days=400)
+
+        res = self.client.get(measurements_url(animal.id), {'tier': 'hot'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([m['percentile'] for m in res.data], [None, 95.0, 50.0])
+
+    def test_percentile_uses_built_bucket_width(self):
+        """Test curves built with another bucket width than the setting are looked up with theirs"""
+        self.populate()
+        build_reference_curves(bucket_days=7, min_samples=20)
+        animal = create_animal(self.user)
+        for age_days in (5, 12, 20):
+            weigh(animal, 11, age_days=age_days)
+
+        res = self.client.get(measurements_url(animal.id), {'tier': 'hot'})
+
+        self.assertEqual(GrowthReference.objects.get(breed='').bucket_days, 7)
+        self.assertEqual([m['percentile'] for m in res.data], [None, 50.0, None])
+
+    def test_percentile_lookup_does_not_scale_with_readings(self):
+        """Test the reference is loaded once, not queried per reading"""
+        self.populate()
+        build_reference_curves(min_samples=20)
+        animal = create_animal(self.user)
+        weigh(animal, 11)
+        _, few = self.count_selects(animal)
+        for age_days in range(1, 10):
+            weigh(animal, 11, age_days=age_days)
+
+        res, many = self.count_selects(animal)
+
+        self.assertEqual(len(res.data), 10)
+        self.assertEqual(many, few)
+
+    def test_reference_loaded_once_per_request(self):
+        """Test the list and its archived rows share one growth curve and one animal lookup"""
+        animal = create_animal(self.user)
+        weigh(animal, 11)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(measurements_url(animal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tables = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len([sql for sql in tables if 'FROM "animal_growthreference"' in sql]), 1)
+        self.assertEqual(len([sql for sql in tables if 'FROM "animal_animal"' in sql]), 1)
+
+    def test_falls_back_to_species_curve(self):
+        """Test a breed without its own curve uses the species curve"""
+        self.populate()
+        build_reference_curves(min_samples=20)
+        animal = create_animal(self.user, breed='Rare Breed')
+        weigh(animal, 11)
+
+        res = self.client.get(measurements_url(animal.id), {'tier': 'hot'})
+
+        self.assertEqual(res.data[0]['percentile'], 50.0)
+
+    def test_command(self):
+        """Test the management command rebuilds the curves"""
+        self.populate()
+        out = StringIO()
+        call_command('build_growth_curves', '--min-samples', '20', stdout=out)
+        self.assertIn('Wrote 2 growth reference rows', out.getvalue())
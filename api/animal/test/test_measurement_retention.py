@@ -0,0 +1,153 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from animal.models import Animal, AnimalMeasurement, AnimalMeasurementArchive, GrowthReference
+from animal.retention import archive_cutoff, archive_measurements
+
+
+def measuremnt_url(animal_id):
+    return reverse('animal:animalmeasurement-list', args=[animal_id])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2020-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def add_readings(animal, *readings):
+    for day, weight in readings:
+        AnimalMeasurement.objects.create(animal=animal, date=day, weight=Decimal(weight))
+
+
+class MeasurementRetentionTests(TestCase):
+    """Test rolling old measurements into the archive tier"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.animal = create_animal(user=self.user)
+
+    def test_cutoff_aligned_to_period(self):
+        """Test the cutoff falls on a period boundary so only whole periods are archived"""
+        self.assertEqual(archive_cutoff(date(2024, 6, 20), 30, 'month'), date(2024, 5, 1))
+        self.assertEqual(archive_cutoff(date(2024, 6, 20), 0, 'week'), date(2024, 6, 17))
+
+    def test_monthly_rollup(self):
+        """Test old readings become one row per month and leave the hot table"""
+        add_readings(
+            self.animal,
+            ('2022-01-03', '100.00'), ('2022-01-10', '102.00'),
+            ('2022-02-07', '110.00'), ('2024-06-01', '150.00'),
+        )
+        archived, written = archive_measurements(cutoff=date(2024, 1, 1), resolution='month')
+
+        self.assertEqual((archived, written), (3, 2))
+        self.assertEqual(AnimalMeasurement.objects.count(), 1)
+        january = AnimalMeasurementArchive.objects.get(period_start=date(2022, 1, 1))
+        self.assertEqual(january.reading_count, 2)
+        self.assertEqual(january.weight, Decimal('101.00'))
+        self.assertEqual(january.weight_min, Decimal('100.00'))
+        self.assertEqual(january.last_reading_on, date(2022, 1, 10))
+
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.measurement_count, 4)
+        self.assertEqual(self.animal.latest_weight, Decimal('150.00'))
+
+    def test_backdated_reading_merges(self):
+        """Test archiving again merges into the existing period rollup"""
+        add_readings(self.animal, ('2022-01-03', '100.00'))
+        archive_measurements(cutoff=date(2024, 1, 1), resolution='month')
+        add_readings(self.animal, ('2022-01-20', '110.00'))
+        archive_measurements(cutoff=date(2024, 1, 1), resolution='month')
+
+        january = AnimalMeasurementArchive.objects.get()
+        self.assertEqual(january.reading_count, 2)
+        self.assertEqual(january.weight, Decimal('105.00'))
+        self.assertEqual(january.weight_max, Decimal('110.00'))
+
+    def test_summary_falls_back_to_archive(self):
+        """Test an animal with only archived history keeps its latest weight"""
+        add_readings(self.animal, ('2022-01-03', '90.00'))
+        archive_measurements(cutoff=date(2024, 1, 1), resolution='week')
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.latest_weight, Decimal('90.00'))
+        self.assertEqual(self.animal.last_measured_on, date(2022, 1, 3))
+
+    def test_animal_keeps_its_resolution(self):
+        """Test changing the resolution doesn't roll the same days up twice"""
+        other = create_animal(user=self.user, name='Other')
+        add_readings(self.animal, ('2022-01-03', '100.00'), ('2022-01-10', '102.00'))
+        archive_measurements(cutoff=date(2022, 1, 10), resolution='week')
+
+        add_readings(self.animal, ('2022-01-04', '104.00'))
+        add_readings(other, ('2022-01-03', '90.00'))
+        archived, _ = archive_measurements(cutoff=date(2024, 1, 1), resolution='month')
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(AnimalMeasurement.objects.count(), 0)
+        rows = AnimalMeasurementArchive.objects.filter(animal=self.animal).order_by('period_start')
+        self.assertEqual(
+            [(row.resolution, row.period_start, row.reading_count) for row in rows],
+            [('week', date(2022, 1, 3), 2), ('week', date(2022, 1, 10), 1)],
+        )
+        self.assertEqual(AnimalMeasurementArchive.objects.get(animal=other).resolution, 'month')
+
+    def test_command_dry_run(self):
+        """Test the dry run only reports"""
+        add_readings(self.animal, ('2000-01-03', '90.00'))
+        out = StringIO()
+        call_command('archive_measurements', '--dry-run', stdout=out)
+        self.assertIn('1 readings', out.getvalue())
+        self.assertEqual(AnimalMeasurement.objects.count(), 1)
+
+
+class ArchivedMeasurementApiTests(TestCase):
+    """Test the measurement list reads both tiers"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_list_includes_archive(self):
+        animal = create_animal(user=self.user)
+        add_readings(animal, ('2022-01-03', '100.00'), ('2024-06-01', '150.00'))
+        archive_measurements(cutoff=date(2024, 1, 1), resolution='month')
+
+        res = self.client.get(measuremnt_url(animal.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['date'] for row in res.data], ['2024-06-01', '2022-01-01'])
+        self.assertEqual(res.data[1]['resolution'], 'month')
+        self.assertEqual(res.data[1]['reading_count'], 1)
+
+        res = self.client.get(measuremnt_url(animal.id), {'tier': 'hot'})
+        self.assertEqual(len(res.data), 1)
+
+    def test_archive_rows_have_percentile(self):
+        """Test archived rows carry the percentile of their mean weight like hot rows"""
+        animal = create_animal(user=self.user)
+        add_readings(animal, ('2022-01-03', '100.00'), ('2024-06-01', '150.00'))
+        archive_measurements(cutoff=date(2024, 1, 1), resolution='month')
+        GrowthReference.objects.create(
+            species='Test Species', age_days=720, bucket_days=30, sample_count=20,
+            p5=60, p10=70, p25=80, p50=100, p75=120, p90=130, p95=140,
+        )
+
+        res = self.client.get(measuremnt_url(animal.id))
+
+        self.assertEqual([row['percentile'] for row in res.data], [None, 50.0])
@@ -0,0 +1,171 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from animal.models import Animal, AnimalMeasurement, AnimalMeasurementArchive
+from animal.series import build_series, decode_series, pack_series, unpack_series
+
+
+SERIES_JSON = 'application/vnd.vaxtrack.series+json'
+SERIES_BINARY = 'application/vnd.vaxtrack.series'
+
+def measurements_url(animal_id):
+    return reverse('animal:animalmeasurement-list', args=[animal_id])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2020-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def record_history(animal, readings):
+    start = date(2021, 1, 1)
+    AnimalMeasurement.objects.bulk_create([
+        AnimalMeasurement(
+            animal=animal, date=start + timedelta(days=i),
+            weight=Decimal(50 + i % 40) + Decimal('0.25'),
+            height=None if i % 3 else Decimal('30.50'),
+        )
+        for i in range(readings)
+    ])
+
+
+class SeriesEncodingTests(TestCase):
+    """Test the columnar encodings"""
+
+    ROWS = [
+        (date(2024, 3, 10), Decimal('12.50'), None),
+        (date(2024, 3, 3), None, Decimal('4.00')),
+        (date(2024, 1, 1), Decimal('10.25'), Decimal('3.75')),
+    ]
+
+    def test_plain_series(self):
+        """Test plain series hold day offsets and numbers"""
+        series = build_series(self.ROWS[:2], self.ROWS[2:])
+        self.assertEqual(series['epoch'], '2024-01-01')
+        self.assertEqual(series['days'], [69, 62, 0])
+        self.assertEqual(series['weight'], [12.5, None, 10.25])
+        self.assertEqual(series['archived'], 1)
+
+    def test_round_trips(self):
+        """Test every encoding decodes back to the original rows"""
+        for delta in (False, True):
+            series = build_series(self.ROWS, delta=delta)
+            self.assertEqual(decode_series(series), self.ROWS)
+            self.assertEqual(decode_series(unpack_series(pack_series(series))), self.ROWS)
+
+    def test_delta_series(self):
+        """Test delta series store differences in hundredths"""
+        series = build_series(self.ROWS, delta=True)
+        self.assertEqual(series['days'], [69, -7, -62])
+        self.assertEqual(series['weight'], [1250, None, -225])
+
+    def test_empty_series(self):
+        """Test an animal without readings encodes to empty arrays"""
+        series = build_series([])
+        self.assertEqual((series['epoch'], series['days']), (None, []))
+        self.assertEqual(decode_series(unpack_series(pack_series(series))), [])
+
+
+class SeriesApiTests(TestCase):
+    """Test series representations of the measurements endpoint"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.animal = create_animal(self.user)
+
+    def get(self, accept=None, **params):
+        headers = {'HTTP_ACCEPT': accept} if accept else {}
+        return self.client.get(measurements_url(self.animal.id), params, **headers)
+
+    def test_json_remains_default(self):
+        """Test the default representation is unchanged"""
+        record_history(self.animal, 3)
+        res = self.get()
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(res.data[0]['weight'], '52.25')
+
+    def test_series_matches_default_representation(self):
+        """Test both series formats carry the same readings as the JSON list"""
+        record_history(self.animal, 30)
+        AnimalMeasurementArchive.objects.create(
+            animal=self.animal, resolution='month', period_start='2020-06-01',
+            last_reading_on='2020-06-20', reading_count=4, weight=Decimal('40.00'), weight_count=4,
+        )
+        expected = [
+            (date.fromisoformat(row['date']), row['weight'] and Decimal(row['weight']), row['height'] and Decimal(row['height']))
+            for row in self.get().data
+        ]
+
+        series = json.loads(self.get(SERIES_JSON, delta='1').content)
+        binary = self.get(SERIES_BINARY)
+
+        self.assertEqual(binary['Content-Type'], SERIES_BINARY)
+        self.assertEqual(series['archived'], 1)
+        self.assertEqual(decode_series(series), expected)
+        self.assertEqual(decode_series(unpack_series(binary.content)), expected)
+
+    def test_format_query_parameter(self):
+        """Test the series can be requested with ?format= as well"""
+        record_history(self.animal, 2)
+        res = self.get(format='series')
+        self.assertEqual(res['Content-Type'], SERIES_JSON)
+
+    def test_errors_are_json(self):
+        """Test a forbidden series request still gets a JSON error"""
+        other = create_animal(create_user(email='other@example.com'))
+        res = self.client.get(measurements_url(other.id), HTTP_ACCEPT=SERIES_BINARY)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(res['Content-Type'], 'application/json')
+
+    def test_series_only_for_list(self):
+        """Test creating a reading cannot negotiate a series response"""
+        res = self.client.post(
+            measurements_url(self.animal.id), {'date': '2024-01-01', 'weight': '1.00'}, HTTP_ACCEPT=SERIES_BINARY
+        )
+        self.assertEqual(res.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+    def test_size(self):
+        """Test series payloads are several times smaller; benchmark_series compares latency"""
+        record_history(self.animal, 2000)
+
+        def size(accept=None, **params):
+            return len(self.get(accept, tier='hot', **params).content)
+
+        json_size = size()
+        series_size = size(SERIES_JSON)
+
+        self.assertLess(series_size * 3, json_size)
+        self.assertLess(size(SERIES_JSON, delta='1'), series_size)
+        self.assertLess(size(SERIES_BINARY) * 4, json_size)
+
+    def test_benchmark_command(self):
+        record_history(self.animal, 20)
+        token = Token.objects.create(user=self.user)
+        out = StringIO()
+
+        call_command(
+            'benchmark_series', self.animal.id, token=token.key, host='testserver', requests=3, warmup=1, stdout=out,
+        )
+
+        self.assertIn('json ', out.getvalue())
+        self.assertIn('series-bin', out.getvalue())
@@ -0,0 +1,166 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.models import Animal, AnimalMeasurement, MonthlyRollup
+
+
+def measurements_url(animal_id):
+    return reverse('animal:animalmeasurement-list', args=[animal_id])
+
+def measurement_url(animal_id, measurement_id):
+    return reverse('animal:animalmeasurement-detail', args=[animal_id, measurement_id])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2020-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+
+class MeasurementUpsertApiTests(TestCase):
+    """Test readings are upserted on the animal and day"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.animal = create_animal(self.user)
+
+    def test_retried_upload_replaces_reading(self):
+        """Test posting the same day twice keeps one row with the latest values"""
+        url = measurements_url(self.animal.id)
+        self.client.post(url, {'date': '2024-01-05', 'weight': '50.00'})
+        res = self.client.post(url, {'date': '2024-01-05', 'weight': '52.50'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['weight'], '52.50')
+        self.assertEqual(
+            list(AnimalMeasurement.objects.filter(animal=self.animal).values_list('weight', flat=True)),
+            [Decimal('52.50')],
+        )
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.measurement_count, 1)
+        self.assertEqual(self.animal.latest_weight, Decimal('52.50'))
+        rollup = MonthlyRollup.objects.get(owner=self.user, month=date(2024, 1, 1))
+        self.assertEqual((rollup.measurement_count, rollup.weight_total), (1, Decimal('52.50')))
+
+    def test_batch_upload(self):
+        """Test a list of readings is upserted, the last reading of a day winning"""
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-01-01', weight=Decimal('40.00'))
+        payload = [
+            {'date': '2024-01-01', 'weight': '41.00'},
+            {'date': '2024-01-02', 'weight': '42.00'},
+            {'date': '2024-01-02', 'weight': '42.50'},
+        ]
+
+        res = self.client.post(measurements_url(self.animal.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        rows = AnimalMeasurement.objects.filter(animal=self.animal).order_by('date')
+        self.assertEqual(
+            list(rows.values_list('date', 'weight')),
+            [(date(2024, 1, 1), Decimal('41.00')), (date(2024, 1, 2), Decimal('42.50'))],
+        )
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.measurement_count, 2)
+
+    def test_move_onto_taken_day_rejected(self):
+        """Test editing a reading's date onto another reading's day fails"""
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-01-01', weight=Decimal('40.00'))
+        second = AnimalMeasurement.objects.create(animal=self.animal, date='2024-01-02', weight=Decimal('41.00'))
+
+        res = self.client.patch(measurement_url(self.animal.id, second.id), {'date': '2024-01-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date', res.data)
+
+
+class DedupeMeasurementsTests(TransactionTestCase):
+    """Test cleaning duplicates recorded before the constraint existed"""
+
+    before_constraint = [('animal', '0015_animal_access')]
+
+    def migrate(self, targets=None):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets or executor.loader.graph.leaf_nodes())
+        return executor
+
+    def setUp(self):
+        executor = self.migrate(self.before_constraint)
+        # Rows are written with the model as it was, later columns do not exist yet
+        Measurement = executor.loader.project_state(self.before_constraint).apps.get_model('animal', 'AnimalMeasurement')
+        self.user = create_user()
+        # bulk_create skips the signals, whose tables may postdate the constraint
+        self.animal, self.other = Animal.objects.bulk_create([
+            Animal(owner=self.user, name=name, species='Test Species', breed='Test Breed', date_of_birth=date(2020, 1, 1))
+            for name in ('Test Animal', 'Other')
+        ])
+        Measurement.objects.bulk_create([
+            Measurement(animal_id=self.animal.id, date=date(2024, 1, 1), weight=Decimal('40.00')),
+            Measurement(animal_id=self.animal.id, date=date(2024, 1, 1), weight=Decimal('40.50')),
+            Measurement(animal_id=self.animal.id, date=date(2024, 1, 1), weight=Decimal('41.00')),
+            Measurement(animal_id=self.animal.id, date=date(2024, 1, 2), weight=Decimal('42.00')),
+            Measurement(animal_id=self.other.id, date=date(2024, 1, 1), weight=Decimal('30.00')),
+        ])
+
+    def tearDown(self):
+        call_command('dedupe_measurements', stdout=StringIO())
+        self.migrate()
+
+    def test_dry_run(self):
+        """Test a dry run only counts"""
+        out = StringIO()
+        call_command('dedupe_measurements', '--dry-run', stdout=out)
+
+        self.assertIn('Would remove 2 duplicate measurements of 1 animals', out.getvalue())
+        self.assertEqual(AnimalMeasurement.objects.count(), 5)
+
+    def test_keeps_latest_row_per_day(self):
+        """Test the most recently written reading of each day survives, in small batches"""
+        out = StringIO()
+        call_command('dedupe_measurements', '--batch-size', '1', stdout=out)
+
+        self.assertIn('Removed 2 duplicate measurements of 1 animals', out.getvalue())
+        self.assertEqual(
+            sorted(AnimalMeasurement.objects.values_list('animal_id', 'date', 'weight')),
+            [
+                (self.animal.id, date(2024, 1, 1), Decimal('41.00')),
+                (self.animal.id, date(2024, 1, 2), Decimal('42.00')),
+                (self.other.id, date(2024, 1, 1), Decimal('30.00')),
+            ],
+        )
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.measurement_count, 2)
+
+    def test_migration_waits_for_dedupe(self):
+        """Test the constraint is only added once the command removed the duplicates"""
+        with self.assertRaisesMessage(CommandError, 'dedupe_measurements'):
+            self.migrate()
+        self.assertEqual(AnimalMeasurement.objects.count(), 5)
+
+        call_command('dedupe_measurements', stdout=StringIO())
+        self.migrate()
+
+        self.assertEqual(AnimalMeasurement.objects.count(), 3)
+        self.assertEqual(
+            AnimalMeasurement.objects.get(animal=self.animal, date=date(2024, 1, 1)).weight, Decimal('41.00'),
+        )
@@ -0,0 +1,180 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.models import Animal, AnimalMeasurement, MonthlyRollup, Vaccination
+from animal.retention import archive_measurements
+from animal.rollups import rebuild_rollups
+
+
+REPORT_URL = reverse('animal:monthly-report')
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Dog',
+            'breed': 'Test Breed',
+            'date_of_birth': '2024-01-15'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def rollup(owner, species, month):
+    return MonthlyRollup.objects.filter(owner=owner, species=species, month=month).first()
+
+def snapshot():
+    return sorted(MonthlyRollup.objects.values_list(
+        'owner_id', 'species', 'month', 'measurement_count', 'weight_total',
+        'weight_count', 'vaccination_count', 'animals_born',
+    ))
+
+
+class MonthlyRollupMaintenanceTests(TestCase):
+    """Test rollups follow writes to their source tables"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.animal = create_animal(self.user)
+
+    def test_animal_counts_towards_birth_month(self):
+        """Test a new animal is counted in the month it was born"""
+        self.assertEqual(rollup(self.user, 'Dog', date(2024, 1, 1)).animals_born, 1)
+
+    def test_measurements_are_totalled(self):
+        """Test measurement counts and weight totals follow creates, edits and deletes"""
+        first = AnimalMeasurement.objects.create(animal=self.animal, date='2024-03-02', weight=Decimal('10.5'))
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-03-20', height=Decimal('4'))
+        march = rollup(self.user, 'Dog', date(2024, 3, 1))
+        self.assertEqual((march.measurement_count, march.weight_total, march.weight_count), (2, Decimal('10.5'), 1))
+
+        first.date = date(2024, 4, 1)
+        first.save()
+        self.assertEqual(rollup(self.user, 'Dog', date(2024, 3, 1)).measurement_count, 1)
+        self.assertEqual(rollup(self.user, 'Dog', date(2024, 4, 1)).weight_total, Decimal('10.5'))
+
+        first.delete()
+        self.assertIsNone(rollup(self.user, 'Dog', date(2024, 4, 1)))
+
+    def test_vaccinations_are_counted(self):
+        """Test vaccinations count towards the month they were given"""
+        Vaccination.objects.create(animal=self.animal, vaccine_name='Rabies', date_administered='2024-05-03')
+        march = rollup(self.user, 'Dog', date(2024, 5, 1))
+        self.assertEqual((march.vaccination_count, march.measurement_count), (1, 0))
+
+    def test_species_change_moves_history(self):
+        """Test changing an animal's species moves all of its buckets"""
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-03-02', weight=10)
+        self.animal.species = 'Cat'
+        self.animal.save()
+
+        self.assertFalse(MonthlyRollup.objects.filter(species='Dog').exists())
+        self.assertEqual(rollup(self.user, 'Cat', date(2024, 3, 1)).measurement_count, 1)
+        self.assertEqual(rollup(self.user, 'Cat', date(2024, 1, 1)).animals_born, 1)
+
+    def test_animal_delete_removes_contributions(self):
+        """Test deleting an animal drops everything it contributed"""
+        AnimalMeasurement.objects.create(animal=self.animal, date='2024-03-02', weight=10)
+        Vaccination.objects.create(animal=self.animal, vaccine_name='Rabies', date_administered='2024-03-03')
+        self.animal.delete()
+        self.assertFalse(MonthlyRollup.objects.exists())
+
+    def test_incremental_matches_rebuild(self):
+        """Test incrementally maintained rollups equal a full rebuild"""
+        other = create_animal(self.user, species='Cat', date_of_birth='2024-02-01')
+        for day, weight in (('2024-03-02', 10), ('2024-03-09', 12), ('2024-04-01', 13)):
+            AnimalMeasurement.objects.create(animal=self.animal, date=day, weight=weight)
+            AnimalMeasurement.objects.create(animal=other, date=day, weight=weight + 1)
+        Vaccination.objects.create(animal=other, vaccine_name='Flu', date_administered='2024-03-05')
+        AnimalMeasurement.objects.filter(animal=other).first().delete()
+        incremental = snapshot()
+
+        rebuild_rollups()
+
+        self.assertEqual(snapshot(), incremental)
+
+    def test_archiving_keeps_totals(self):
+        """Test moving readings to the archive tier leaves the rollups unchanged"""
+        for day, weight in (('2024-03-02', '10.00'), ('2024-03-09', '12.00')):
+            AnimalMeasurement.objects.create(animal=self.animal, date=day, weight=Decimal(weight))
+        before = snapshot()
+
+        archive_measurements(cutoff=date(2024, 6, 1), resolution='month')
+
+        self.assertFalse(AnimalMeasurement.objects.exists())
+        self.assertEqual(snapshot(), before)
+
+    def test_rebuild_command(self):
+        """Test the rebuild command restores deleted rollups"""
+        MonthlyRollup.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertIn('Wrote 1 monthly rollups', out.getvalue())
+        self.assertEqual(rollup(self.user, 'Dog', date(2024, 1, 1)).animals_born, 1)
+
+
+class MonthlyReportApiTests(TestCase):
+    """Test the monthly report endpoint"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_auth_required(self):
+        """Test the report requires authentication"""
+        res = APIClient().get(REPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_report(self):
+        """Test averages and herd growth per species and month"""
+        first = create_animal(self.user)
+        create_animal(self.user, date_of_birth='2024-03-10')
+        AnimalMeasurement.objects.create(animal=first, date='2024-03-02', weight=10)
+        AnimalMeasurement.objects.create(animal=first, date='2024-03-09', weight=13)
+        create_animal(create_user(email='other@example.com'))
+
+        res = self.client.get(REPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([(r['month'], r['herd_size']) for r in res.data], [('2024-01-01', 1), ('2024-03-01', 2)])
+        self.assertEqual(res.data[1]['average_weight'], '11.50')
+        self.assertEqual(res.data[1]['measurements'], 2)
+
+    def test_report_since(self):
+        """Test herd size counts animals born before the reported range"""
+        create_animal(self.user)
+        create_animal(self.user, date_of_birth='2024-03-10')
+
+        res = self.client.get(REPORT_URL, {'since': '2024-02'})
+
+        self.assertEqual([(r['month'], r['herd_size']) for r in res.data], [('2024-03-01', 2)])
+
+    def test_report_invalid_month(self):
+        """Test malformed months are rejected"""
+        res = self.client.get(REPORT_URL, {'since': 'March'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_report_reads_rollups_only(self):
+        """Test the report does not query the source tables"""
+        animal = create_animal(self.user)
+        AnimalMeasurement.objects.create(animal=animal, date='2024-03-02', weight=10)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(REPORT_URL)
+
+        tables = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('animal_animalmeasurement', tables)
+        self.assertNotIn('animal_vaccination', tables)
@@ -0,0 +1,148 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.models import AccessGrant, Animal, MonthlyRollup, Vaccination
+
+
+EVENTS_URL = reverse('animal:vaccination-event')
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2020-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+
+class PublicVaccinationEventApiTests(TestCase):
+    """Test the unauthenticated vaccination event"""
+
+    def test_auth_required(self):
+        res = APIClient().post(EVENTS_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateVaccinationEventApiTests(TestCase):
+    """Test vaccinating many animals at once"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.cows = [create_animal(self.user, name=f'Cow {i}', species='Cow', breed='Jersey') for i in range(3)]
+        self.goat = create_animal(self.user, name='Goat', species='Goat', breed='Boer')
+
+    def test_vaccinate_species(self):
+        """Test a species selector vaccinates each matching animal once"""
+        payload = {'vaccine_name': 'Rabies', 'date_administered': '2024-03-01', 'species': 'cow'}
+
+        res = self.client.post(EVENTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['vaccinated'], [cow.id for cow in self.cows])
+        self.assertEqual(
+            sorted(Vaccination.objects.filter(vaccine_name='Rabies').values_list('animal_id', flat=True)),
+            [cow.id for cow in self.cows],
+        )
+        self.cows[0].refresh_from_db()
+        self.assertEqual(self.cows[0].vaccination_count, 1)
+        rollup = MonthlyRollup.objects.get(owner=self.user, species='Cow', month=date(2024, 3, 1))
+        self.assertEqual(rollup.vaccination_count, 3)
+
+    def test_vaccinate_all(self):
+        """Test all=true selects the whole herd"""
+        payload = {'vaccine_name': 'Tetanus', 'date_administered': '2024-03-01', 'all': True}
+
+        res = self.client.post(EVENTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Vaccination.objects.count(), 4)
+
+    def test_selector_required(self):
+        """Test an event without a selector is rejected"""
+        res = self.client.post(EVENTS_URL, {'vaccine_name': 'Rabies', 'date_administered': '2024-03-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Vaccination.objects.exists())
+
+    @override_settings(VACCINE_INTERVALS={'Rabies': 365})
+    def test_next_due_from_interval(self):
+        """Test next_due_date comes from the configured interval or the request"""
+        payload = {'vaccine_name': 'rabies', 'date_administered': '2024-03-01', 'animal_ids': [self.goat.id]}
+        res = self.client.post(EVENTS_URL, payload, format='json')
+        self.assertEqual(res.data['next_due_date'], '2025-03-01')
+
+        payload['interval_days'] = 30
+        res = self.client.post(EVENTS_URL, payload, format='json')
+        self.assertEqual(res.data['next_due_date'], '2024-03-31')
+        self.goat.refresh_from_db()
+        self.assertEqual(self.goat.next_vaccination_due, date(2024, 3, 31))
+
+    def test_foreign_animal_forbidden(self):
+        """Test one animal the user cannot write rejects the whole event"""
+        other = create_animal(create_user('other@example.com'))
+        payload = {
+            'vaccine_name': 'Rabies', 'date_administered': '2024-03-01',
+            'animal_ids': [self.goat.id, other.id],
+        }
+
+        res = self.client.post(EVENTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Vaccination.objects.exists())
+
+    def test_ids_narrowed_by_species(self):
+        """Test owned ids outside the species are skipped, foreign ones still refused"""
+        payload = {
+            'vaccine_name': 'Rabies', 'date_administered': '2024-03-01',
+            'animal_ids': [self.cows[0].id, self.goat.id], 'species': 'cow',
+        }
+
+        res = self.client.post(EVENTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['vaccinated'], [self.cows[0].id])
+
+        payload['animal_ids'].append(create_animal(create_user('other@example.com'), species='Cow').id)
+        res = self.client.post(EVENTS_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_write_grant_allows_event(self):
+        """Test a vet with a write grant vaccinates the owner's herd"""
+        vet = create_user('vet@example.com')
+        AccessGrant.objects.create(owner=self.user, grantee=vet, level=AccessGrant.WRITE)
+        self.client.force_authenticate(vet)
+
+        res = self.client.post(EVENTS_URL, {'vaccine_name': 'Rabies', 'date_administered': '2024-03-01', 'breed': 'boer'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['vaccinated'], [self.goat.id])
+
+    def test_one_insert_for_the_herd(self):
+        """Test the doses are authorized in one query and written in one statement"""
+        herd = [create_animal(self.user, name=f'Sheep {i}', species='Sheep') for i in range(40)]
+        payload = {'vaccine_name': 'Rabies', 'date_administered': '2024-03-01', 'species': 'Sheep'}
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(EVENTS_URL, payload, format='json')
+
+        self.assertEqual(len(res.data['vaccinated']), len(herd))
+        inserts = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "animal_vaccination"')]
+        self.assertEqual(len(inserts), 1)
+        lookups = [q['sql'] for q in queries.captured_queries if 'animal_animalaccess' in q['sql']]
+        self.assertEqual(len(lookups), 1)
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from animal.models import Animal, Vaccination, VaccinationReminder
+from animal.reminders import queue_reminders, send_reminders
+
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2024-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def days_from_today(days):
+    return timezone.localdate() + timedelta(days=days)
+
+def vaccinate(animal, name, due_in, given_ago=300):
+    return Vaccination.objects.create(
+        animal=animal, vaccine_name=name,
+        date_administered=days_from_today(-given_ago), next_due_date=days_from_today(due_in)
+    )
+
+
+class VaccinationReminderTests(TestCase):
+    """Test queueing and sending vaccination reminders"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.animal = create_animal(user=self.user, name='Daisy')
+
+    def test_queue_due_and_overdue(self):
+        """Test doses due soon or overdue are queued, later ones are not"""
+        vaccinate(self.animal, 'Rabies', due_in=-3)
+        vaccinate(self.animal, 'Tetanus', due_in=5)
+        vaccinate(self.animal, 'Flu', due_in=90)
+
+        queue_reminders(lead_days=14, chunk_size=1)
+
+        kinds = dict(VaccinationReminder.objects.values_list('vaccination__vaccine_name', 'kind'))
+        self.assertEqual(kinds, {'Rabies': 'overdue', 'Tetanus': 'due'})
+
+    def test_queue_is_deduplicated(self):
+        """Test running the job twice does not duplicate reminders"""
+        vaccinate(self.animal, 'Rabies', due_in=-3)
+        queue_reminders(lead_days=14)
+        queue_reminders(lead_days=14)
+        self.assertEqual(VaccinationReminder.objects.count(), 1)
+
+    def test_superseded_dose_not_reminded(self):
+        """Test a dose replaced by a booster is not reminded"""
+        vaccinate(self.animal, 'Rabies', due_in=-3, given_ago=400)
+        vaccinate(self.animal, 'Rabies', due_in=330, given_ago=30)
+        queue_reminders(lead_days=14)
+        self.assertFalse(VaccinationReminder.objects.exists())
+
+    def test_send_one_email_per_owner(self):
+        """Test reminders are grouped per owner and marked sent"""
+        vaccinate(self.animal, 'Rabies', due_in=-3)
+        vaccinate(create_animal(user=self.user, name='Bella'), 'Tetanus', due_in=2)
+        other = create_user(email='other@example.com')
+        vaccinate(create_animal(user=other, name='Rex'), 'Rabies', due_in=1)
+        queue_reminders(lead_days=14)
+
+        sent = send_reminders(batch_size=1)
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(len(mail.outbox), 2)
+        message = next(m for m in mail.outbox if m.to == ['test@example.com'])
+        self.assertIn('Daisy: Rabies was due', message.body)
+        self.assertIn('Bella: Tetanus is due', message.body)
+        self.assertFalse(VaccinationReminder.objects.filter(sent_at__isnull=True).exists())
+
+        self.assertEqual(send_reminders(), 0)
+
+    def test_handled_dose_not_sent(self):
+        """Test a reminder is dropped when the booster is recorded or the dose rescheduled before sending"""
+        vaccinate(self.animal, 'Rabies', due_in=-3, given_ago=400)
+        tetanus = vaccinate(self.animal, 'Tetanus', due_in=2)
+        vaccinate(self.animal, 'Flu', due_in=5)
+        queue_reminders(lead_days=14)
+
+        vaccinate(self.animal, 'Rabies', due_in=330, given_ago=0)
+        tetanus.next_due_date = days_from_today(60)
+        tetanus.save()
+        send_reminders()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertNotIn('Rabies', mail.outbox[0].body)
+        self.assertNotIn('Tetanus', mail.outbox[0].body)
+        self.assertIn('Flu', mail.outbox[0].body)
+        self.assertEqual(
+            list(VaccinationReminder.objects.values_list('vaccination__vaccine_name', flat=True)), ['Flu']
+        )
+
+    def test_commands(self):
+        vaccinate(self.animal, 'Rabies', due_in=-3)
+        call_command('queue_vaccination_reminders', stdout=StringIO())
+        call_command('send_vaccination_reminders', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,189 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.models import Animal, Vaccination, VocabularyTerm
+from animal.vocabulary import PrefixIndex, rebuild_vocabulary
+
+
+BULK_UPDATE_URL = reverse('animal:bulk-update', args=['vaccinations'])
+BULK_DELETE_URL = reverse('animal:bulk-delete', args=['vaccinations'])
+EVENTS_URL = reverse('animal:vaccination-event')
+
+def vocabulary_url(field):
+    return reverse('animal:vocabulary', args=[field])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2020-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def create_vaccination(animal, vaccine_name, date_administered='2024-01-01'):
+    return Vaccination.objects.create(animal=animal, vaccine_name=vaccine_name, date_administered=date_administered)
+
+def counts(owner, field):
+    return dict(VocabularyTerm.objects.filter(owner=owner, field=field).values_list('value', 'count'))
+
+
+class PrefixIndexTests(TestCase):
+    """Test prefix lookups"""
+
+    def test_prefix_ranked_by_count(self):
+        index = PrefixIndex([('Rabies', 3), ('Rotavirus', 5), ('rabbit fever', 1), ('Tetanus', 9)])
+
+        self.assertEqual(index.search('ra', 10), [('Rabies', 3), ('rabbit fever', 1)])
+        self.assertEqual(index.search('R', 2), [('Rotavirus', 5), ('Rabies', 3)])
+        self.assertEqual(index.search('', 1), [('Tetanus', 9)])
+        self.assertEqual(index.search('x', 10), [])
+
+
+class PublicVocabularyApiTests(TestCase):
+    """Test the unauthenticated vocabulary"""
+
+    def test_auth_required(self):
+        res = APIClient().get(vocabulary_url('species'))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateVocabularyApiTests(TestCase):
+    """Test autocomplete suggestions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cow = create_animal(self.user, name='Daisy', species='Cow', breed='Jersey')
+            self.calf = create_animal(self.user, name='Bella', species='Cow', breed='Holstein')
+            self.goat = create_animal(self.user, name='Billy', species='Goat', breed='Boer')
+            for animal in (self.cow, self.calf, self.goat):
+                create_vaccination(animal, 'Rabies')
+            create_vaccination(self.cow, 'Rotavirus')
+
+    def get(self, field, **params):
+        return self.client.get(vocabulary_url(field), params)
+
+    def test_owner_values_ranked(self):
+        """Test the user's values come most used first with their counts"""
+        res = self.get('species')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'value': 'Cow', 'count': 2}, {'value': 'Goat', 'count': 1}])
+
+    def test_prefix_match(self):
+        """Test q matches the start of values case-insensitively"""
+        res = self.get('vaccine_name', q='ro')
+
+        self.assertEqual(res.data, [{'value': 'Rotavirus', 'count': 1}])
+
+    def test_limit(self):
+        res = self.get('vaccine_name', limit=1)
+
+        self.assertEqual(res.data, [{'value': 'Rabies', 'count': 3}])
+
+    def test_unknown_field(self):
+        self.assertEqual(self.get('name').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.get('species', scope='everyone').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_owners_hidden(self):
+        """Test another owner's values stay out of the user's vocabulary"""
+        with self.captureOnCommitCallbacks(execute=True):
+            create_animal(create_user('other@example.com'), species='Llama')
+
+        self.assertNotIn('Llama', [entry['value'] for entry in self.get('species').data])
+
+    @override_settings(VOCABULARY={'GLOBAL_MIN_OWNERS': 2})
+    def test_global_scope(self):
+        """Test the global vocabulary sums owners and only shows values enough of them use"""
+        with self.captureOnCommitCallbacks(execute=True):
+            other = create_user('other@example.com')
+            create_animal(other, species='Cow')
+            create_animal(other, species='Llama')
+
+        res = self.get('species', scope='global')
+
+        self.assertEqual(res.data, [{'value': 'Cow', 'count': 3}])
+
+    def test_write_invalidates_index(self):
+        """Test a suggestion reflects writes made after it was cached"""
+        self.assertEqual(self.get('vaccine_name', q='te').data, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vaccination = create_vaccination(self.goat, 'Tetanus')
+        self.assertEqual(self.get('vaccine_name', q='te').data, [{'value': 'Tetanus', 'count': 1}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vaccination.vaccine_name = 'Rabies'
+            vaccination.save()
+        self.assertEqual(self.get('vaccine_name', q='te').data, [])
+        self.assertEqual(counts(self.user, VocabularyTerm.VACCINE_NAME), {'Rabies': 4, 'Rotavirus': 1})
+
+    def test_animal_edit_and_delete(self):
+        """Test editing and deleting animals moves their species and breeds"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.goat.species = 'Sheep'
+            self.goat.save()
+        self.assertEqual(counts(self.user, VocabularyTerm.SPECIES), {'Cow': 2, 'Sheep': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('animal:animal-detail', args=[self.cow.id]))
+        self.assertEqual(counts(self.user, VocabularyTerm.SPECIES), {'Cow': 1, 'Sheep': 1})
+        self.assertEqual(counts(self.user, VocabularyTerm.VACCINE_NAME), {'Rabies': 2})
+
+    def test_bulk_writes_recount(self):
+        """Test bulk update and delete, which skip signals, keep the counts in step"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                BULK_UPDATE_URL, {'animal_ids': [self.cow.id], 'values': {'vaccine_name': 'Anthrax'}}, format='json',
+            )
+        self.assertEqual(counts(self.user, VocabularyTerm.VACCINE_NAME), {'Anthrax': 2, 'Rabies': 2})
+        self.assertEqual(self.get('vaccine_name', q='an').data, [{'value': 'Anthrax', 'count': 2}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(BULK_DELETE_URL, {'animal_ids': [self.calf.id, self.goat.id]}, format='json')
+        self.assertEqual(counts(self.user, VocabularyTerm.VACCINE_NAME), {'Anthrax': 2})
+
+    def test_vaccination_event_recounts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(EVENTS_URL, {'vaccine_name': 'Anthrax', 'date_administered': '2024-03-01', 'all': True})
+
+        self.assertEqual(self.get('vaccine_name', q='an').data, [{'value': 'Anthrax', 'count': 3}])
+
+    def test_rebuild_invalidates_emptied_vocabularies(self):
+        """Test a rebuild drops the cached suggestions of owners left without any term"""
+        other = create_user('other@example.com')
+        VocabularyTerm.objects.create(owner=other, field=VocabularyTerm.SPECIES, value='Ghost', count=1)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.get('species').data, [{'value': 'Ghost', 'count': 1}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_vocabulary()
+
+        self.assertEqual(self.get('species').data, [])
+
+    def test_rebuild_command(self):
+        """Test the command restores counts lost or never recorded"""
+        VocabularyTerm.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_vocabulary', stdout=out)
+
+        self.assertIn('Wrote 7 vocabulary terms', out.getvalue())
+
+        self.assertEqual(counts(self.user, VocabularyTerm.VACCINE_NAME), {'Rabies': 3, 'Rotavirus': 1})
+        self.assertEqual(counts(self.user, VocabularyTerm.BREED), {'Jersey': 1, 'Holstein': 1, 'Boer': 1})
@@ -0,0 +1,182 @@
+from datetime import date, timedelta
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from animal.anomalies import robust_zscores, rolling_rate, run_detection
+from animal.bulk import BULK_RESOURCES, bulk_delete, bulk_update
+from animal.models import Animal, AnimalMeasurement, AnomalyRescan, WeightAnomaly
+
+
+def anomalies_url(animal_id):
+    return reverse('animal:weightanomaly-list', args=[animal_id])
+
+def create_user(email='test@example.com', password='test123456'):
+    return get_user_model().objects.create_user(email, password)
+
+def create_animal(user, **params):
+    """"Creates and returns an animal"""
+    defaults = {
+            'name': 'Test Animal',
+            'species': 'Test Species',
+            'breed': 'Test Breed',
+            'date_of_birth': '2024-01-01'
+        }
+    defaults.update(params)
+    animal = Animal.objects.create(owner=user, **defaults)
+    return animal
+
+def record_weights(animal, weights, start=date(2025, 1, 1)):
+    AnimalMeasurement.objects.bulk_create([
+        AnimalMeasurement(animal=animal, date=start + timedelta(weeks=i), weight=weight)
+        for i, weight in enumerate(weights)
+    ])
+
+NOISE = [0, 0.4, -0.3, 0.2, -0.1]
+STEADY = [100 + i + NOISE[i % 5] for i in range(20)]
+SUDDEN_LOSS = STEADY[:16] + [80, 81, 82, 83]
+
+
+class AnomalyMathTests(TestCase):
+    """Test the vectorized statistics"""
+
+    def test_rolling_rate_stays_within_each_animal(self):
+        """Test rates are per day and never compare readings of different animals"""
+        animal = np.array([1, 1, 1, 2, 2])
+        day = np.array([0, 7, 14, 0, 7])
+        weight = np.array([10.0, 17.0, 31.0, 50.0, 43.0])
+
+        rate = rolling_rate(animal, day, weight, window=1)
+
+        self.assertTrue(np.isnan(rate[0]))
+        self.assertTrue(np.isnan(rate[3]))
+        np.testing.assert_allclose(rate[[1, 2, 4]], [1.0, 2.0, -1.0])
+
+    def test_robust_zscores_per_group(self):
+        """Test scores use each group's own median and MAD"""
+        group = np.array([1] * 6 + [2] * 6)
+        values = np.array([1, 2, 3, 4, 5, -20, 10, 20, 30, 40, 50, 60], dtype=float)
+
+        scores = robust_zscores(group, values)
+
+        self.assertLess(scores[5], -3.5)
+        self.assertTrue(np.all(np.abs(scores[6:]) < 2))
+
+    def test_robust_zscores_need_enough_rates(self):
+        """Test groups with too few rates are left unscored"""
+        scores = robust_zscores(np.array([1, 1, 1]), np.array([1.0, 2.0, -50.0]))
+        self.assertTrue(np.isnan(scores).all())
+
+
+class WeightAnomalyDetectionTests(TestCase):
+    """Test the anomaly detection job"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+
+    def test_flags_sudden_loss_only(self):
+        """Test a sharp drop is flagged and a steady series is not"""
+        steady = create_animal(self.user, name='Steady')
+        dropping = create_animal(self.user, name='Dropping')
+        record_weights(steady, STEADY)
+        record_weights(dropping, SUDDEN_LOSS)
+
+        scanned, flagged = run_detection()
+
+        self.assertEqual(scanned, 2)
+        self.assertGreater(flagged, 0)
+        self.assertFalse(WeightAnomaly.objects.filter(animal=steady).exists())
+        first = WeightAnomaly.objects.filter(animal=dropping).order_by('date').first()
+        self.assertEqual(first.date, date(2025, 1, 1) + timedelta(weeks=16))
+        self.assertLess(first.rate_of_change, 0)
+
+    def test_only_animals_with_new_readings_are_rescanned(self):
+        """Test the checkpoint limits later runs to animals with new readings"""
+        first = create_animal(self.user, name='First')
+        second = create_animal(self.user, name='Second')
+        record_weights(first, SUDDEN_LOSS)
+        record_weights(second, STEADY)
+        run_detection()
+
+        self.assertEqual(run_detection(), (0, 0))
+
+        AnimalMeasurement.objects.create(animal=second, date=date(2025, 6, 1), weight=111)
+        scanned, _ = run_detection()
+        self.assertEqual(scanned, 1)
+        self.assertTrue(WeightAnomaly.objects.filter(animal=first).exists())
+
+    def test_edited_readings_are_rescanned(self):
+        """Test readings changed in place, one by one or in bulk, are scanned again"""
+        animal = create_animal(self.user)
+        record_weights(animal, STEADY)
+        run_detection()
+
+        reading = AnimalMeasurement.objects.get(animal=animal, date=date(2025, 1, 1) + timedelta(weeks=16))
+        reading.weight = 80
+        reading.save()
+        self.assertEqual(run_detection()[0], 1)
+        self.assertTrue(WeightAnomaly.objects.filter(animal=animal).exists())
+
+        resource = BULK_RESOURCES['measurements']
+        bulk_update(AnimalMeasurement.objects.filter(id=reading.id), resource, offsets={'weight': 36})
+        self.assertEqual(run_detection()[0], 1)
+        self.assertFalse(WeightAnomaly.objects.filter(animal=animal).exists())
+
+    def test_deleted_readings_are_rescanned(self):
+        """Test deleting readings, one by one or in bulk, drops their flags and rescans the animal"""
+        animal = create_animal(self.user)
+        create_animal(self.user, name='Other')
+        record_weights(animal, SUDDEN_LOSS)
+        run_detection()
+        drop = date(2025, 1, 1) + timedelta(weeks=16)
+        self.assertTrue(WeightAnomaly.objects.filter(animal=animal, date=drop).exists())
+
+        AnimalMeasurement.objects.get(animal=animal, date=drop).delete()
+        self.assertFalse(WeightAnomaly.objects.filter(animal=animal, date=drop).exists())
+        self.assertEqual(run_detection()[0], 1)
+        self.assertFalse(AnomalyRescan.objects.exists())
+
+        resource = BULK_RESOURCES['measurements']
+        bulk_delete(AnimalMeasurement.objects.filter(animal=animal, date__gt=drop), resource)
+        self.assertFalse(WeightAnomaly.objects.filter(animal=animal).exists())
+        self.assertEqual(run_detection()[0], 1)
+        self.assertEqual(run_detection()[0], 0)
+
+    def test_command(self):
+        """Test the management command reports its work"""
+        record_weights(create_animal(self.user), SUDDEN_LOSS)
+        out = StringIO()
+        call_command('detect_weight_anomalies', '--full', stdout=out)
+        self.assertIn('Scanned 1 animals', out.getvalue())
+
+
+class WeightAnomalyApiTests(TestCase):
+    """Test the anomalies endpoint"""
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.animal = create_animal(self.user)
+
+    def test_list_anomalies(self):
+        """Test flagged readings are listed for the owner"""
+        record_weights(self.animal, SUDDEN_LOSS)
+        run_detection()
+
+        res = self.client.get(anomalies_url(self.animal.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), WeightAnomaly.objects.count())
+        self.assertEqual(set(res.data[0]), {'date', 'weight', 'rate_of_change', 'zscore', 'detected_at'})
+
+    def test_other_owner_is_forbidden(self):
+        """Test anomalies of another user's animal are not visible"""
+        other = create_animal(create_user(email='other@example.com'))
+        res = self.client.get(anomalies_url(other.id))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,95 @@
+"""
+Chronological timeline of an animal's measurements, vaccinations and details
+
+Each history table is read newest first along its (animal, date) index in
+small keyset chunks, and heapq.merge interleaves the streams lazily.
+Measurements that aged out into the archive tier appear as one
+'archived_measurement' entry per week or month, dated by its period start.
+A page stops pulling as soon as it has page_size + 1 entries, so no table
+is read much beyond what the page shows. The cursor is the (date, stream,
+id) position of the last entry.
+"""
+
+import base64
+import heapq
+import json
+from datetime import date
+
+from django.db.models import Q
+
+from .models import AnimalDetail, AnimalMeasurement, AnimalMeasurementArchive, Vaccination
+
+
+# (entry type, model, date field); the position in this tuple breaks date ties
+# and is part of the cursor, so new streams go at the end
+STREAMS = (
+    ('measurement', AnimalMeasurement, 'date'),
+    ('vaccination', Vaccination, 'date_administered'),
+    ('detail', AnimalDetail, 'date_recorded'),
+    ('archived_measurement', AnimalMeasurementArchive, 'period_start'),
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position):
+    day, rank, pk = position
+    raw = json.dumps([day.isoformat(), rank, pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        day, rank, pk = json.loads(raw)
+        return date.fromisoformat(day), int(rank), int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor.')
+
+
+def _after(rank, date_field, position):
+    """Rows of stream rank that sort after position in (date, rank, id) descending order"""
+    day, cursor_rank, pk = position
+    earlier = Q(**{f'{date_field}__lt': day})
+    if rank < cursor_rank:
+        return earlier | Q(**{date_field: day})
+    if rank == cursor_rank:
+        return earlier | Q(**{date_field: day, 'id__lt': pk})
+    return earlier
+
+
+def _stream(animal_id, rank, model, date_field, position, chunk_size):
+    """Yield ((date, rank, id), row) newest first, fetching chunk_size rows at a time"""
+    rows = model.objects.filter(animal_id=animal_id).order_by(f'-{date_field}', '-id')
+    while True:
+        chunk = rows.filter(_after(rank, date_field, position)) if position else rows
+        chunk = list(chunk[:chunk_size])
+        for row in chunk:
+            position = (getattr(row, date_field), rank, row.id)
+            yield position, row
+        if len(chunk) < chunk_size:
+            return
+
+
+def timeline_page(animal_id, page_size, cursor=None):
+    """Entries of one page and the cursor of the next (None on the last page)
+
+    Entries are (type, row) pairs.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    chunk_size = max(1, -(-(page_size + 1) // len(STREAMS)))
+    streams = [
+        _stream(animal_id, rank, model, date_field, position, chunk_size)
+        for rank, (_, model, date_field) in enumerate(STREAMS)
+    ]
+    merged = heapq.merge(*streams, key=lambda entry: entry[0], reverse=True)
+
+    page = []
+    for position, row in merged:
+        if len(page) == page_size:
+            return page, encode_cursor(last)
+        page.append((STREAMS[position[1]][0], row))
+        last = position
+    return page, None
@@ -4,15 +4,26 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'animals', views.AnimalViewSet)
+router.register(r'attribute-keys', views.AttributeKeyViewSet)
+router.register(r'access-grants', views.AccessGrantViewSet)
 
 
 sub_router = DefaultRouter()
 sub_router.register(r'vaccinations', views.VaccinationViewSet)
 sub_router.register(r'measurements', views.AnimalMeasurementViewSet)
 sub_router.register(r'details', views.AnimalDetailViewSet)
+sub_router.register(r'anomalies', views.WeightAnomalyViewSet)
+sub_router.register(r'attributes', views.AnimalAttributeViewSet)
 app_name = 'animal'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('reports/monthly/', views.MonthlyReportView.as_view(), name='monthly-report'),
+    path('bulk/<str:resource>/update/', views.BulkUpdateView.as_view(), name='bulk-update'),
+    path('bulk/<str:resource>/delete/', views.BulkDeleteView.as_view(), name='bulk-delete'),
+    path('vaccination-events/', views.VaccinationEventView.as_view(), name='vaccination-event'),
+    path('vocabularies/<str:field>/', views.VocabularyView.as_view(), name='vocabulary'),
+    path('<int:animal_id>/timeline/', views.AnimalTimelineView.as_view(), name='timeline'),
     path('<int:animal_id>/', include(sub_router.urls))
 ]
@@ -1,102 +1,407 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, generics, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
-from .models import Animal, AnimalMeasurement, Vaccination, AnimalDetail
-from .serializers import AnimalSerializer, AnimalMeasurementSerializer, VaccinationSerializer, AnimalDetailSerializer
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.utils.urls import replace_query_param
+from .models import AccessGrant, Animal, VocabularyTerm, AnimalMeasurement, AnimalMeasurementArchive, Vaccination, AnimalDetail, WeightAnomaly, AttributeKey, AnimalAttribute
+from .serializers import AccessGrantSerializer, AnimalSerializer, AnimalMeasurementSerializer, AnimalMeasurementArchiveSerializer, VaccinationSerializer, AnimalDetailSerializer, AnimalSummarySerializer, DashboardSerializer, WeightAnomalySerializer, MonthlyReportQuerySerializer, MonthlyReportSerializer, BulkFilterSerializer, BulkUpdateSerializer, AttributeKeySerializer, AnimalAttributeSerializer, TimelinePageSerializer, VaccinationEventSerializer, VocabularyQuerySerializer, VocabularyEntrySerializer
+from .dashboard import build_dashboard
+from .growth import GrowthCurve
+from .rollups import monthly_report
+from .bulk import BULK_RESOURCES, OffsetOutOfRange, bulk_delete, bulk_queryset, bulk_update
+from .deletion import delete_animal
+from .attributes import filter_by_attributes
+from .renderers import SERIES_FORMATS, SERIES_RENDERERS
+from .series import build_series
+from .access import has_access
+from .dedup import upsert_measurements
+from .events import next_due, record_vaccination_event, select_animals
+from .timeline import STREAMS, InvalidCursor, timeline_page
+from .vocabulary import suggestions
+from core.throttling import UserRateThrottle
 from django.core.exceptions import PermissionDenied
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 
+class AnimalAccessMixin:
+    """Animal of a nested route, checked against the user's access; writes need a write grant"""
+
+    def get_animal(self):
+        if getattr(self, '_animal', None) is None:
+            user = self.request.user
+            if user.is_authenticated:
+                animal = get_object_or_404(Animal.objects.active(), id = self.kwargs['animal_id'])
+                if has_access(user, animal, write=self.request.method not in SAFE_METHODS):
+                    self._animal = animal
+                else:
+                    raise PermissionDenied('You are not allowed to access this animal.')
+            else:
+                raise PermissionDenied("You must be logged in to utilize this feature.")
+        return self._animal
+
+
 class AnimalViewSet(viewsets.ModelViewSet):
     queryset = Animal.objects.all()
     serializer_class = AnimalSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
 
     def get_queryset(self):
         user = self.request.user
-        return self.queryset.filter(owner=user.id).order_by('name')
+        animals = self.queryset.active().accessible_to(user, write=self.request.method not in SAFE_METHODS)
+        if self.action == 'destroy':
+            animals = animals.filter(owner=user)
+        return filter_by_attributes(animals.order_by('name'), self.request.query_params)
+
+    def destroy(self, request, *args, **kwargs):
+        """Delete small histories right away; large ones are queued and answered with 202"""
+        job = delete_animal(self.get_object())
+        if job is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response({'deletion_job': job.id}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], serializer_class=AnimalSummarySerializer)
+    def summary(self, request):
+        """List the owner's animals using only the denormalized summary columns"""
+        animals = self.get_queryset().only(*AnimalSummarySerializer.Meta.fields)
+        serializer = self.get_serializer(animals, many=True)
+        return Response(serializer.data)
+
+
+class AccessGrantViewSet(viewsets.ModelViewSet):
+    """Grants the user has given to caretakers and vets"""
+    queryset = AccessGrant.objects.select_related('grantee')
+    serializer_class = AccessGrantSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get_queryset(self):
+        return self.queryset.filter(owner=self.request.user).order_by('id')
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+
+class AttributeKeyViewSet(viewsets.ReadOnlyModelViewSet):
+    """Declared attribute keys and their value types"""
+    queryset = AttributeKey.objects.order_by('name')
+    serializer_class = AttributeKeySerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+    lookup_field = 'name'
+
+
+class DashboardView(generics.GenericAPIView):
+    """Herd overview for the owner's home screen"""
+    serializer_class = DashboardSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get(self, request):
+        serializer = self.get_serializer(build_dashboard(request.user))
+        return Response(serializer.data)
+
+
+class MonthlyReportView(generics.ListAPIView):
+    """Monthly weights, vaccinations and herd growth per species, read from the rollups"""
+    serializer_class = MonthlyReportSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get_queryset(self):
+        filters = MonthlyReportQuerySerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return monthly_report(self.request.user, **filters.validated_data)
+
+
+RESOURCE_SERIALIZERS = {
+    'measurements': AnimalMeasurementSerializer,
+    'vaccinations': VaccinationSerializer,
+    'details': AnimalDetailSerializer,
+}
+
+
+class BulkDeleteView(generics.GenericAPIView):
+    """Delete the measurements, vaccinations or details matching a filter in one statement"""
+    serializer_class = BulkFilterSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get_resource(self):
+        if self.kwargs['resource'] not in BULK_RESOURCES:
+            raise Http404('Unknown resource.')
+        return BULK_RESOURCES[self.kwargs['resource']]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if 'resource' in self.kwargs:
+            context['resource'] = self.get_resource()
+            context['model_serializer'] = RESOURCE_SERIALIZERS[self.kwargs['resource']]
+        return context
+
+    def post(self, request, resource):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = bulk_queryset(request.user, self.get_resource(), **serializer.filters())
+        dry_run = serializer.validated_data['dry_run']
+        matched = queryset.count() if dry_run else self.perform_bulk(queryset, serializer)
+        return Response({'dry_run': dry_run, 'matched': matched})
+
+    def perform_bulk(self, queryset, serializer):
+        return bulk_delete(queryset, self.get_resource())
+
+
+class BulkUpdateView(BulkDeleteView):
+    """Set or offset fields of the measurements, vaccinations or details matching a filter"""
+    serializer_class = BulkUpdateSerializer
+
+    def perform_bulk(self, queryset, serializer):
+        data = serializer.validated_data
+        try:
+            return bulk_update(queryset, self.get_resource(), data['values'], data['offsets'])
+        except OffsetOutOfRange as error:
+            raise ValidationError({'offsets': str(error)})
+
+
+class VaccinationEventView(generics.GenericAPIView):
+    """Record one vaccination for a whole herd, or the animals picked by ids, species or breed"""
+    serializer_class = VaccinationEventSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        animals = select_animals(
+            request.user, data.get('animal_ids'), data.get('species'), data.get('breed'),
+        )
+        selected = {animal_id for animal_id, _, _ in animals}
+        if data.get('animal_ids') and (data.get('species') or data.get('breed')):
+            # Ids left out by species or breed are skipped, only inaccessible ones are refused
+            selected = {animal_id for animal_id, _, _ in select_animals(request.user, data['animal_ids'])}
+        missing = set(data.get('animal_ids') or ()) - selected
+        if missing:
+            raise PermissionDenied(f"You are not allowed to vaccinate animals {', '.join(map(str, sorted(missing)))}.")
+        if not animals:
+            raise ValidationError('No animals match the selection.')
 
+        next_due_date = data.get('next_due_date') or next_due(
+            data['vaccine_name'], data['date_administered'], data.get('interval_days'),
+        )
+        record_vaccination_event(
+            animals, data['vaccine_name'], data['date_administered'], data.get('description'), next_due_date,
+        )
+        result = {**data, 'next_due_date': next_due_date, 'vaccinated': [animal_id for animal_id, _, _ in animals]}
+        return Response(self.get_serializer(result).data, status=status.HTTP_201_CREATED)
 
-class AnimalMeasurementViewSet(viewsets.ModelViewSet):
+
+class VocabularyView(generics.ListAPIView):
+    """Autocomplete values of vaccine_name, species or breed, most used first"""
+    serializer_class = VocabularyEntrySerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get_queryset(self):
+        field = self.kwargs['field']
+        if field not in dict(VocabularyTerm.FIELD_CHOICES):
+            raise NotFound(f"Unknown vocabulary '{field}'.")
+        query = VocabularyQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        owner_id = None if data['scope'] == 'global' else self.request.user.id
+        return [
+            {'value': value, 'count': count}
+            for value, count in suggestions(field, data['q'], owner_id, data.get('limit'))
+        ]
+
+
+class AnimalTimelineView(AnimalAccessMixin, generics.GenericAPIView):
+    """Measurements (archived ones included), vaccinations and details of an animal merged newest first"""
+    serializer_class = TimelinePageSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+    page_size = 50
+    max_page_size = 200
+    entry_serializers = {
+        'measurement': AnimalMeasurementSerializer,
+        'vaccination': VaccinationSerializer,
+        'detail': AnimalDetailSerializer,
+        'archived_measurement': AnimalMeasurementArchiveSerializer,
+    }
+
+    def get_page_size(self):
+        try:
+            size = int(self.request.query_params.get('page_size', self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get(self, request, animal_id):
+        animal = self.get_animal()
+        try:
+            entries, cursor = timeline_page(animal.id, self.get_page_size(), request.query_params.get('cursor'))
+        except InvalidCursor as error:
+            raise NotFound(str(error))
+
+        context = {**self.get_serializer_context(), 'growth_curve': GrowthCurve(animal)}
+        date_fields = {kind: date_field for kind, _, date_field in STREAMS}
+        results = [
+            {
+                'type': kind,
+                'id': row.id,
+                'date': getattr(row, date_fields[kind]),
+                'data': self.entry_serializers[kind](row, context=context).data,
+            }
+            for kind, row in entries
+        ]
+        next_url = None
+        if cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', cursor)
+        return Response(self.get_serializer({'next': next_url, 'results': results}).data)
+
+
+class AnimalMeasurementViewSet(AnimalAccessMixin, viewsets.ModelViewSet):
     queryset = AnimalMeasurement.objects.all()
     serializer_class = AnimalMeasurementSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
-    
+    throttle_classes = [UserRateThrottle]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + SERIES_RENDERERS
+
+    def get_renderers(self):
+        """Series formats only exist for the list"""
+        renderers = super().get_renderers()
+        if self.action != 'list':
+            renderers = [r for r in renderers if r.format not in SERIES_FORMATS]
+        return renderers
+
+    def handle_exception(self, exc):
+        """Errors are reported as JSON even when a series was requested"""
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if renderer is not None and renderer.format in SERIES_FORMATS:
+            self.request.accepted_renderer = JSONRenderer()
+            self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
     def get_queryset(self):
-        user = self.request.user
-        if user.is_authenticated:
-            animal = get_object_or_404(Animal, id = self.kwargs['animal_id'])
-            if animal.owner == user:
-                return self.queryset.filter(animal=animal).order_by('-date')
-            else:
-                raise PermissionDenied('You are not allowed to access this animal.')
-        else:
-            raise PermissionDenied("You must be logged in to utilize this feature.")
+        return self.queryset.filter(animal=self.get_animal()).order_by('-date')
+
+    def get_growth_curve(self):
+        """The animal's growth reference, loaded once per request"""
+        if getattr(self, '_growth_curve', None) is None:
+            self._growth_curve = GrowthCurve(self.get_animal())
+        return self._growth_curve
+
+    def get_serializer_context(self):
+        """Each reading's percentile is a lookup in the animal's growth curve"""
+        context = super().get_serializer_context()
+        if 'animal_id' in self.kwargs:
+            context['growth_curve'] = self.get_growth_curve()
+        return context
+
+    def list(self, request, *args, **kwargs):
+        """Full-resolution readings followed by the archived rollups of older history"""
+        queryset = self.filter_queryset(self.get_queryset())
+        if request.accepted_renderer.format in SERIES_FORMATS:
+            return Response(self.series(queryset))
+        context = self.get_serializer_context()
+        data = list(self.get_serializer(queryset, many=True, context=context).data)
+        if request.query_params.get('tier') != 'hot':
+            archived = AnimalMeasurementArchive.objects.filter(
+                animal_id=self.kwargs['animal_id']
+            ).order_by('-period_start')
+            data += AnimalMeasurementArchiveSerializer(archived, many=True, context=context).data
+        return Response(data)
+
+    def series(self, queryset):
+        """Columnar series read straight from the columns, skipping the serializers"""
+        readings = queryset.values_list('date', 'weight', 'height')
+        archived = []
+        if self.request.query_params.get('tier') != 'hot':
+            archived = AnimalMeasurementArchive.objects.filter(
+                animal_id=self.kwargs['animal_id']
+            ).order_by('-period_start').values_list('period_start', 'weight', 'height')
+        return build_series(readings, archived, delta=self.request.query_params.get('delta') in ('1', 'true'))
+
+    def create(self, request, *args, **kwargs):
+        """Record a reading or a list of readings; a day the animal already has is overwritten"""
+        serializer = self.get_serializer(data=request.data, many=isinstance(request.data, list))
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer):
-        user = self.request.user
-        if user.is_authenticated:
-            animal = get_object_or_404(Animal, id = self.kwargs['animal_id'])
-            if animal.owner == user:
-               serializer.save(animal=animal)
-            else:
-                raise PermissionDenied('You are not allowed to access this animal.')
-        else:
-            raise PermissionDenied("You must be logged in to utilize this feature.")
+        animal = self.get_animal()
+        readings = serializer.validated_data
+        many = isinstance(readings, list)
+        written = upsert_measurements(
+            AnimalMeasurement(animal=animal, **data) for data in (readings if many else [readings])
+        )
+        serializer.instance = written if many else written[0]
+
+class AnimalAttributeViewSet(AnimalAccessMixin, viewsets.ModelViewSet):
+    """Typed attributes of an animal, addressed by key name"""
+    queryset = AnimalAttribute.objects.select_related('key')
+    serializer_class = AnimalAttributeSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+    lookup_field = 'key__name'
+    lookup_url_kwarg = 'key'
 
-class VaccinationViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        return self.queryset.filter(animal=self.get_animal()).order_by('key__name')
+
+    def perform_create(self, serializer):
+        serializer.save(animal=self.get_animal())
+
+class WeightAnomalyViewSet(AnimalAccessMixin, viewsets.ReadOnlyModelViewSet):
+    """Sudden weight losses flagged by the detect_weight_anomalies job"""
+    queryset = WeightAnomaly.objects.all()
+    serializer_class = WeightAnomalySerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get_queryset(self):
+        return self.queryset.filter(animal=self.get_animal()).order_by('-date')
+
+class VaccinationViewSet(AnimalAccessMixin, viewsets.ModelViewSet):
     queryset = Vaccination.objects.all()
     serializer_class = VaccinationSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_authenticated:
-            animal = get_object_or_404(Animal, id = self.kwargs['animal_id'])
-            if animal.owner == user:
-                return self.queryset.filter(animal=animal).order_by('-date_administered')
-            else:
-                raise PermissionDenied('You are not allowed to access this animal.')
-        else:
-            raise PermissionDenied("You must be logged in to utilize this feature.")
+        return self.queryset.filter(animal=self.get_animal()).order_by('-date_administered')
 
     def perform_create(self, serializer):
-        user = self.request.user
-        if user.is_authenticated:
-            animal = get_object_or_404(Animal, id = self.kwargs['animal_id'])
-            if animal.owner == user:
-               serializer.save(animal=animal)
-            else:
-                raise PermissionDenied('You are not allowed to access this animal.')
-        else:
-            raise PermissionDenied("You must be logged in to utilize this feature.")
+        serializer.save(animal=self.get_animal())
 
-class AnimalDetailViewSet(viewsets.ModelViewSet):
+class AnimalDetailViewSet(AnimalAccessMixin, viewsets.ModelViewSet):
     queryset = AnimalDetail.objects.all()
     serializer_class = AnimalDetailSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
     
     def get_queryset(self):
-        user = self.request.user
-        if user.is_authenticated:
-            animal = get_object_or_404(Animal, id = self.kwargs['animal_id'])
-            if animal.owner == user:
-                return self.queryset.filter(animal=animal).order_by('name', '-date_recorded')
-            else:
-                raise PermissionDenied('You are not allowed to access this animal.')
-        else:
-            raise PermissionDenied("You must be logged in to utilize this feature.")
+        return self.queryset.filter(animal=self.get_animal()).order_by('name', '-date_recorded')
 
     def perform_create(self, serializer):
-        user = self.request.user
-        if user.is_authenticated:
-            animal = get_object_or_404(Animal, id = self.kwargs['animal_id'])
-            if animal.owner == user:
-               serializer.save(animal=animal)
-            else:
-                raise PermissionDenied('You are not allowed to access this animal.')
-        else:
-            raise PermissionDenied("You must be logged in to utilize this feature.")
+        serializer.save(animal=self.get_animal())
@@ -0,0 +1,181 @@
+"""
+Ranked vocabularies of the free-text vaccine, species and breed fields
+
+VocabularyTerm counts how often each owner used each value. Writes recount
+only the (owner, field, value) keys they touch, like the monthly rollups.
+Lookups go through a PrefixIndex kept in process memory per owner and
+field, or per field for the global vocabulary. Each index is stamped with a
+version token held in the default cache. A refresh replaces the tokens of
+the keys it touched, so every worker sharing that cache rebuilds on its next
+lookup. Indexes also expire after VOCABULARY['INDEX_TIMEOUT'] seconds.
+"""
+
+import heapq
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Animal, Vaccination, VocabularyTerm
+
+
+DEFAULT_VOCABULARY = {
+    'LIMIT': 10,
+    'GLOBAL_MIN_OWNERS': 3,  # a value shows globally once this many owners use it
+    'INDEX_TIMEOUT': 300,
+    'MAX_INDEXES': 1000,
+}
+
+# Field: (source model, path to the owner id)
+SOURCES = {
+    VocabularyTerm.VACCINE_NAME: (Vaccination, 'animal__owner_id'),
+    VocabularyTerm.SPECIES: (Animal, 'owner_id'),
+    VocabularyTerm.BREED: (Animal, 'owner_id'),
+}
+
+_lock = threading.Lock()
+_indexes = OrderedDict()  # (field, owner id or None) -> (version, built at, PrefixIndex)
+
+
+def vocabulary_setting(name):
+    return getattr(settings, 'VOCABULARY', {}).get(name, DEFAULT_VOCABULARY[name])
+
+
+class PrefixIndex:
+    """Values sorted by their lowercase form, so the matches of a prefix are one slice"""
+
+    def __init__(self, counts):
+        self.entries = sorted((value.lower(), -count, value) for value, count in counts)
+        self.keys = [folded for folded, _, _ in self.entries]
+
+    def search(self, prefix, limit):
+        """[(value, count)] starting with prefix, ignoring case, most used first"""
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\U0010ffff', start)
+        best = heapq.nsmallest(limit, self.entries[start:end], key=lambda entry: (entry[1], entry[0]))
+        return [(value, -negated) for _, negated, value in best]
+
+
+def _version_key(field, owner_id):
+    return f'vocabulary:{field}:{owner_id or "global"}'
+
+
+def _counts(field, owner_id):
+    terms = VocabularyTerm.objects.filter(field=field)
+    if owner_id is not None:
+        return terms.filter(owner_id=owner_id).values_list('value', 'count')
+    return (
+        terms.values('value')
+        .annotate(total=Sum('count'), owners=Count('owner_id'))
+        .filter(owners__gte=vocabulary_setting('GLOBAL_MIN_OWNERS'))
+        .values_list('value', 'total')
+    )
+
+
+def prefix_index(field, owner_id=None):
+    """Index of an owner's values of field, or of the global ones when owner_id is None"""
+    key = (field, owner_id)
+    version = cache.get(_version_key(field, owner_id))
+    with _lock:
+        cached = _indexes.get(key)
+        if cached and cached[0] == version and time.monotonic() - cached[1] < vocabulary_setting('INDEX_TIMEOUT'):
+            _indexes.move_to_end(key)
+            return cached[2]
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(_version_key(field, owner_id), version, None)
+        version = cache.get(_version_key(field, owner_id), version)
+    index = PrefixIndex(_counts(field, owner_id))
+    with _lock:
+        _indexes[key] = (version, time.monotonic(), index)
+        _indexes.move_to_end(key)
+        while len(_indexes) > vocabulary_setting('MAX_INDEXES'):
+            _indexes.popitem(last=False)
+    return index
+
+
+def suggestions(field, prefix='', owner_id=None, limit=None):
+    """[(value, count)] of field starting with prefix, most used first"""
+    return prefix_index(field, owner_id).search(prefix, limit or vocabulary_setting('LIMIT'))
+
+
+def invalidate(owner_fields):
+    """Make every worker rebuild the indexes of the given (owner id, field) pairs and their global ones"""
+    keys = {_version_key(field, owner_id) for owner_id, field in owner_fields}
+    keys |= {_version_key(field, None) for _, field in owner_fields}
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def animal_vocabulary_keys(animal_ids):
+    """(owner id, field, value) keys the animals and their vaccinations count towards"""
+    animals = Animal.objects.filter(id__in=animal_ids)
+    keys = set()
+    for owner_id, species, breed in animals.values_list('owner_id', 'species', 'breed'):
+        keys |= {(owner_id, VocabularyTerm.SPECIES, species), (owner_id, VocabularyTerm.BREED, breed)}
+    vaccinations = Vaccination.objects.filter(animal_id__in=animal_ids).order_by()
+    keys |= {
+        (owner_id, VocabularyTerm.VACCINE_NAME, name)
+        for owner_id, name in vaccinations.values_list('animal__owner_id', 'vaccine_name').distinct()
+    }
+    return keys
+
+
+def refresh_vocabulary(keys):
+    """Recount the given (owner id, field, value) keys; values no longer used are removed"""
+    values_by_group = defaultdict(set)
+    for owner_id, field, value in keys:
+        if value:
+            values_by_group[(owner_id, field)].add(value)
+    if not values_by_group:
+        return
+
+    with transaction.atomic():
+        for (owner_id, field), values in values_by_group.items():
+            model, owner_path = SOURCES[field]
+            counts = dict(
+                model.objects.filter(**{owner_path: owner_id, f'{field}__in': values})
+                .order_by().values(field).annotate(total=Count('id')).values_list(field, 'total')
+            )
+            VocabularyTerm.objects.bulk_create(
+                [VocabularyTerm(owner_id=owner_id, field=field, value=v, count=n) for v, n in counts.items()],
+                update_conflicts=True,
+                unique_fields=['owner', 'field', 'value'],
+                update_fields=['count'],
+            )
+            VocabularyTerm.objects.filter(
+                owner_id=owner_id, field=field, value__in=values - set(counts),
+            ).delete()
+        transaction.on_commit(lambda: invalidate(values_by_group))
+
+
+def rebuild_vocabulary(owner_id=None):
+    """Recount every term from the source tables; returns the terms written"""
+    written = 0
+    with transaction.atomic():
+        terms = VocabularyTerm.objects.all()
+        if owner_id is not None:
+            terms = terms.filter(owner_id=owner_id)
+        # Pairs losing every term must be invalidated too, so read them before deleting
+        owners = set(terms.values_list('owner_id', 'field').distinct())
+        terms.delete()
+        for field, (model, owner_path) in SOURCES.items():
+            rows = model.objects.exclude(**{field: ''})
+            if owner_id is not None:
+                rows = rows.filter(**{owner_path: owner_id})
+            totals = rows.order_by().values(owner_path, field).annotate(total=Count('id'))
+            batch = [
+                VocabularyTerm(owner_id=row[owner_path], field=field, value=row[field], count=row['total'])
+                for row in totals.iterator(chunk_size=2000)
+            ]
+            VocabularyTerm.objects.bulk_create(batch, batch_size=1000)
+            written += len(batch)
+        owners |= set(terms.values_list('owner_id', 'field').distinct())
+        transaction.on_commit(lambda: invalidate(owners))
+    return written
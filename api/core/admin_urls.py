@@ -0,0 +1,13 @@
+"""
+Admin URLs, imported on the first request routed to admin/
+
+The admin app is installed without autodiscovery, so the ModelAdmin
+modules (and the forms and widgets they pull in) load here instead of
+during every worker's startup.
+"""
+
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns, app_name, _namespace = admin.site.urls
@@ -0,0 +1,53 @@
+"""
+Helpers for timing requests through the WSGI handler in-process, used by the
+benchmark management commands
+"""
+
+import io
+import sys
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+
+from core.metrics import QueryCounter
+
+
+def build_handler(middleware):
+    """WSGI handler loaded with the given middleware paths"""
+    previous = settings.MIDDLEWARE
+    settings.MIDDLEWARE = middleware
+    try:
+        return WSGIHandler()
+    finally:
+        settings.MIDDLEWARE = previous
+
+
+def make_environ(path, host, token=None, query=''):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': host,
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    }
+    if token:
+        environ['HTTP_AUTHORIZATION'] = f'Token {token}'
+    return environ
+
+
+def time_requests(handler, requests, **environ_options):
+    """Wall time of each request in microseconds and the SQL statements run in total"""
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    timings = []
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        for _ in range(requests):
+            environ = make_environ(**environ_options)
+            started = time.perf_counter_ns()
+            response = handler(environ, start_response)
+            b''.join(response)
+            response.close()
+            timings.append((time.perf_counter_ns() - started) / 1000)
+    return timings, counter.count
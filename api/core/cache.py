@@ -0,0 +1,45 @@
+"""
+Cache backends that report hits and misses to core.metrics
+
+Each backend is the Django one of the same name. The 'cache' label of the
+metrics is the METRICS_NAME of the cache's settings entry, 'default' if unset,
+and the 'namespace' label the leading word of the key (see key_namespace).
+"""
+
+from collections import Counter
+
+from django.core.cache.backends import locmem, redis
+
+from core.metrics import key_namespace, record_cache
+
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self.metrics_name = params.get('METRICS_NAME', 'default')
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            record_cache(self.metrics_name, key_namespace(key), 0, 1)
+            return default
+        record_cache(self.metrics_name, key_namespace(key), 1, 0)
+        return value
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class RedisCache(InstrumentedCacheMixin, redis.RedisCache):
+    # The base get_many goes through get; Redis fetches all keys in one call
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        hits = Counter(key_namespace(key) for key in found)
+        for namespace, lookups in Counter(key_namespace(key) for key in keys).items():
+            record_cache(self.metrics_name, namespace, hits[namespace], lookups - hits[namespace])
+        return found
@@ -0,0 +1,84 @@
+"""
+Deployment checks of the production settings profile
+
+Registered for `manage.py check --deploy`, which `check_production` runs.
+Unlike Django's own deployment warnings, settings the profile requires are
+reported as errors.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.utils.module_loading import import_string
+
+
+SHARED_CACHE_BACKENDS = ('RedisCache', 'MemcacheCache', 'DatabaseCache')
+
+
+@register(Tags.security, deploy=True)
+def check_production_profile(app_configs, **kwargs):
+    errors = []
+    if settings.DEBUG:
+        errors.append(Error('DEBUG is on.', hint='Set VAXTRACK_PROFILE=production.', id='core.E001'))
+    if settings.SECRET_KEY.startswith('django-insecure-'):
+        errors.append(Error('SECRET_KEY is the development key.', hint='Set DJANGO_SECRET_KEY.', id='core.E002'))
+    if not settings.ALLOWED_HOSTS:
+        errors.append(Error('ALLOWED_HOSTS is empty.', hint='Set ALLOWED_HOSTS to a comma-separated list.', id='core.E003'))
+    if settings.PASSWORD_HASHER_PROFILE == 'fast':
+        errors.append(Error('The fast password hashers are enabled.', hint='Unset PASSWORD_HASHER_PROFILE.', id='core.E004'))
+    return errors
+
+
+@register(Tags.security, deploy=True)
+def check_metrics_token(app_configs, **kwargs):
+    from core.metrics import metrics_setting
+
+    if metrics_setting('TOKEN'):
+        return []
+    return [Warning('/metrics is served to anyone who can reach it.', hint='Set METRICS_TOKEN.', id='core.W002')]
+
+
+@register(Tags.security, deploy=True)
+def check_browser_middleware(app_configs, **kwargs):
+    # Stands in for Django's security.W002 and W003, which miss subclasses
+    from django.middleware.clickjacking import XFrameOptionsMiddleware
+    from django.middleware.csrf import CsrfViewMiddleware
+
+    installed = [import_string(path) for path in settings.MIDDLEWARE]
+    return [
+        Error(f'{middleware.__name__} is not in MIDDLEWARE.', id='core.E008')
+        for middleware in (CsrfViewMiddleware, XFrameOptionsMiddleware)
+        if not any(issubclass(cls, middleware) for cls in installed if isinstance(cls, type))
+    ]
+
+
+@register(Tags.database, deploy=True)
+def check_persistent_connections(app_configs, **kwargs):
+    errors = []
+    for alias, database in settings.DATABASES.items():
+        if not database.get('CONN_MAX_AGE'):
+            errors.append(Error(f"Database '{alias}' opens a connection per request.",
+                                hint='Set CONN_MAX_AGE.', id='core.E005'))
+        elif not database.get('CONN_HEALTH_CHECKS'):
+            errors.append(Error(f"Database '{alias}' reuses connections without health checks.", id='core.E006'))
+    return errors
+
+
+@register(Tags.templates, deploy=True)
+def check_cached_templates(app_configs, **kwargs):
+    errors = []
+    for engine in settings.TEMPLATES:
+        loaders = engine.get('OPTIONS', {}).get('loaders') or []
+        if not any(isinstance(loader, (list, tuple)) and loader[0].endswith('cached.Loader') for loader in loaders):
+            errors.append(Error(f"Template engine {engine['BACKEND']} does not cache compiled templates.",
+                                id='core.E007'))
+    return errors
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    # Throttle history and vocabulary versions must be seen by every worker
+    return [
+        Warning(f"Cache '{alias}' is local to each worker process.", hint='Set REDIS_URL.', id='core.W001')
+        for alias, cache in settings.CACHES.items()
+        if not cache['BACKEND'].endswith(SHARED_CACHE_BACKENDS)
+    ]
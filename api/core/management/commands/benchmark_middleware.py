@@ -0,0 +1,61 @@
+"""
+Compare the per-request cost of the stock and the lean middleware chains
+"""
+
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from core.benchmark import build_handler, time_requests
+from core.middleware import LeanPathMixin
+
+
+def stock_middleware():
+    """settings.MIDDLEWARE with each core.middleware class replaced by the Django one it wraps"""
+    paths = []
+    for path in settings.MIDDLEWARE:
+        middleware = import_string(path)
+        paths.append(middleware.stock() if issubclass(middleware, LeanPathMixin) else path)
+    return paths
+
+
+class Command(BaseCommand):
+    help = 'Time requests through the stock and the lean middleware chains'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/schema/', help='Path to request')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per chain')
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--token', help='API token to authenticate the requests with')
+
+    def handle(self, *args, **options):
+        environ_options = {'path': options['path'], 'host': options['host'], 'token': options['token']}
+        chains = [('stock', stock_middleware()), ('lean', list(settings.MIDDLEWARE))]
+
+        self.stdout.write(f'{options["requests"]} requests to {options["path"]} per chain')
+        handlers = [(name, build_handler(middleware)) for name, middleware in chains]
+        for _, handler in handlers:
+            time_requests(handler, options['warmup'], **environ_options)
+        # Alternate the chains in rounds so drift affects both alike
+        results = {name: ([], 0) for name, _ in handlers}
+        rounds = 10
+        for _ in range(rounds):
+            for name, handler in handlers:
+                timings, queries = time_requests(handler, max(options['requests'] // rounds, 1), **environ_options)
+                results[name] = (results[name][0] + timings, results[name][1] + queries)
+
+        medians = {}
+        for name, (timings, queries) in results.items():
+            medians[name] = statistics.median(timings)
+            self.stdout.write(
+                f'  {name:6} median {medians[name]:8.1f} us  mean {statistics.fmean(timings):8.1f} us  '
+                f'{queries / len(timings):.1f} queries/request'
+            )
+
+        saved = medians['stock'] - medians['lean']
+        self.stdout.write(self.style.SUCCESS(
+            f'Lean chain saves {saved:.1f} us per request ({saved / medians["stock"]:.0%} of the median)'
+        ))
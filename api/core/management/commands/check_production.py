@@ -0,0 +1,23 @@
+"""
+Verify the settings of the production profile before deploying
+"""
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Fail unless the production profile is active and passes the deployment checks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fail-level', default='ERROR',
+                            choices=['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG'])
+
+    def handle(self, *args, **options):
+        if settings.SETTINGS_PROFILE != 'production':
+            raise CommandError(
+                f"The '{settings.SETTINGS_PROFILE}' profile is active; set VAXTRACK_PROFILE=production."
+            )
+        call_command('check', deploy=True, fail_level=options['fail_level'], stdout=self.stdout, stderr=self.stderr)
+        self.stdout.write(self.style.SUCCESS('Production profile OK'))
@@ -0,0 +1,21 @@
+"""
+Regenerate the precomputed OpenAPI schema
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.schema import clear_schema_cache, write_schema
+
+
+class Command(BaseCommand):
+    help = 'Write the OpenAPI schema served at /api/schema/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help=f'Output path (default: {settings.API_SCHEMA_PATH})')
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.API_SCHEMA_PATH
+        write_schema(path)
+        clear_schema_cache()
+        self.stdout.write(self.style.SUCCESS(f'Wrote schema to {path}'))
@@ -0,0 +1,42 @@
+"""
+Report where a worker's cold start spends its import time
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.startup import profile_startup
+
+
+class Command(BaseCommand):
+    help = 'Profile import time of a fresh worker per module, package and app'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Number of slowest modules to list')
+        parser.add_argument('--budget-ms', type=float, default=settings.STARTUP_IMPORT_BUDGET_MS,
+                            help='Fail when total import time exceeds this')
+
+    def handle(self, *args, **options):
+        profile = profile_startup()
+
+        self.stdout.write(f'Slowest {options["top"]} modules (self time):')
+        for timing in profile.slowest(options['top']):
+            self.stdout.write(f'  {timing.self_us / 1000:8.1f} ms  {timing.module}')
+
+        self.stdout.write('Per installed app:')
+        for name, self_us in profile.by_app():
+            self.stdout.write(f'  {self_us / 1000:8.1f} ms  {name}')
+
+        self.stdout.write('Per top-level package:')
+        for name, self_us in profile.by_package()[:options['top']]:
+            self.stdout.write(f'  {self_us / 1000:8.1f} ms  {name}')
+
+        self.stdout.write(
+            f'Total import time {profile.total_ms:.1f} ms, '
+            f'wall clock {profile.wall_seconds * 1000:.0f} ms, '
+            f'{len(profile.modules)} modules loaded'
+        )
+        if profile.total_ms > options['budget_ms']:
+            raise CommandError(
+                f'Import time {profile.total_ms:.1f} ms exceeds the {options["budget_ms"]:.0f} ms budget'
+            )
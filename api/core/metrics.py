@@ -0,0 +1,137 @@
+"""
+Prometheus metrics for the API
+
+MetricsMiddleware counts the requests routed to the namespaces in
+METRICS['NAMESPACES'] per view name, with histograms of their latency and of
+the SQL statements they ran. The cache backends in core.cache count hits and
+misses per key namespace. /metrics serves everything in the Prometheus
+text format.
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by the workers before they start. prometheus_client then
+keeps each worker's values in mmap-backed files there and /metrics
+aggregates them, whichever worker answers the scrape. Call
+mark_worker_dead from the server's worker exit hook (gunicorn: child_exit).
+"""
+
+import os
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+
+DEFAULT_METRICS = {
+    'NAMESPACES': ('animal', 'user'),
+    'TOKEN': None,  # bearer token /metrics requires when set
+}
+
+REQUESTS = Counter(
+    'vaxtrack_http_requests_total', 'Requests handled, by view', ['view', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'vaxtrack_http_request_duration_seconds', 'Time to build the response, by view', ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+QUERIES = Histogram(
+    'vaxtrack_http_request_queries', 'SQL statements run per request, by view', ['view', 'method'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+CACHE_REQUESTS = Counter(
+    'vaxtrack_cache_requests_total', 'Cache lookups, by cache, key namespace and result',
+    ['cache', 'namespace', 'result'],
+)
+
+
+_KEY_NAMESPACE = re.compile(r'[A-Za-z0-9]+')
+
+
+def metrics_setting(name):
+    return getattr(settings, 'METRICS', {}).get(name, DEFAULT_METRICS[name])
+
+
+def key_namespace(key):
+    """Leading word of a cache key, e.g. 'vocabulary' for 'vocabulary:breed:7'
+
+    Keys are namespaced this way by the code that writes them; the rest of
+    the key would give every owner or client address its own time series.
+    """
+    match = _KEY_NAMESPACE.match(str(key))
+    return match.group() if match else 'other'
+
+
+def record_cache(cache, namespace, hits, misses):
+    if hits:
+        CACHE_REQUESTS.labels(cache, namespace, 'hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache, namespace, 'miss').inc(misses)
+
+
+def view_label(request):
+    """Namespaced URL name of the view that handled request, or None when it is not measured"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.namespaces or match.namespaces[0] not in metrics_setting('NAMESPACES'):
+        return None
+    return match.view_name
+
+
+class QueryCounter:
+    """Database execute wrapper counting the statements run through it"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Record count, latency and SQL statements of each measured request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        view = view_label(request)
+        if view is not None:
+            REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+            LATENCY.labels(view, request.method).observe(elapsed)
+            QUERIES.labels(view, request.method).observe(queries.count)
+        return response
+
+
+def collect():
+    """Text exposition of every metric, merged across workers in multiprocess mode"""
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+@transaction.non_atomic_requests
+def metrics_view(request):
+    token = metrics_setting('TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(collect(), content_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead(pid):
+    """Drop the live-gauge files of a worker that exited (multiprocess mode only)"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
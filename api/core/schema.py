@@ -0,0 +1,94 @@
+"""
+Precomputed OpenAPI schema served from memory
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.decorators import method_decorator
+from django.utils.module_loading import import_string
+from django.views import View
+
+
+SCHEMA_CONTENT_TYPE = 'application/vnd.oai.openapi; charset=utf-8'
+
+_lock = threading.Lock()
+_cached = None
+
+
+def generate_schema():
+    """Introspect the API and return the rendered YAML schema as bytes
+
+    Views keep DRF's default schema class at runtime (the router touches
+    every viewset's `schema` while building URLs, which would otherwise
+    import drf_spectacular in every worker), so the generator hands each
+    view an API_SCHEMA_CLASS inspector itself.
+    """
+    from drf_spectacular.renderers import OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    schema_class = import_string(settings.API_SCHEMA_CLASS)
+
+    class Generator(spectacular_settings.DEFAULT_GENERATOR_CLASS):
+        def create_view(self, callback, method, request=None):
+            view = super().create_view(callback, method, request)
+            # schema = None keeps a view out of the schema
+            if view.schema is not None and not isinstance(view.schema, schema_class):
+                self._set_schema_to_view(view, schema_class())
+            return view
+
+    schema = Generator().get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+def write_schema(path=None):
+    content = generate_schema()
+    with open(path or settings.API_SCHEMA_PATH, 'wb') as handle:
+        handle.write(content)
+    return content
+
+
+def load_schema():
+    """Return (content, etag), read from disk once per process
+
+    Raises FileNotFoundError when the schema was never generated; requests
+    never introspect the API themselves.
+    """
+    global _cached
+    if _cached is None:
+        with _lock:
+            if _cached is None:
+                with open(settings.API_SCHEMA_PATH, 'rb') as handle:
+                    content = handle.read()
+                etag = '"%s"' % hashlib.sha256(content).hexdigest()
+                _cached = (content, etag)
+    return _cached
+
+
+def clear_schema_cache():
+    global _cached
+    _cached = None
+
+
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class StaticSchemaView(View):
+    """Serve the precomputed schema with an ETag and long-lived cache headers"""
+
+    def get(self, request):
+        try:
+            content, etag = load_schema()
+        except FileNotFoundError:
+            return HttpResponse(
+                'Schema not generated, run `manage.py generate_schema`.',
+                status=503, content_type='text/plain; charset=utf-8',
+            )
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=SCHEMA_CONTENT_TYPE)
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={settings.API_SCHEMA_MAX_AGE}'
+        return response
@@ -10,28 +10,52 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+# True while running the test suite through manage.py
+TESTING = sys.argv[1:2] == ['test']
+
+# 'production' turns off debugging and keeps database connections and
+# compiled templates between requests; verify with `manage.py check_production`
+SETTINGS_PROFILE = os.environ.get('VAXTRACK_PROFILE', 'development')
+PRODUCTION = SETTINGS_PROFILE == 'production'
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-9*mcs%qum37#u&1&1_=yvo6y!$x5#+oeoc)89@d*o(=p^q$sio'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', 'django-insecure-9*mcs%qum37#u&1&1_=yvo6y!$x5#+oeoc)89@d*o(=p^q$sio'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Debug mode also keeps every SQL statement a connection runs in memory
+DEBUG = not PRODUCTION
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host]
+
+if PRODUCTION:
+    SESSION_COOKIE_SECURE = True
+    CSRF_COOKIE_SECURE = True
+    SECURE_SSL_REDIRECT = os.environ.get('SECURE_SSL_REDIRECT', 'true') == 'true'
+    SECURE_HSTS_SECONDS = int(os.environ.get('SECURE_HSTS_SECONDS', 0))
+    if os.environ.get('SECURE_PROXY_SSL_HEADER'):
+        # e.g. HTTP_X_FORWARDED_PROTO when TLS ends at a proxy
+        SECURE_PROXY_SSL_HEADER = (os.environ['SECURE_PROXY_SSL_HEADER'], 'https')
 
 
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Autodiscovery is deferred to core.admin_urls
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -40,20 +64,32 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
+    'core',
     'user',
     'animal'
 ]
 
+# The core.middleware classes are skipped on the LEAN_MIDDLEWARE paths
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.CsrfViewMiddleware',
+    'core.middleware.AuthenticationMiddleware',
+    'core.middleware.MessageMiddleware',
+    'core.middleware.XFrameOptionsMiddleware',
 ]
 
+LEAN_MIDDLEWARE = {
+    'PATHS': ('/api/', '/metrics'),
+    'EXCLUDE': ('/api/docs/',),
+}
+
+# Django looks for its own CSRF and clickjacking middleware by exact path;
+# core.checks verifies the core.middleware subclasses instead
+SILENCED_SYSTEM_CHECKS = ['security.W002', 'security.W003']
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -72,6 +108,16 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    # Templates are compiled once per worker instead of on every render
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'core.wsgi.application'
 
 
@@ -80,11 +126,69 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': os.environ.get('DATABASE_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+        'USER': os.environ.get('DATABASE_USER', ''),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+        'HOST': os.environ.get('DATABASE_HOST', ''),
+        'PORT': os.environ.get('DATABASE_PORT', ''),
+        # Writes and the denormalized data they maintain commit together
+        'ATOMIC_REQUESTS': True,
     }
 }
 
+if PRODUCTION:
+    # Reuse connections across requests, checking them before reuse
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('CONN_MAX_AGE', 60))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# core.cache backends report hit ratios to /metrics under their METRICS_NAME
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.LocMemCache',
+        'METRICS_NAME': 'default',
+    },
+    # Throttle history; must be shared (e.g. core.cache.RedisCache) when running several workers
+    'throttle': {
+        'BACKEND': 'core.cache.LocMemCache',
+        'LOCATION': 'throttle',
+        'METRICS_NAME': 'throttle',
+    },
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        name: {
+            'BACKEND': 'core.cache.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': name,
+            'METRICS_NAME': name,
+        }
+        for name in CACHES
+    }
+
+if TESTING:
+    # Keep unrelated tests from tripping limits; throttle tests opt back in
+    CACHES['throttle'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+
+# 'fast' trades hashing strength for speed and must never be used in production
+PASSWORD_HASHER_PROFILE = os.environ.get(
+    'PASSWORD_HASHER_PROFILE', 'fast' if TESTING else 'default'
+)
+
+if PASSWORD_HASHER_PROFILE == 'fast':
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -130,6 +234,83 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'user.User'
 
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    
-    }
+    # Proxies in front of the app; throttles identify clients by the address
+    # that many hops back in X-Forwarded-For, or by REMOTE_ADDR when 0
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '2000/hour',
+        'login': '20/min',
+        'login_email': '5/min',
+        'signup': '10/hour',
+        'signup_email': '3/hour',
+    },
+}
+
+# Precomputed OpenAPI schema, regenerate with `manage.py generate_schema`;
+# API_SCHEMA_CLASS is only imported by the generator
+API_SCHEMA_PATH = BASE_DIR / 'schema.yml'
+API_SCHEMA_CLASS = 'drf_spectacular.openapi.AutoSchema'
+API_SCHEMA_MAX_AGE = 60 * 60 * 24
+
+# Import time budget for a cold worker, checked by profile_startup
+STARTUP_IMPORT_BUDGET_MS = 1500
+
+SPECTACULAR_SETTINGS = {
+    # Generation runs in core.test.test_schema instead of `check --deploy`
+    'ENABLE_DJANGO_DEPLOY_CHECK': False,
+}
+
+# Email
+# https://docs.djangoproject.com/en/5.1/topics/email/
+
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'reminders@vaxtrack.local')
+
+# Days before next_due_date that queue_vaccination_reminders starts reminding
+VACCINATION_REMINDER_LEAD_DAYS = 14
+
+# Days between doses by vaccine name, for next_due_date of herd vaccination events
+VACCINE_INTERVALS = {}
+
+# Autocomplete vocabularies; a value is suggested globally once GLOBAL_MIN_OWNERS owners use it
+VOCABULARY = {
+    'LIMIT': 10,
+    'GLOBAL_MIN_OWNERS': 3,
+    'INDEX_TIMEOUT': 300,
+}
+
+# Measurement history older than HOT_DAYS is rolled up by archive_measurements
+MEASUREMENT_RETENTION = {
+    'HOT_DAYS': int(os.environ.get('MEASUREMENT_HOT_DAYS', 730)),
+    'RESOLUTION': os.environ.get('MEASUREMENT_ARCHIVE_RESOLUTION', 'month'),
+    'BATCH_SIZE': 100,
+    'DELETE_CHUNK_SIZE': 1000,
+}
+
+# Animals with more history rows than SYNC_ROW_LIMIT are deleted by a background job
+FAST_DELETE = {
+    'SYNC_ROW_LIMIT': int(os.environ.get('FAST_DELETE_SYNC_ROW_LIMIT', 1000)),
+    'CHUNK_SIZE': 2000,
+    'STALE_AFTER_MINUTES': 60,
+}
+
+# Batches of `manage.py run_backfill` are sized to take about TARGET_SECONDS
+BACKFILL = {
+    'BATCH_SIZE': 500,
+    'MAX_BATCH_SIZE': 5000,
+    'TARGET_SECONDS': 0.5,
+    'PAUSE': float(os.environ.get('BACKFILL_PAUSE', 0.1)),
+    'STALE_AFTER_MINUTES': 10,
+}
+
+# Growth reference curves (animal.growth); rebuild them after changing the bucket width
+GROWTH_REFERENCE = {
+    'AGE_BUCKET_DAYS': 30,
+    'MIN_SAMPLES': 20,
+}
+
+# Prometheus metrics served at /metrics (core.metrics); with several workers
+# also set PROMETHEUS_MULTIPROC_DIR, see core.metrics
+METRICS = {
+    'NAMESPACES': ('animal', 'user'),
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+}
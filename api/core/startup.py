@@ -0,0 +1,96 @@
+"""
+Import-time profiling of a worker's cold start
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+
+
+# What a WSGI worker does before serving its first API request
+WORKER_STARTUP_CODE = (
+    "import core.wsgi\n"
+    "from django.urls import resolve\n"
+    "resolve('/api/animals/')\n"
+)
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # 0 for modules imported directly by the profiled code
+
+
+@dataclass
+class StartupProfile:
+    timings: list
+    wall_seconds: float
+    modules: list
+
+    @property
+    def total_ms(self):
+        """Import time of everything imported, from the top-level imports"""
+        return sum(t.cumulative_us for t in self.timings if t.depth == 0) / 1000
+
+    def slowest(self, count):
+        return sorted(self.timings, key=lambda t: t.self_us, reverse=True)[:count]
+
+    def by_package(self):
+        totals = defaultdict(int)
+        for timing in self.timings:
+            totals[timing.module.split('.')[0]] += timing.self_us
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def by_app(self):
+        """Self import time attributed to each installed app, longest prefix wins"""
+        from django.apps import apps
+
+        names = sorted((config.name for config in apps.get_app_configs()), key=len, reverse=True)
+        totals = defaultdict(int)
+        for timing in self.timings:
+            owner = next(
+                (name for name in names
+                 if timing.module == name or timing.module.startswith(name + '.')),
+                '(not an app)'
+            )
+            totals[owner] += timing.self_us
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def parse_importtime(output):
+    timings = []
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(ImportTiming(
+                module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2
+            ))
+    return timings
+
+
+def profile_startup(code=WORKER_STARTUP_CODE):
+    """Run code in a fresh interpreter under -X importtime"""
+    probe = code + "\nimport sys\nprint('\\n'.join(sorted(sys.modules)))\n"
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    wall_seconds = time.perf_counter() - started
+    return StartupProfile(
+        timings=parse_importtime(result.stderr),
+        wall_seconds=wall_seconds,
+        modules=result.stdout.split(),
+    )
@@ -0,0 +1,123 @@
+"""
+Tests for the Prometheus metrics endpoint and middleware
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APIClient
+
+from core.cache import LocMemCache
+from core.metrics import collect, metrics_view
+
+
+ANIMALS_URL = reverse('animal:animal-list')
+METRICS_URL = reverse('metrics')
+
+# Increments a counter from a separate worker process writing to the shared directory
+WORKER_CODE = (
+    "from prometheus_client import Counter\n"
+    "Counter('vaxtrack_test_jobs_total', 'Test jobs').inc({count})\n"
+)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test requests are recorded per view"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@example.com', 'test123456')
+        self.client.force_authenticate(self.user)
+
+    def test_request_recorded_per_view(self):
+        """Test count, latency and SQL statements of a namespaced view are recorded"""
+        labels = {'view': 'animal:animal-list', 'method': 'GET'}
+        requests = sample('vaxtrack_http_requests_total', status='200', **labels)
+        observed = sample('vaxtrack_http_request_duration_seconds_count', **labels)
+        queries = sample('vaxtrack_http_request_queries_sum', **labels)
+
+        self.client.get(ANIMALS_URL)
+
+        self.assertEqual(sample('vaxtrack_http_requests_total', status='200', **labels), requests + 1)
+        self.assertEqual(sample('vaxtrack_http_request_duration_seconds_count', **labels), observed + 1)
+        self.assertGreater(sample('vaxtrack_http_request_queries_sum', **labels), queries)
+
+    def test_other_namespaces_ignored(self):
+        """Test routes outside the measured namespaces are not recorded"""
+        self.client.get(METRICS_URL)
+
+        self.assertNotIn(b'view="metrics"', collect())
+
+
+class MetricsEndpointTests(TestCase):
+    """Test the text exposition"""
+
+    def test_text_format(self):
+        """Test /metrics answers in the Prometheus text format"""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        names = {family.name for family in text_string_to_metric_families(res.content.decode())}
+        self.assertIn('vaxtrack_http_requests', names)
+        self.assertIn('vaxtrack_http_request_duration_seconds', names)
+
+    @override_settings(METRICS={'TOKEN': 'secret'})
+    def test_token_required(self):
+        """Test a configured token must be presented"""
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, 200)
+
+    def test_scrape_outside_transaction(self):
+        """Test scrapes never open the per-request transaction"""
+        self.assertEqual(metrics_view._non_atomic_requests, {'default'})
+
+    def test_cache_hits_and_misses(self):
+        """Test the instrumented cache counts lookups by key namespace and result"""
+        cache = LocMemCache('metrics-test', {'METRICS_NAME': 'metrics-test'})
+
+        def count(namespace, result):
+            return sample('vaxtrack_cache_requests_total', cache='metrics-test', namespace=namespace, result=result)
+
+        before = {
+            (namespace, result): count(namespace, result)
+            for namespace in ('vocabulary', 'throttle') for result in ('hit', 'miss')
+        }
+
+        cache.set('vocabulary:breed:1', 'value')
+        self.assertEqual(cache.get('vocabulary:breed:1'), 'value')
+        self.assertIsNone(cache.get('vocabulary:breed:2'))
+        self.assertEqual(cache.get_many(['vocabulary:breed:1', 'throttle_user_1']), {'vocabulary:breed:1': 'value'})
+
+        self.assertEqual(count('vocabulary', 'hit'), before['vocabulary', 'hit'] + 2)
+        self.assertEqual(count('vocabulary', 'miss'), before['vocabulary', 'miss'] + 1)
+        self.assertEqual(count('throttle', 'miss'), before['throttle', 'miss'] + 1)
+        self.assertEqual(count('throttle', 'hit'), before['throttle', 'hit'])
+
+    def test_workers_aggregated(self):
+        """Test values written by separate worker processes are summed in multiprocess mode"""
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory}
+            for count in (2, 3):
+                subprocess.run(
+                    [sys.executable, '-c', WORKER_CODE.format(count=count)],
+                    cwd=settings.BASE_DIR, env=env, check=True,
+                )
+            with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+                res = self.client.get(METRICS_URL)
+
+        self.assertIn(b'vaxtrack_test_jobs_total 5.0', res.content)
@@ -0,0 +1,88 @@
+"""
+Tests for skipping the browser middleware on API routes
+"""
+
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.management.commands.benchmark_middleware import stock_middleware
+
+
+ANIMALS_URL = reverse('animal:animal-list')
+SCHEMA_URL = reverse('api-schema')
+ADMIN_LOGIN_URL = reverse('admin:login')
+
+
+class LeanMiddlewareTests(TestCase):
+    """Test API routes skip sessions, CSRF, messages and frame options"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('test@example.com', 'test123456')
+
+    def test_api_route_skips_browser_middleware(self):
+        """Test an API request gets neither a session nor the browser headers"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(ANIMALS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(hasattr(res.wsgi_request, 'session'))
+        self.assertFalse(hasattr(res.wsgi_request, '_messages'))
+        self.assertNotIn('X-Frame-Options', res)
+
+    def test_token_post_needs_no_csrf_token(self):
+        """Test token clients post without a CSRF token even when checks are enforced"""
+        client = APIClient(enforce_csrf_checks=True)
+        token = client.post(reverse('user:token'), {'email': 'test@example.com', 'password': 'test123456'}).data['token']
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+        res = client.post(ANIMALS_URL, {
+            'name': 'Daisy', 'species': 'Cow', 'breed': 'Jersey', 'date_of_birth': '2020-01-01',
+        })
+
+        self.assertEqual(res.status_code, 201)
+
+    def test_admin_keeps_browser_middleware(self):
+        """Test the admin still gets sessions, CSRF protection and frame options"""
+        client = Client(enforce_csrf_checks=True)
+
+        res = client.get(ADMIN_LOGIN_URL)
+        self.assertTrue(hasattr(res.wsgi_request, 'session'))
+        self.assertEqual(res['X-Frame-Options'], 'DENY')
+        self.assertIn(settings.CSRF_COOKIE_NAME, res.cookies)
+
+        res = client.post(ADMIN_LOGIN_URL, {'username': 'test@example.com', 'password': 'test123456'})
+        self.assertEqual(res.status_code, 403)
+
+    def test_docs_excluded(self):
+        """Test the HTML docs page keeps the browser headers"""
+        res = self.client.get(reverse('api-docs'))
+
+        self.assertEqual(res['X-Frame-Options'], 'DENY')
+
+
+class BenchmarkMiddlewareTests(TestCase):
+    """Test the middleware benchmark command"""
+
+    def test_stock_chain(self):
+        """Test the baseline swaps each lean middleware for the Django one"""
+        stock = stock_middleware()
+
+        self.assertEqual(len(stock), len(settings.MIDDLEWARE))
+        self.assertIn('django.contrib.sessions.middleware.SessionMiddleware', stock)
+        self.assertNotIn('core.middleware.SessionMiddleware', stock)
+
+    def test_reports_both_chains(self):
+        out = StringIO()
+
+        call_command('benchmark_middleware', requests=10, warmup=1, path=SCHEMA_URL, stdout=out)
+
+        self.assertIn('stock  median', out.getvalue())
+        self.assertIn('lean   median', out.getvalue())
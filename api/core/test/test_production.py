@@ -0,0 +1,98 @@
+"""
+Tests for the production settings profile and its deployment checks
+"""
+
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from core import checks
+
+
+PRODUCTION_ENV = {
+    'VAXTRACK_PROFILE': 'production',
+    'DJANGO_SECRET_KEY': 'k' * 20 + 'production-secret-key-for-tests-' + 'q' * 20,
+    'ALLOWED_HOSTS': 'vaxtrack.example.com',
+    'REDIS_URL': 'redis://localhost:6379/0',
+}
+
+# Prints the settings the production profile derives from the environment
+SETTINGS_CODE = (
+    "import django\n"
+    "django.setup()\n"
+    "from django.conf import settings\n"
+    "print(settings.DEBUG, settings.DATABASES['default']['CONN_MAX_AGE'],\n"
+    "      settings.TEMPLATES[0]['OPTIONS']['loaders'][0][0], settings.CACHES['throttle']['BACKEND'])\n"
+)
+
+
+def run(args, **env):
+    environ = {key: value for key, value in os.environ.items() if key not in PRODUCTION_ENV}
+    environ.update(env, DJANGO_SETTINGS_MODULE='core.settings')
+    return subprocess.run(
+        [sys.executable, *args], cwd=settings.BASE_DIR, env=environ, capture_output=True, text=True,
+    )
+
+
+class ProductionProfileTests(SimpleTestCase):
+    """Test the profile chosen by VAXTRACK_PROFILE"""
+
+    def test_production_settings(self):
+        result = run(['-c', SETTINGS_CODE], **PRODUCTION_ENV, CONN_MAX_AGE='120')
+
+        self.assertEqual(
+            result.stdout.split(),
+            ['False', '120', 'django.template.loaders.cached.Loader', 'core.cache.RedisCache'],
+        )
+
+    def test_check_command_passes(self):
+        result = run(['manage.py', 'check_production'], **PRODUCTION_ENV)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('Production profile OK', result.stdout)
+
+    def test_check_command_rejects_development(self):
+        result = run(['manage.py', 'check_production'])
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("'development' profile is active", result.stderr)
+
+    def test_check_command_reports_missing_settings(self):
+        result = run(['manage.py', 'check_production'], VAXTRACK_PROFILE='production')
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('core.E002', result.stderr)
+        self.assertIn('core.E003', result.stderr)
+
+
+class DeploymentCheckTests(SimpleTestCase):
+    """Test the checks against the development settings"""
+
+    def ids(self, check):
+        return [message.id for message in check(None)]
+
+    def test_development_settings_fail(self):
+        self.assertIn('core.E005', self.ids(checks.check_persistent_connections))
+        self.assertEqual(self.ids(checks.check_cached_templates), ['core.E007'])
+        self.assertEqual(self.ids(checks.check_shared_caches), ['core.W001', 'core.W001'])
+
+    def test_health_checks_required(self):
+        with mock.patch.dict(settings.DATABASES['default'], CONN_MAX_AGE=60):
+            self.assertEqual(self.ids(checks.check_persistent_connections), ['core.E006'])
+
+    def test_metrics_token_recommended(self):
+        self.assertEqual(self.ids(checks.check_metrics_token), ['core.W002'])
+
+        with override_settings(METRICS={'TOKEN': 'secret'}):
+            self.assertEqual(self.ids(checks.check_metrics_token), [])
+
+    def test_browser_middleware_subclasses_accepted(self):
+        self.assertEqual(self.ids(checks.check_browser_middleware), [])
+
+        middleware = [path for path in settings.MIDDLEWARE if 'Csrf' not in path]
+        with override_settings(MIDDLEWARE=middleware):
+            self.assertEqual(self.ids(checks.check_browser_middleware), ['core.E008'])
@@ -0,0 +1,54 @@
+"""
+Tests for the precomputed OpenAPI schema
+"""
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from core.schema import clear_schema_cache, generate_schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class StoredSchemaTests(SimpleTestCase):
+    """Test the committed schema matches the code"""
+
+    def test_stored_schema_is_current(self):
+        """Run `manage.py generate_schema` when this fails"""
+        with open(settings.API_SCHEMA_PATH, 'rb') as handle:
+            stored = handle.read()
+        self.assertEqual(
+            stored.decode(), generate_schema().decode(),
+            'schema.yml is stale, run `python manage.py generate_schema`'
+        )
+
+
+class SchemaViewTests(SimpleTestCase):
+    """Test serving the schema"""
+
+    def setUp(self):
+        clear_schema_cache()
+        self.addCleanup(clear_schema_cache)
+
+    def test_schema_served_with_cache_headers(self):
+        res = self.client.get(SCHEMA_URL)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('application/vnd.oai.openapi'))
+        self.assertIn('max-age', res['Cache-Control'])
+        self.assertIn(b'openapi:', res.content)
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(SCHEMA_URL)['ETag']
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+
+    def test_missing_file_unavailable(self):
+        """Test a missing schema is reported instead of generated per request"""
+        with self.settings(API_SCHEMA_PATH=settings.BASE_DIR / 'missing-schema.yml'):
+            res = self.client.get(SCHEMA_URL)
+            self.assertEqual(res.status_code, 503)
+
+        res = self.client.get(SCHEMA_URL)
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,49 @@
+"""
+Startup regression tests; the import time budget is checked by profile_startup
+"""
+
+from django.test import SimpleTestCase
+
+from core.startup import parse_importtime, profile_startup
+
+
+# Only needed by the docs, admin or schema generation
+LAZY_MODULES = [
+    'drf_spectacular.views',
+    'drf_spectacular.openapi',
+    'django.test',
+    'user.admin',
+    'animal.admin',
+]
+
+
+class StartupImportTests(SimpleTestCase):
+    """Test a worker starts without loading lazy modules"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.profile = profile_startup()
+
+    def test_lazy_modules_not_imported(self):
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, self.profile.modules)
+
+    def test_time_attributed_to_apps(self):
+        apps = dict(self.profile.by_app())
+        self.assertIn('animal', apps)
+        self.assertIn('django.contrib.auth', apps)
+
+
+class ParseImportTimeTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     animal.models\n'
+            'import time:       300 |        420 |   animal\n'
+        )
+        timings = parse_importtime(output)
+        self.assertEqual([t.module for t in timings], ['animal.models', 'animal'])
+        self.assertEqual(timings[1].cumulative_us, 420)
+        self.assertEqual(timings[0].depth, 2)
+        self.assertEqual(timings[1].depth, 1)
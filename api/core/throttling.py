@@ -0,0 +1,69 @@
+"""
+Request throttles backed by the Django cache framework
+"""
+
+import hashlib
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import throttling
+from rest_framework.settings import api_settings
+
+
+THROTTLE_CACHE = 'throttle'
+
+
+class SettingsRateMixin:
+    """Resolve the cache and rates per request so settings overrides apply"""
+
+    @property
+    def cache(self):
+        return caches[THROTTLE_CACHE]
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+
+class UserRateThrottle(SettingsRateMixin, throttling.UserRateThrottle):
+    """Per-user limit, falling back to the client address for anonymous requests"""
+
+
+class ScopedIPRateThrottle(SettingsRateMixin, throttling.ScopedRateThrottle):
+    """Limit a view's `throttle_scope` per client address"""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class ScopedEmailRateThrottle(SettingsRateMixin, throttling.ScopedRateThrottle):
+    """Limit a view's `throttle_scope` per email address in the request body
+
+    Uses the `<throttle_scope>_email` rate, so one account can't be hammered
+    from many addresses.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, self.scope_attr, None)
+        if not scope:
+            return True
+        self.scope = f'{scope}_email'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return throttling.SimpleRateThrottle.allow_request(self, request, view)
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email:
+            return None
+        if isinstance(email, str):
+            ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        else:
+            # Not an address (e.g. a JSON number or list); validation rejects it later
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
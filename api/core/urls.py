@@ -14,23 +14,34 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView
-)
+from django.urls.resolvers import RoutePattern, URLResolver
+from core.metrics import metrics_view
+from core.schema import StaticSchemaView
+
+
+def lazy_include(route, urlconf_module, namespace=None):
+    """Like path(route, include(...)) but the module is imported on first use
+
+    include() imports its module immediately; a resolver built from the
+    dotted path defers that until a request is routed under `route` or a
+    URL is reversed.
+    """
+    return URLResolver(
+        RoutePattern(route, is_endpoint=False),
+        urlconf_module,
+        app_name=namespace,
+        namespace=namespace,
+    )
+
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-     path("api/schema/", SpectacularAPIView.as_view(), name='api-schema'),
-      path(
-        "api/docs/",
-        SpectacularSwaggerView.as_view(url_name='api-schema'),
-        name='api-docs'
-    ),
+    lazy_include('admin/', 'core.admin_urls', namespace='admin'),
+     path("api/schema/", StaticSchemaView.as_view(), name='api-schema'),
+    lazy_include('api/docs/', 'core.docs_urls'),
     path('api/user/', include('user.urls')),
     path('api/', include('animal.urls')),
     path('api_auth/', include('rest_framework.urls')),
+    path('metrics', metrics_view, name='metrics'),
 
 ]
@@ -1,12 +1,23 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
+from animal.deletion import delete_user, queue_user_deletion
+from animal.models import Animal
 from user import models
 
 
+@admin.action(description=_("Delete selected users in the background"))
+def queue_deletion(modeladmin, request, queryset):
+    for user in queryset:
+        queue_user_deletion(user)
+    modeladmin.message_user(request, _("Queued %d users for deletion.") % len(queryset))
+
+
 class UserAdmin(BaseUserAdmin):
     ordering = ['id']
+    actions = [queue_deletion]
     list_display = ['email', 'name', 'is_active', 'is_staff']
+    search_fields = ['email', 'name']
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         (
@@ -22,6 +33,30 @@ class UserAdmin(BaseUserAdmin):
         (_("Important dates"), {'fields': ('last_login',)})
     )
     readonly_fields = ['last_login']
+
+    def get_deleted_objects(self, objs, request):
+        """Summarise the confirmation page instead of collecting every row the users own"""
+        users = list(objs)
+        opts = self.model._meta
+        model_count = {
+            opts.verbose_name_plural: len(users),
+            Animal._meta.verbose_name_plural: Animal.objects.filter(owner__in=users).count(),
+        }
+        perms_needed = set()
+        for model in (self.model, Animal):
+            model_opts = model._meta
+            if not request.user.has_perm(f'{model_opts.app_label}.delete_{model_opts.model_name}'):
+                perms_needed.add(model_opts.verbose_name)
+        return [str(user) for user in users], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        if delete_user(obj):
+            self.message_user(request, _("%s has a large history and is deleted in the background.") % obj, messages.WARNING)
+
+    def delete_queryset(self, request, queryset):
+        queued = sum(1 for user in queryset if delete_user(user))
+        if queued:
+            self.message_user(request, _("%d users with large histories are deleted in the background.") % queued, messages.WARNING)
     add_fieldsets = (
         (None, {
                     'classes': ('wide',),
@@ -0,0 +1,169 @@
+"""
+Bulk provisioning of user accounts from a CSV file
+"""
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+
+
+RESULT_FIELDS = ['line', 'email', 'status', 'token', 'message']
+
+
+def _init_worker():
+    """Make settings usable in pool workers that were spawned rather than forked"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    django.setup()
+
+
+def hash_passwords(passwords, workers):
+    """Hash passwords, spreading the work across a process pool"""
+    if workers <= 1 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+class Command(BaseCommand):
+    help = 'Create users from a CSV file with email, name and password columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='CSV with an email column and optional name and password columns')
+        parser.add_argument('--output', help='Write per-row results to this CSV file instead of stdout')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes used for password hashing')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-tokens', action='store_true', help='Do not issue auth tokens')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        batch_size = options['batch_size']
+        results = {}
+
+        rows = self.read_rows(options['csv_file'], results)
+        existing = set()
+        emails = [row['email'] for row in rows]
+        for start in range(0, len(emails), batch_size):
+            existing.update(
+                User.objects.filter(email__in=emails[start:start + batch_size])
+                .values_list('email', flat=True)
+            )
+        for row in rows:
+            if row['email'] in existing:
+                results[row['line']] = self.result(row, 'exists', message='User already exists')
+        rows = [row for row in rows if row['email'] not in existing]
+
+        hashes = hash_passwords([row['password'] for row in rows], options['workers'])
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            users = [
+                User(email=row['email'], name=row['name'], password=password)
+                for row, password in zip(batch, hashes[start:start + batch_size])
+            ]
+            created = self.insert_batch(batch, users, results)
+            created_emails = {user.email for user in created}
+            keys = {}
+            if created and not options['no_tokens']:
+                # Not every backend returns the ids of bulk inserted rows
+                user_ids = User.objects.filter(email__in=created_emails).values_list('email', 'id')
+                tokens = [Token(user_id=user_id, key=Token.generate_key()) for _, user_id in user_ids]
+                Token.objects.bulk_create(tokens)
+                emails = {user_id: email for email, user_id in user_ids}
+                keys = {emails[token.user_id]: token.key for token in tokens}
+            for row in batch:
+                if row['email'] in created_emails:
+                    results[row['line']] = self.result(row, 'created', token=keys.get(row['email'], ''))
+
+        self.write_results(results, options['output'])
+        created_count = sum(1 for result in results.values() if result['status'] == 'created')
+        self.stderr.write(self.style.SUCCESS(
+            f'Created {created_count} of {len(results)} users'
+        ))
+
+    def read_rows(self, path, results):
+        """Parse and validate the CSV, recording rejected rows in results"""
+        User = get_user_model()
+        seen = set()
+        rows = []
+        try:
+            handle = open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+        with handle:
+            reader = csv.DictReader(handle)
+            if 'email' not in (reader.fieldnames or []):
+                raise CommandError('CSV must have an email column')
+            for line, record in enumerate(reader, start=2):
+                row = {
+                    'line': line,
+                    'email': User.objects.normalize_email((record.get('email') or '').strip()),
+                    'name': (record.get('name') or '').strip(),
+                    'password': record.get('password') or None,
+                }
+                try:
+                    validate_email(row['email'])
+                except ValidationError:
+                    results[line] = self.result(row, 'invalid', message='Invalid email address')
+                    continue
+                if row['email'] in seen:
+                    results[line] = self.result(row, 'invalid', message='Duplicate email in file')
+                    continue
+                if row['password']:
+                    try:
+                        validate_password(row['password'], User(email=row['email'], name=row['name']))
+                    except ValidationError as exc:
+                        results[line] = self.result(row, 'invalid', message=' '.join(exc.messages))
+                        continue
+                seen.add(row['email'])
+                rows.append(row)
+        return rows
+
+    def insert_batch(self, batch, users, results):
+        """Insert a batch in one statement, falling back to row by row on conflicts"""
+        try:
+            with transaction.atomic():
+                return get_user_model().objects.bulk_create(users)
+        except IntegrityError:
+            pass
+        created = []
+        for row, user in zip(batch, users):
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                created.append(user)
+            except IntegrityError as exc:
+                user.pk = None
+                results[row['line']] = self.result(row, 'error', message=str(exc))
+        return created
+
+    def result(self, row, status, token='', message=''):
+        return {
+            'line': row['line'],
+            'email': row['email'],
+            'status': status,
+            'token': token,
+            'message': message,
+        }
+
+    def write_results(self, results, output):
+        handle = open(output, 'w', newline='', encoding='utf-8') if output else self.stdout
+        try:
+            writer = csv.DictWriter(handle, fieldnames=RESULT_FIELDS, lineterminator='\n')
+            writer.writeheader()
+            for line in sorted(results):
+                writer.writerow(results[line])
+        finally:
+            if output:
+                handle.close()
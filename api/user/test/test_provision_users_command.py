@@ -0,0 +1,93 @@
+"""
+Tests for the provision_users management command
+"""
+
+import csv
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+
+class ProvisionUsersCommandTests(TestCase):
+    """Test bulk user provisioning from CSV"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_csv(self, rows):
+        path = os.path.join(self.tmpdir.name, 'users.csv')
+        with open(path, 'w', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=['email', 'name', 'password'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def provision(self, path, *args):
+        out = StringIO()
+        call_command('provision_users', path, *args, stdout=out, stderr=StringIO())
+        out.seek(0)
+        return {row['email']: row for row in csv.DictReader(out)}
+
+    def test_provision_users_with_tokens(self):
+        """Test users are created with hashed passwords and tokens"""
+        rows = [
+            {'email': f'staff{i}@example.com', 'name': f'Staff {i}', 'password': f'secret{i}!'}
+            for i in range(25)
+        ]
+        results = self.provision(self.write_csv(rows), '--workers', '2', '--batch-size', '10')
+
+        self.assertEqual(get_user_model().objects.count(), 25)
+        user = get_user_model().objects.get(email='staff3@example.com')
+        self.assertTrue(user.check_password('secret3!'))
+        self.assertEqual(user.name, 'Staff 3')
+        self.assertEqual(results['staff3@example.com']['status'], 'created')
+        self.assertEqual(results['staff3@example.com']['token'], Token.objects.get(user=user).key)
+
+    def test_per_row_results(self):
+        """Test existing, duplicate and invalid rows are reported, not created"""
+        get_user_model().objects.create_user('taken@example.com', 'Herd-Book-42')
+        rows = [
+            {'email': 'taken@example.com', 'name': 'Taken', 'password': 'Herd-Book-42'},
+            {'email': 'new@example.com', 'name': 'New', 'password': 'Herd-Book-42'},
+            {'email': 'new@example.com', 'name': 'Again', 'password': 'Herd-Book-42'},
+            {'email': 'not-an-email', 'name': 'Bad', 'password': 'Herd-Book-42'},
+        ]
+        output = os.path.join(self.tmpdir.name, 'results.csv')
+        call_command('provision_users', self.write_csv(rows), '--workers', '1',
+                     '--no-tokens', '--output', output, stderr=StringIO())
+
+        with open(output, newline='') as handle:
+            statuses = [row['status'] for row in csv.DictReader(handle)]
+        self.assertEqual(statuses, ['exists', 'created', 'invalid', 'invalid'])
+        self.assertEqual(get_user_model().objects.count(), 2)
+        self.assertFalse(Token.objects.exists())
+
+    def test_missing_password_is_unusable(self):
+        """Test rows without a password get an unusable password"""
+        rows = [{'email': 'nopass@example.com', 'name': 'No Pass', 'password': ''}]
+        self.provision(self.write_csv(rows), '--workers', '1')
+        user = get_user_model().objects.get(email='nopass@example.com')
+        self.assertFalse(user.has_usable_password())
+
+    def test_weak_passwords_rejected(self):
+        """Test provided passwords must pass AUTH_PASSWORD_VALIDATORS"""
+        rows = [
+            {'email': 'short@example.com', 'name': 'Short', 'password': 'pass1'},
+            {'email': 'common@example.com', 'name': 'Common', 'password': 'password'},
+            {'email': 'strong@example.com', 'name': 'Strong', 'password': 'Herd-Book-42'},
+        ]
+        results = self.provision(self.write_csv(rows), '--workers', '1')
+
+        self.assertEqual(results['short@example.com']['status'], 'invalid')
+        self.assertIn('too short', results['short@example.com']['message'])
+        self.assertEqual(results['common@example.com']['status'], 'invalid')
+        self.assertEqual(results['strong@example.com']['status'], 'created')
+        self.assertEqual(
+            list(get_user_model().objects.values_list('email', flat=True)), ['strong@example.com'],
+        )
@@ -0,0 +1,148 @@
+"""
+Tests for throttling of the user and animal APIs
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ANIMAL_URL = reverse('animal:animal-list')
+
+
+def throttle_settings(**rates):
+    """Settings enabling a real throttle cache with the given rates"""
+    rest_framework = dict(settings.REST_FRAMEWORK)
+    rest_framework['DEFAULT_THROTTLE_RATES'] = {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates
+    }
+    return override_settings(
+        REST_FRAMEWORK=rest_framework,
+        CACHES={
+            **settings.CACHES,
+            'throttle': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'throttle-tests',
+            },
+        },
+    )
+
+
+class ThrottleTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        caches['throttle'].clear()
+
+
+@throttle_settings(login='3/min', login_email='2/min')
+class TokenThrottleTests(ThrottleTestCase):
+    """Test throttling of the token endpoint"""
+
+    def test_login_throttled_per_email(self):
+        """Test repeated attempts on one account are throttled with Retry-After"""
+        payload = {'email': 'test@example.com', 'password': 'badpass'}
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+    def test_login_throttled_per_ip(self):
+        """Test attempts across many accounts from one address are throttled"""
+        for i in range(3):
+            res = self.client.post(TOKEN_URL, {'email': f'user{i}@example.com', 'password': 'x'})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, {'email': 'user9@example.com', 'password': 'x'})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_ignored_without_proxies(self):
+        """Test a client can't reset its address limit with X-Forwarded-For"""
+        for i in range(3):
+            res = self.client.post(
+                TOKEN_URL, {'email': f'user{i}@example.com', 'password': 'x'},
+                HTTP_X_FORWARDED_FOR=f'203.0.113.{i}',
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL, {'email': 'user9@example.com', 'password': 'x'},
+            HTTP_X_FORWARDED_FOR='203.0.113.9',
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_behind_proxy(self):
+        """Test the client address is taken from the proxy's hop in X-Forwarded-For"""
+        rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            for i in range(3):
+                self.client.post(
+                    TOKEN_URL, {'email': f'user{i}@example.com', 'password': 'x'},
+                    HTTP_X_FORWARDED_FOR=f'198.51.100.{i}, 203.0.113.1',
+                )
+            res = self.client.post(
+                TOKEN_URL, {'email': 'user9@example.com', 'password': 'x'},
+                HTTP_X_FORWARDED_FOR='198.51.100.9, 203.0.113.1',
+            )
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            res = self.client.post(
+                TOKEN_URL, {'email': 'user9@example.com', 'password': 'x'},
+                HTTP_X_FORWARDED_FOR='198.51.100.9, 203.0.113.2',
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_email_throttle_ignores_case(self):
+        """Test the per-email key is normalized"""
+        self.client.post(TOKEN_URL, {'email': 'Test@Example.com', 'password': 'x'})
+        self.client.post(TOKEN_URL, {'email': 'test@example.com', 'password': 'x'})
+        res = self.client.post(TOKEN_URL, {'email': 'TEST@example.com', 'password': 'x'})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_non_string_email_rejected(self):
+        """Test an email that is not a string is throttled per address and fails validation"""
+        for email in (123, ['test@example.com']):
+            res = self.client.post(TOKEN_URL, {'email': email, 'password': 'x'}, format='json')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, {'email': 123, 'password': 'x'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+@throttle_settings(signup='1/min')
+class SignupThrottleTests(ThrottleTestCase):
+    """Test throttling of the signup endpoint"""
+
+    def test_signup_throttled_per_ip(self):
+        payload = {'email': 'one@example.com', 'password': 'pass123!', 'name': 'One'}
+        res = self.client.post(CREATE_USER_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        payload['email'] = 'two@example.com'
+        res = self.client.post(CREATE_USER_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(get_user_model().objects.filter(email='two@example.com').exists())
+
+
+@throttle_settings(user='2/min')
+class AnimalThrottleTests(ThrottleTestCase):
+    """Test the per-user throttle on the animal API"""
+
+    def test_animal_api_throttled_per_user(self):
+        user = get_user_model().objects.create_user('test@example.com', 'test123456')
+        other = get_user_model().objects.create_user('other@example.com', 'test123456')
+        self.client.force_authenticate(user)
+        for _ in range(2):
+            self.assertEqual(self.client.get(ANIMAL_URL).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(ANIMAL_URL).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(ANIMAL_URL).status_code, status.HTTP_200_OK)
@@ -9,12 +9,18 @@ from rest_framework import (
     permissions)
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
+from core.throttling import (
+    ScopedIPRateThrottle,
+    ScopedEmailRateThrottle,
+    UserRateThrottle)
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = UserSerializer
+    throttle_classes = [ScopedIPRateThrottle, ScopedEmailRateThrottle]
+    throttle_scope = 'signup'
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -22,6 +28,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     authentication_classes = [authentication.TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
 
     def get_object(self):
         """Retrieve and return authenticated user"""
@@ -32,3 +39,5 @@ class CreateUserTokenView(ObtainAuthToken):
     """Create a token for user"""
     serializer_class = AuthTokenSerializer
     render_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [ScopedIPRateThrottle, ScopedEmailRateThrottle]
+    throttle_scope = 'login'